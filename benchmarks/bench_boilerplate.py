@@ -0,0 +1,67 @@
+# benchmarks/bench_boilerplate.py
+# Plantilla del sitio fuera de cada página (chatbot.boilerplate), sobre las
+# páginas de data/web_snapshot: trozos a embeber con y sin quitar la plantilla,
+# distribución del texto propio por página y costo del barrido por consulta
+# (DenseVectors.search sobre tantos vectores como trozos, vectores aleatorios).
+# Uso:  python -m benchmarks.bench_boilerplate [--queries 200] [--dim 384]
+
+import argparse
+import glob
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+from llama_index.core.node_parser import SentenceSplitter
+from llama_index.core.schema import Document
+
+from chatbot import catalog
+from chatbot.boilerplate import strip_boilerplate
+from chatbot.config import CHUNK_OVERLAP, CHUNK_SIZE, SNAPSHOT_DIR, TOP_K
+from chatbot.vector_store import DenseVectors
+
+
+def scan_ms(n: int, dim: int, queries: int, rnd: np.random.Generator) -> float:
+    dense = DenseVectors([str(i) for i in range(n)], rnd.standard_normal((n, dim), dtype=np.float32))
+    q = rnd.standard_normal((queries, dim), dtype=np.float32)
+    t0 = time.perf_counter()
+    for row in q:
+        dense.search(row, TOP_K)
+    return (time.perf_counter() - t0) * 1e3 / queries
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--dim", type=int, default=384)
+    args = ap.parse_args()
+
+    docs = []
+    for i, p in enumerate(sorted(glob.glob(os.path.join(SNAPSHOT_DIR, "*.txt")))):
+        with open(p, encoding="utf-8") as f:
+            docs.append(Document(text=f.read(), metadata={"source": f"pagina-{i}", "kind": "page"}))
+    splitter = SentenceSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    before = splitter.get_nodes_from_documents(docs)
+
+    report = os.path.join(tempfile.mkdtemp(prefix="bench_boilerplate_"), "report.jsonl")
+    t0 = time.perf_counter()
+    stripped = strip_boilerplate(docs, report_path=report)
+    t_strip = time.perf_counter() - t0
+    after = splitter.get_nodes_from_documents(stripped)
+
+    ratios = sorted(it["ratio"] for it in catalog.iter_items(report))
+    rnd = np.random.default_rng(0)
+    s_before = scan_ms(len(before), args.dim, args.queries, rnd)
+    s_after = scan_ms(len(after), args.dim, args.queries, rnd)
+
+    print(f"\n{len(docs)} páginas | plantilla aprendida y quitada en {t_strip * 1e3:.0f} ms")
+    print(f"Texto propio por página: mín {ratios[0]:.0%}, mediana {statistics.median(ratios):.0%}, "
+          f"máx {ratios[-1]:.0%}")
+    print(f"Trozos a embeber: {len(before)} → {len(after)} (incluye la plantilla una vez; "
+          f"{1 - len(after) / len(before):.0%} menos)")
+    print(f"Barrido por consulta (top-{TOP_K}, dim {args.dim}): {s_before:.3f} → {s_after:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# benchmarks/bench_build_embed.py
+# Embeddings de indexación (chatbot.build_embedder) sobre un corpus sintético
+# del tamaño del sitio: trozos/segundo por número de procesos y tamaño de
+# tanda, incluida la carga del modelo en cada hijo, y si el resultado sale en
+# el mismo orden (y con los mismos vectores) que con un solo proceso.
+# Uso:  python -m benchmarks.bench_build_embed [--chunks 0] [--workers 1,2,4] [--batch 8,32,64]
+#   --chunks 0 → tantos trozos como nodos tiene el índice activo (o 1000).
+
+import argparse
+import os
+import random
+import time
+
+import numpy as np
+
+from chatbot.build_embedder import embed_texts, resolve_workers
+from chatbot.config import CHUNK_SIZE, EMBEDDING_MODEL, STORAGE_DIR
+
+WORDS = ("salud pública vigilancia epidemiológica contrato convocatoria municipio valle cauca trámite "
+         "certificado sanitario inspección establecimiento alimentos vacunación informe gestión plan "
+         "anual adquisiciones resolución decreto atención ciudadano petición queja reclamo sede horario "
+         "laboratorio muestras agua consumo humano zoonosis control vectores dengue").split()
+
+
+def site_chunks() -> int:
+    try:
+        from chatbot.storage_versions import current_dir
+        from chatbot.vector_store import BinaryVectorStore
+
+        return len(BinaryVectorStore(current_dir(STORAGE_DIR))._dense) or 1000
+    except (OSError, ValueError):
+        return 1000
+
+
+def corpus(n: int, seed: int = 0) -> list[str]:
+    rnd = random.Random(seed)
+    # ~0.75 palabras por token: trozos de largo parecido a los del splitter
+    return [" ".join(rnd.choices(WORDS, k=rnd.randint(CHUNK_SIZE // 3, int(CHUNK_SIZE * 0.75))))
+            for _ in range(n)]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--chunks", type=int, default=0)
+    ap.add_argument("--workers", default="1,2,4")
+    ap.add_argument("--batch", default="8,32,64")
+    ap.add_argument("--threads", type=int, default=0, help="hilos de torch por proceso (0 = núcleos / procesos)")
+    args = ap.parse_args()
+
+    n = args.chunks or site_chunks()
+    texts = corpus(n)
+    from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+
+    local = HuggingFaceEmbedding(model_name=EMBEDDING_MODEL)
+    rows, ref = [], None
+    for workers in (int(w) for w in args.workers.split(",")):
+        for batch in (int(b) for b in args.batch.split(",")):
+            t0 = time.perf_counter()
+            out = embed_texts(texts, local_model=local, workers=workers, batch_size=batch,
+                              threads=args.threads, min_parallel=0)
+            wall = time.perf_counter() - t0
+            if ref is None:
+                ref = out
+            same = out.shape == ref.shape and bool(np.allclose(out, ref, atol=1e-4))
+            rows.append((workers, resolve_workers(workers, args.threads)[1], batch, wall, same))
+
+    base = rows[0][3]
+    print(f"\n{n} trozos sintéticos, {os.cpu_count()} núcleos, modelo {EMBEDDING_MODEL}")
+    print(f"{'procesos':>8} {'hilos':>5} {'tanda':>5} {'segundos':>9} {'trozos/s':>9} {'vs 1.ª':>7}  orden/vectores")
+    for workers, threads, batch, wall, same in rows:
+        print(f"{workers:>8} {threads:>5} {batch:>5} {wall:>9.2f} {n / wall:>9.0f} {base / wall:>6.2f}x  "
+              f"{'iguales' if same else 'DISTINTOS'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# benchmarks/bench_catalog.py
+# Catálogos: JSON completo con indent=2 (antes) vs JSON Lines en streaming
+# (chatbot.catalog), con N entradas sintéticas tipo doc_catalog:
+#   escritura: lista en memoria + json.dump  vs  CatalogWriter.add por entrada
+#   lectura:   json.load completo            vs  iter_items (perezoso)
+#   búsqueda:  json.load + recorrido         vs  CatalogIndex (offsets del .idx)
+# Mide tiempo y pico de memoria (tracemalloc), verifica que los contenidos sean
+# iguales y que un lector concurrente nunca vea un catálogo a medio escribir
+# mientras otro hilo lo reescribe una y otra vez.
+# Uso:  python -m benchmarks.bench_catalog [--items 50000] [--lookups 200]
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from chatbot import catalog
+from chatbot.catalog import CatalogIndex, CatalogWriter
+
+
+def make_item(i: int, rnd: random.Random) -> dict:
+    page = f"https://www.uesvalle.gov.co/seccion-{i // 3}/pagina-{i // 3}/"
+    return {
+        "doc_url": f"https://www.uesvalle.gov.co/documentos/{i // 2}/archivo-{i}.pdf",
+        "from_page": page,
+        "page_title": f"Página {i // 3} — Unidad Ejecutora de Saneamiento",
+        "h1": f"Sección {i // 3}",
+        "link_text": f"Documento {i} ({rnd.randrange(2000, 2025)})",
+        "context": " ".join(rnd.choice(("resolución", "acuerdo", "informe", "plan", "contrato",
+                                         "anexo", "vigencia", "saneamiento", "ambiental"))
+                            for _ in range(rnd.randrange(10, 60))),
+        "section": f"seccion-{i // 3} / pagina-{i // 3}",
+    }
+
+
+def measure(fn):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    out = fn()
+    dt = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return out, dt, peak
+
+
+def items_gen(n: int, seed: int):
+    rnd = random.Random(seed)
+    return (make_item(i, rnd) for i in range(n))
+
+
+def write_json(path: str, n: int, seed: int):
+    docs = list(items_gen(n, seed))
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"count": len(docs), "items": docs}, f, ensure_ascii=False, indent=2)
+
+
+def write_jsonl(path: str, n: int, seed: int):
+    with CatalogWriter(path, key="doc_url") as w:
+        for it in items_gen(n, seed):
+            w.add(it)
+
+
+def lookup_json(path: str, keys: list[str]) -> list[list[dict]]:
+    with open(path, "r", encoding="utf-8") as f:
+        items = json.load(f)["items"]
+    return [[it for it in items if it["doc_url"] == k] for k in keys]
+
+
+def lookup_jsonl(path: str, keys: list[str]) -> list[list[dict]]:
+    with CatalogIndex(path, "doc_url") as idx:
+        return [idx.get(k) for k in keys]
+
+
+def concurrent_check(path: str, rounds: int = 30) -> int:
+    """Un hilo reescribe el catálogo (tamaños distintos); otro lo lee sin parar."""
+    stop = threading.Event()
+    bad, reads = [], [0]
+
+    def reader():
+        while not stop.is_set():
+            items = list(catalog.iter_items(path))
+            reads[0] += 1
+            # cada versión k tiene k entradas, todas marcadas con k
+            if items and any(it["v"] != len(items) for it in items):
+                bad.append(len(items))
+
+    t = threading.Thread(target=reader)
+    t.start()
+    for k in range(1, rounds + 1):
+        with CatalogWriter(path, key="i") as w:
+            for i in range(k * 50):
+                w.add({"i": i, "v": k * 50})
+    stop.set()
+    t.join()
+    if bad:
+        raise SystemExit(f"❌ lector vio catálogos a medias: {bad[:5]}")
+    return reads[0]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--items", type=int, default=50000)
+    ap.add_argument("--lookups", type=int, default=200)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench_catalog_")
+    p_json = os.path.join(tmp, "doc_catalog.json")
+    p_jsonl = os.path.join(tmp, "doc_catalog.jsonl")
+
+    _, w_json, m_w_json = measure(lambda: write_json(p_json, args.items, args.seed))
+    _, w_jsonl, m_w_jsonl = measure(lambda: write_jsonl(p_jsonl, args.items, args.seed))
+
+    def load_json():
+        with open(p_json, "r", encoding="utf-8") as f:
+            return sum(1 for _ in json.load(f)["items"])
+
+    n_json, r_json, m_r_json = measure(load_json)
+    n_jsonl, r_jsonl, m_r_jsonl = measure(lambda: sum(1 for _ in catalog.iter_items(p_jsonl)))
+    assert n_json == n_jsonl == args.items == catalog.count(p_jsonl)
+    with open(p_json, "r", encoding="utf-8") as f:
+        assert json.load(f)["items"] == catalog.read_all(p_jsonl), "contenidos distintos"
+
+    rnd = random.Random(args.seed)
+    keys = [f"https://www.uesvalle.gov.co/documentos/{j}/archivo-{2 * j + rnd.randrange(2)}.pdf"
+            for j in (rnd.randrange(args.items // 2) for _ in range(args.lookups))]
+    a, l_json, m_l_json = measure(lambda: lookup_json(p_json, keys))
+    b, l_jsonl, m_l_jsonl = measure(lambda: lookup_jsonl(p_jsonl, keys))
+    assert a == b, "búsquedas distintas"
+
+    reads = concurrent_check(os.path.join(tmp, "concurrente.jsonl"))
+
+    mb = 1 / 1e6
+    print(f"\n{args.items} entradas | JSON {os.path.getsize(p_json) * mb:.1f} MB, "
+          f"JSONL {os.path.getsize(p_jsonl) * mb:.1f} MB (+ .idx {os.path.getsize(p_jsonl + '.idx') * mb:.1f} MB)")
+    print(f"{'':>22} {'JSON (antes)':>20} {'JSONL (ahora)':>20}")
+    for name, (t1, m1), (t2, m2) in (
+        ("escritura", (w_json, m_w_json), (w_jsonl, m_w_jsonl)),
+        ("lectura completa", (r_json, m_r_json), (r_jsonl, m_r_jsonl)),
+        (f"{args.lookups} búsquedas", (l_json, m_l_json), (l_jsonl, m_l_jsonl)),
+    ):
+        print(f"{name:>22} {t1 * 1e3:8.0f} ms {m1 * mb:7.1f} MB {t2 * 1e3:8.0f} ms {m2 * mb:7.1f} MB")
+    print(f"Lector concurrente: {reads} lecturas durante 30 reescrituras, ninguna a medias ✅")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# benchmarks/bench_dedupe.py
+# Casi-duplicados antes de indexar, sobre las páginas de data/web_snapshot
+# (+ copias "paginadas" con una línea distinta, como ?page=2 de un listado):
+# trozos y embeddings sin deduplicar vs. con chatbot.dedupe (páginas agrupadas
+# + trozos repetidos descartados), y tiempo de la etapa de huellas.
+# Uso:  python -m benchmarks.bench_dedupe [--paginated 10] [--real]
+#
+# Sin --real el tiempo de embedding se estima con --ms-per-chunk; con --real
+# se embeben de verdad ambos conjuntos con EMBEDDING_MODEL.
+
+import argparse
+import glob
+import os
+import time
+
+from llama_index.core.node_parser import SentenceSplitter
+from llama_index.core.schema import Document, MetadataMode
+
+from chatbot.config import CHUNK_OVERLAP, CHUNK_SIZE, EMBEDDING_MODEL, SNAPSHOT_DIR
+from chatbot.dedupe import NearDupIndex, cluster
+
+
+def load_pages(paginated: int) -> list[Document]:
+    texts = [open(p, encoding="utf-8").read() for p in sorted(glob.glob(os.path.join(SNAPSHOT_DIR, "*.txt")))]
+    docs = [Document(text=t, metadata={"source": f"pagina-{i}", "kind": "page"}) for i, t in enumerate(texts)]
+    for j in range(min(paginated, len(texts))):
+        docs.append(Document(text=texts[j] + f"\nPágina 2 de {j + 2}",
+                             metadata={"source": f"pagina-{j}?page=2", "kind": "page"}))
+    return docs
+
+
+def embed_seconds(texts: list[str]) -> float:
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(EMBEDDING_MODEL)
+    t0 = time.perf_counter()
+    model.encode(texts, batch_size=32)
+    return time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--paginated", type=int, default=10)
+    ap.add_argument("--ms-per-chunk", type=float, default=25.0, help="costo estimado por trozo (sin --real)")
+    ap.add_argument("--real", action="store_true")
+    args = ap.parse_args()
+
+    docs = load_pages(args.paginated)
+    splitter = SentenceSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    all_nodes = splitter.get_nodes_from_documents(docs)
+
+    t0 = time.perf_counter()
+    dup_of = cluster([(d.metadata["source"], d.text) for d in docs])
+    t_fp = time.perf_counter() - t0
+    chunks = splitter.get_nodes_from_documents([d for d in docs if d.metadata["source"] not in dup_of])
+    t0 = time.perf_counter()
+    index = NearDupIndex()
+    kept = [n for n in chunks
+            if index.match_or_add(n.get_content(metadata_mode=MetadataMode.NONE), n.node_id) is None]
+    t_fp += time.perf_counter() - t0
+
+    print(f"\n{len(docs)} páginas ({args.paginated} paginadas) → {len(dup_of)} agrupadas con otra")
+    print(f"Trozos: {len(all_nodes)} sin deduplicar → {len(kept)} con dedupe "
+          f"({1 - len(kept) / len(all_nodes):.0%} menos); huellas + agrupación: {t_fp * 1e3:.0f} ms")
+    if args.real:
+        t_all = embed_seconds([n.get_content(metadata_mode=MetadataMode.EMBED) for n in all_nodes])
+        t_kept = embed_seconds([n.get_content(metadata_mode=MetadataMode.EMBED) for n in kept])
+        print(f"Embeddings ({EMBEDDING_MODEL}): {t_all:.1f}s → {t_kept:.1f}s")
+    else:
+        est = args.ms_per_chunk / 1e3
+        print(f"Embeddings (estimado, {args.ms_per_chunk:g} ms/trozo): "
+              f"{len(all_nodes) * est:.1f}s → {len(kept) * est + t_fp:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# benchmarks/bench_doc_download.py
+# Descarga de un documento grande desde un servidor HTTP local (ETag, Range,
+# If-Range, If-None-Match): memoria pico del proceso con la descarga anterior
+# (r.content en memoria) vs. chatbot.doc_download (streaming a .part), una
+# transferencia cortada a la mitad que se reanuda con Range, y una segunda
+# sincronización con el archivo sin cambios (304).
+# Uso:  python -m benchmarks.bench_doc_download [--mb 200] [--cut 0.5]
+#
+# Cada descarga medida corre en un subproceso propio (la memoria pico,
+# ru_maxrss, no baja dentro de un proceso).
+
+import argparse
+import hashlib
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BLOCK = 1 << 20
+
+
+def serve(path: str, cut_first: int):
+    """Sirve `path` en /doc.pdf; la primera respuesta completa se corta tras `cut_first` bytes."""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        etag = '"%s"' % hashlib.sha1(f.read(BLOCK)).hexdigest()
+    state = {"cut": cut_first, "sent": 0, "lock": threading.Lock()}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *a):
+            pass
+
+        def do_GET(self):
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            start = 0
+            rng = self.headers.get("Range", "")
+            if rng.startswith("bytes=") and self.headers.get("If-Range") in (None, etag):
+                start = int(rng[6:].split("-")[0])
+            self.send_response(206 if start else 200)
+            self.send_header("Content-Type", "application/pdf")
+            self.send_header("Content-Length", str(size - start))
+            self.send_header("ETag", etag)
+            if start:
+                self.send_header("Content-Range", f"bytes {start}-{size - 1}/{size}")
+            self.end_headers()
+            with state["lock"]:
+                cut, state["cut"] = state["cut"], 0
+            limit = cut if cut and not start else size - start
+            with open(path, "rb") as f:
+                f.seek(start)
+                left = limit
+                while left > 0:
+                    block = f.read(min(BLOCK, left))
+                    self.wfile.write(block)
+                    left -= len(block)
+                    with state["lock"]:
+                        state["sent"] += len(block)
+            if cut and not start:
+                self.close_connection = True
+
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    srv.daemon_threads = True
+    srv.state = state
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv
+
+
+def child(mode: str, url: str, dest: str, state_dir: str):
+    """Descarga en este proceso e imprime "<MB pico> <segundos> <estado>"."""
+    from chatbot.http_client import HttpClient
+
+    client = HttpClient(rate=0)
+    t0 = time.perf_counter()
+    if mode == "old":
+        r = client.get(url)
+        r.raise_for_status()
+        with open(dest, "wb") as f:
+            f.write(r.content)
+        status = "nuevo"
+    else:
+        from chatbot.doc_download import download
+
+        status = download(url, dest, client=client, max_bytes=1 << 40, state_dir=state_dir)
+    wall = time.perf_counter() - t0
+    print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, wall, status)
+
+
+def run(mode: str, url: str, dest: str, state_dir: str) -> tuple[float, float, str]:
+    out = subprocess.run([sys.executable, "-m", "benchmarks.bench_doc_download", "--child", mode,
+                          url, dest, state_dir], capture_output=True, text=True, check=True)
+    rss, wall, status = out.stdout.strip().splitlines()[-1].split(" ", 2)
+    return float(rss), float(wall), status
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(*sys.argv[2:6])
+        return
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--mb", type=int, default=200)
+    ap.add_argument("--cut", type=float, default=0.5, help="fracción enviada antes de cortar la 1.ª descarga")
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench_doc_download_")
+    src = os.path.join(tmp, "origen.pdf")
+    with open(src, "wb") as f:
+        for _ in range(args.mb):
+            f.write(os.urandom(BLOCK))
+    size = os.path.getsize(src)
+    state_dir = os.path.join(tmp, "estado")
+
+    srv = serve(src, 0)
+    url = f"http://127.0.0.1:{srv.server_address[1]}/doc.pdf"
+    rss_old, t_old, _ = run("old", url, os.path.join(tmp, "viejo.pdf"), state_dir)
+    rss_new, t_new, _ = run("new", url, os.path.join(tmp, "nuevo.pdf"), state_dir)
+    srv.shutdown()
+
+    srv = serve(src, int(size * args.cut))
+    url = f"http://127.0.0.1:{srv.server_address[1]}/doc.pdf"
+    dest = os.path.join(tmp, "reanudado.pdf")
+    _, t_res, st_res = run("new", url, dest, os.path.join(tmp, "estado-reanudado"))
+    sent = srv.state["sent"]
+    with open(src, "rb") as a, open(dest, "rb") as b:
+        same = hashlib.sha1(a.read()).digest() == hashlib.sha1(b.read()).digest()
+    _, t_304, st_304 = run("new", url, dest, os.path.join(tmp, "estado-reanudado"))
+    srv.shutdown()
+
+    print(f"\nArchivo de {size / 1e6:.0f} MB")
+    print(f"Memoria pico: r.content {rss_old:.0f} MB ({t_old:.2f}s) → streaming {rss_new:.0f} MB ({t_new:.2f}s)")
+    print(f"Corte al {args.cut:.0%}: {st_res} en {t_res:.2f}s, {sent / 1e6:.0f} MB enviados en total "
+          f"(sin reanudar serían {(size * args.cut + size) / 1e6:.0f} MB) | idéntico al origen: {same}")
+    print(f"Segunda sincronización: {st_304} en {t_304 * 1e3:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# benchmarks/bench_embed_batcher.py
+# Throughput de embeddings de consultas con 1, 8 y 32 clientes concurrentes:
+# un forward por pregunta (antes) vs. EmbeddingBatcher (micro-batching).
+# Uso:  python -m benchmarks.bench_embed_batcher [--real] [--seconds 3]
+#         [--window-ms 5] [--max-batch 32] [--clients 1,8,32]
+#
+# Sin --real se usa un encoder simulado con costo fijo + costo por texto, que
+# ejecuta un forward a la vez (como torch ocupando todos los núcleos). Con
+# --real se usa sentence-transformers con EMBEDDING_MODEL.
+
+import argparse
+import statistics
+import threading
+import time
+
+from chatbot.config import EMBEDDING_MODEL
+from chatbot.embed_batcher import EmbeddingBatcher
+
+
+def stub_encoder(fixed_ms: float, per_text_ms: float, dim: int = 384):
+    busy = threading.Lock()
+
+    def encode(texts: list[str]) -> list[list[float]]:
+        with busy:
+            time.sleep((fixed_ms + per_text_ms * len(texts)) / 1e3)
+        return [[float(len(t))] * dim for t in texts]
+    return encode
+
+
+def real_encoder():
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(EMBEDDING_MODEL)
+
+    def encode(texts: list[str]):
+        return model.encode(texts, batch_size=len(texts), convert_to_numpy=True)
+    return encode
+
+
+def run(embed, clients: int, seconds: float) -> tuple[int, list[float]]:
+    lat: list[float] = []
+    stop = time.perf_counter() + seconds
+    lock = threading.Lock()
+
+    def client(i: int):
+        j = 0
+        while time.perf_counter() < stop:
+            t0 = time.perf_counter()
+            embed([f"¿Cuál es el trámite número {i}-{j} en la UESVALLE?"])
+            dt = (time.perf_counter() - t0) * 1e3
+            with lock:
+                lat.append(dt)
+            j += 1
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return len(lat), lat
+
+
+def pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(len(xs) * p))] if xs else float("nan")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--real", action="store_true")
+    ap.add_argument("--seconds", type=float, default=3.0)
+    ap.add_argument("--window-ms", type=float, default=5.0)
+    ap.add_argument("--max-batch", type=int, default=32)
+    ap.add_argument("--clients", default="1,8,32")
+    ap.add_argument("--fixed-ms", type=float, default=12.0)
+    ap.add_argument("--per-text-ms", type=float, default=0.6)
+    args = ap.parse_args()
+
+    encode = real_encoder() if args.real else stub_encoder(args.fixed_ms, args.per_text_ms)
+    encode(["calentamiento"])
+    print(f"Encoder: {'real ' + EMBEDDING_MODEL if args.real else f'simulado {args.fixed_ms}ms + {args.per_text_ms}ms/texto'}"
+          f" | ventana={args.window_ms}ms max_batch={args.max_batch}")
+    print(f"{'clientes':>8} {'modo':>9} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'batch medio':>12} {'cola máx':>9}")
+    for c in [int(x) for x in args.clients.split(",")]:
+        n, lat = run(encode, c, args.seconds)
+        print(f"{c:>8} {'directo':>9} {n / args.seconds:>8.1f} {statistics.median(lat):>8.1f} {pct(lat, .95):>8.1f}"
+              f" {1.0:>12.1f} {'-':>9}")
+        batcher = EmbeddingBatcher(encode, max_batch=args.max_batch, window_ms=args.window_ms)
+        n, lat = run(batcher.embed, c, args.seconds)
+        st = batcher.stats()
+        print(f"{c:>8} {'batcher':>9} {n / args.seconds:>8.1f} {statistics.median(lat):>8.1f} {pct(lat, .95):>8.1f}"
+              f" {st['avg_batch_size']:>12.1f} {st['max_queue_depth']:>9}")
+
+
+if __name__ == "__main__":
+    main()
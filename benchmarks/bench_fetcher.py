@@ -0,0 +1,156 @@
+# benchmarks/bench_fetcher.py
+# Mapeo desde routes.txt: recorrido secuencial (como antes: 1 petición a la
+# vez + 50 ms entre páginas) vs. Fetcher concurrente, contra un servidor HTTP
+# local que sirve los textos de data/web_snapshot envueltos en HTML, con
+# latencia artificial y algunos 503 transitorios (para ejercitar reintentos).
+# Verifica que los tres catálogos salgan byte a byte idénticos.
+# Uso:  python -m benchmarks.bench_fetcher [--pages 300] [--latency-ms 80]
+#         [--workers 8] [--per-host 4] [--rate 20] [--flaky-every 25]
+
+import argparse
+import glob
+import hashlib
+import html
+import os
+import random
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import chatbot.site_map as site_map
+from chatbot.config import SNAPSHOT_DIR
+from chatbot.fetcher import Fetcher
+
+
+def make_pages(n: int) -> list[str]:
+    texts = [open(p, encoding="utf-8").read() for p in sorted(glob.glob(os.path.join(SNAPSHOT_DIR, "*.txt")))]
+    if not texts:
+        texts = ["Página de prueba\nContenido de la UESVALLE."]
+    pages = []
+    for i in range(n):
+        lines = [l for l in texts[i % len(texts)].splitlines() if l.strip()]
+        title = html.escape(lines[0] if lines else f"Página {i}")
+        body = "".join(f"<p>{html.escape(l)}</p>" for l in lines[1:200])
+        docs = "".join(f'<li><a href="/documentos/{i}-{k}.pdf">Documento {k} de la página {i}</a></li>'
+                       for k in range(i % 4))
+        pages.append(f"<html><head><title>{title} {i}</title></head><body>"
+                     f"<h1>Sección {i}</h1>{body}<ul>{docs}</ul></body></html>")
+    return pages
+
+
+def serve(pages: list[str], latency: float, flaky_every: int, max_age: int = 0):
+    """Servidor local; responde ETag/304 y, con max_age > 0, Cache-Control."""
+    seen_fail: set[str] = set()
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *a):
+            pass
+
+        def do_GET(self):
+            with lock:
+                srv.requests += 1
+            time.sleep(latency * random.uniform(0.5, 1.5))
+            parts = self.path.strip("/").split("/")
+            if len(parts) != 2 or parts[0] != "pagina" or not parts[1].isdigit() or int(parts[1]) >= len(pages):
+                self.send_response(404)
+                self.end_headers()
+                return
+            i = int(parts[1])
+            with lock:
+                fail = flaky_every and i % flaky_every == 0 and self.path not in seen_fail
+                if fail:
+                    seen_fail.add(self.path)
+            if fail:
+                self.send_response(503)
+                self.end_headers()
+                return
+            data = pages[i].encode("utf-8")
+            etag = '"%s"' % hashlib.sha1(data).hexdigest()
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("ETag", etag)
+            if max_age:
+                self.send_header("Cache-Control", f"max-age={max_age}")
+            self.end_headers()
+            self.wfile.write(data)
+            with lock:
+                srv.bytes_sent += len(data)
+
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    srv.daemon_threads = True
+    srv.seen_fail = seen_fail
+    srv.bytes_sent = 0
+    srv.requests = 0
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv
+
+
+def run(routes: list[str], out_dir: str, fetcher: Fetcher) -> tuple[float, dict[str, bytes]]:
+    os.makedirs(out_dir, exist_ok=True)
+    site_map.URL_MANIFEST_PATH = os.path.join(out_dir, "url_manifest.jsonl")
+    site_map.DOC_CATALOG_PATH = os.path.join(out_dir, "doc_catalog.jsonl")
+    site_map.SECTIONS_CATALOG_PATH = os.path.join(out_dir, "sections_catalog.jsonl")
+    site_map._load_routes_file = lambda: list(routes)
+    t0 = time.perf_counter()
+    site_map.build_from_routes_file(fetcher)
+    wall = time.perf_counter() - t0
+    files = {}
+    for name in ("url_manifest.jsonl", "doc_catalog.jsonl", "sections_catalog.jsonl"):
+        with open(os.path.join(out_dir, name), "rb") as f:
+            files[name] = f.read()
+    return wall, files
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=300)
+    ap.add_argument("--latency-ms", type=float, default=80)
+    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--per-host", type=int, default=4)
+    ap.add_argument("--rate", type=float, default=20.0, help="req/s por host (0 = sin límite)")
+    ap.add_argument("--flaky-every", type=int, default=25, help="cada N páginas, 1.er intento = 503")
+    args = ap.parse_args()
+
+    random.seed(0)
+    pages = make_pages(args.pages)
+    srv = serve(pages, args.latency_ms / 1e3, args.flaky_every)
+    host = f"127.0.0.1:{srv.server_address[1]}"
+    base = f"http://{host}"
+    routes = [f"{base}/pagina/{i}/" for i in range(args.pages)] + [f"{base}/no-existe/"]
+
+    # el servidor local cuenta como "interno" (enlaces a documentos incluidos)
+    real_is_internal = site_map._is_internal
+    site_map._is_internal = lambda u: urlparse(u).netloc.lower() == host or real_is_internal(u)
+
+    tmp = tempfile.mkdtemp(prefix="bench_fetch_")
+    # antes: una petición a la vez y 50 ms entre páginas (≈ 20 req/s como tope)
+    seq = Fetcher(workers=1, per_host=1, rate=20.0, burst=1, backoff=0.05, adaptive=False)
+    t_seq, f_seq = run(routes, os.path.join(tmp, "seq"), seq)
+    srv.seen_fail.clear()
+    par = Fetcher(workers=args.workers, per_host=args.per_host, rate=args.rate,
+                  burst=args.per_host, backoff=0.05)
+    t_par, f_par = run(routes, os.path.join(tmp, "par"), par)
+    srv.shutdown()
+
+    print(f"\n{args.pages} páginas, latencia ~{args.latency_ms:.0f} ms, 503 transitorio cada {args.flaky_every}")
+    print(f"Secuencial : {t_seq:6.2f}s  ({args.pages / t_seq:5.1f} pág/s) reintentos={seq.stats['retries']}")
+    print(f"Concurrente: {t_par:6.2f}s  ({args.pages / t_par:5.1f} pág/s) reintentos={par.stats['retries']} "
+          f"[workers={args.workers} por_host={args.per_host} rate={args.rate or '∞'}]")
+    print(f"Aceleración: {t_seq / t_par:.1f}×")
+    same = all(f_seq[k] == f_par[k] for k in f_seq)
+    print("Catálogos idénticos:", "✅ sí" if same else "❌ NO")
+    if not same:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
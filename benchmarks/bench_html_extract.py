@@ -0,0 +1,139 @@
+# benchmarks/bench_html_extract.py
+# Extracción por página (mapeo desde routes.txt + indexación) sobre los textos
+# de data/web_snapshot envueltos en HTML (los mismos que bench_fetcher):
+#   antes: BeautifulSoup completo por etapa (el indexador parseaba dos veces) +
+#          find_all / find_parent / get_text por enlace
+#   ahora: chatbot.html_extract (un recorrido), con html.parser y con lxml
+# Mide páginas/s y memoria asignada por página (pico de tracemalloc, máximo y
+# medio) y verifica que los resultados de html.parser sean idénticos a los de antes.
+# Uso:  python -m benchmarks.bench_html_extract [--pages 300] [--repeat 3]
+
+import argparse
+import time
+import tracemalloc
+from functools import partial
+from urllib.parse import urljoin, urlparse
+
+from bs4 import BeautifulSoup
+from requests.structures import CaseInsensitiveDict
+
+import chatbot.html_extract as html_extract
+import chatbot.indexer as indexer
+import chatbot.site_map as site_map
+from benchmarks.bench_fetcher import make_pages
+from chatbot.url_utils import normalize_url, path_to_section
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, text: str):
+        self.text = text
+        self.headers = CaseInsensitiveDict({"Content-Type": "text/html; charset=utf-8"})
+
+
+# ------------------------------ antes (BeautifulSoup) ------------------------------
+
+def _title_and_h1(soup) -> tuple[str, str]:
+    title = (soup.title.string.strip() if soup.title and soup.title.string else "")
+    h1_tag = soup.find("h1")
+    h1 = " ".join(h1_tag.get_text(" ", strip=True).split()) if h1_tag else ""
+    return title, h1
+
+
+def old_route_page(url: str, r):
+    soup = BeautifulSoup(r.text, "html.parser")
+    page_title, h1 = _title_and_h1(soup)
+    label = page_title or h1 or path_to_section(urlparse(url).path)
+    section = {"url": url, "text": label, "from_page": url, "page_title": page_title or h1,
+               "h1": h1, "section": path_to_section(urlparse(url).path)}
+    docs = []
+    for a in soup.find_all("a", href=True):
+        href = urljoin(url, a["href"].split("#")[0])
+        if not site_map._is_internal(href) or not site_map._looks_doc(href):
+            continue
+        link_text = " ".join(a.get_text(strip=True).split())
+        parent = a.find_parent(["p", "li", "div", "section", "article"])
+        ctx = " ".join(parent.get_text(" ", strip=True).split()) if parent else link_text
+        docs.append({"doc_url": normalize_url(href), "from_page": url, "page_title": page_title or h1,
+                     "h1": h1, "link_text": link_text, "context": ctx[:900],
+                     "section": path_to_section(urlparse(url).path)})
+    return True, section, docs
+
+
+def old_page_fields(url: str, r):
+    soup = BeautifulSoup(r.text, "html.parser")
+    title, h1 = _title_and_h1(soup)
+    soup = BeautifulSoup(r.text, "html.parser")
+    for tag in soup(["script", "style", "noscript"]):
+        tag.decompose()
+    return {"title": title, "h1": h1, "text": soup.get_text(separator="\n", strip=True)}
+
+
+def old_stage(url, r):
+    return old_route_page(url, r), old_page_fields(url, r)
+
+
+def new_stage(url, r):
+    return site_map._parse_route_page(url, r), indexer._page_fields(url, r)
+
+
+# ------------------------------------- medición ------------------------------------
+
+def measure(fn, items, repeat: int) -> tuple[float, list]:
+    best, out = float("inf"), []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = [fn(u, r) for u, r in items]
+        best = min(best, time.perf_counter() - t0)
+    return len(items) / best, out
+
+
+def memory(fn, items) -> tuple[float, float]:
+    """(pico máximo, pico medio) en KB por página, con tracemalloc."""
+    peaks = []
+    tracemalloc.start()
+    for u, r in items:
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        fn(u, r)
+        peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+    return max(peaks) / 1024, sum(peaks) / len(peaks) / 1024
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=300)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    # los documentos de make_pages son relativos: base interna del sitio
+    items = [(f"https://www.uesvalle.gov.co/pagina/{i}/", FakeResponse(h))
+             for i, h in enumerate(make_pages(args.pages))]
+    mem_items = items[:min(len(items), 50)]
+    mb = sum(len(r.text.encode("utf-8")) for _, r in items) / 1e6
+    print(f"{len(items)} páginas ({mb:.1f} MB de HTML); mapeo + indexación por página\n")
+
+    backends = ["html.parser"] + (["lxml"] if html_extract.backend_name("lxml") == "lxml" else [])
+    ref = None
+    for be in [None] + backends:
+        if be is None:
+            name, fn = "antes (BeautifulSoup)", old_stage
+        else:
+            site_map.extract = indexer.extract = partial(html_extract.extract, backend=be)
+            name, fn = f"una pasada ({be})", new_stage
+        pps, out = measure(fn, items, args.repeat)
+        peak_kb, mean_kb = memory(fn, mem_items)
+        if ref is None:
+            ref, base_pps, same = out, pps, ""
+        else:
+            same = "idéntico" if out == ref else "difiere"
+        print(f"{name:26s} {pps:8.1f} pág/s  ×{pps / base_pps:4.1f}   "
+              f"memoria/pág: pico {peak_kb:6.0f} KB, media {mean_kb:6.0f} KB   {same}")
+        if be == "html.parser" and out != ref:
+            raise SystemExit("❌ html.parser debe dar lo mismo que BeautifulSoup")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# benchmarks/bench_http_cache.py
+# Almacén de páginas + caché condicional contra el servidor local de
+# bench_fetcher. Por cada corrida: mapeo (catálogos) + 2.ª etapa que vuelve a
+# leer todas las páginas (como la extracción de texto del indexador).
+#   sin caché        : cada etapa descarga todo (como antes)
+#   almacén vacío    : el mapeo descarga; la 2.ª etapa lee del almacén
+#   ETag → 304       : el mapeo revalida; nada se re-parsea
+#   max-age          : la 2.ª corrida no pide nada
+#   offline          : servidor apagado; todo sale del almacén
+# Verifica que los catálogos salgan idénticos en todas las corridas.
+# Uso:  python -m benchmarks.bench_http_cache [--pages 300] [--latency-ms 80]
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from urllib.parse import urlparse
+
+import chatbot.site_map as site_map
+from benchmarks.bench_fetcher import make_pages, run, serve
+from chatbot.fetcher import Fetcher
+from chatbot.http_cache import HttpCache
+from chatbot.page_store import PageStore
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=300)
+    ap.add_argument("--latency-ms", type=float, default=80)
+    args = ap.parse_args()
+
+    random.seed(0)
+    pages = make_pages(args.pages)
+    tmp = tempfile.mkdtemp(prefix="bench_http_cache_")
+    rows, outputs = [], []
+
+    # un servidor por modo (mismo host:puerto = mismas claves en el almacén)
+    for max_age, runs in [
+        (0, [("sin caché", None, False), ("almacén vacío", "etag", False),
+             ("ETag → 304", "etag", False), ("offline", "etag", True)]),
+        (3600, [("max-age (1.ª)", "maxage", False), ("max-age (fresca)", "maxage", False)]),
+    ]:
+        srv = serve(pages, args.latency_ms / 1e3, flaky_every=0, max_age=max_age)
+        host = f"127.0.0.1:{srv.server_address[1]}"
+        routes = [f"http://{host}/pagina/{i}/" for i in range(args.pages)]
+        real_is_internal = site_map._is_internal
+        site_map._is_internal = lambda u: urlparse(u).netloc.lower() == host or real_is_internal(u)
+        for label, store_dir, offline in runs:
+            store = PageStore(os.path.join(tmp, store_dir)) if store_dir else None
+            if offline:
+                srv.shutdown()
+            req0, sent0 = srv.requests, srv.bytes_sent
+            t0 = time.time()
+            cache = HttpCache(store, offline=offline) if store else None
+            wall, files = run(routes, os.path.join(tmp, "out"), Fetcher(workers=8, per_host=4, rate=0, cache=cache))
+            # 2.ª etapa (texto para el índice): reutiliza lo bajado en esta corrida
+            cache2 = HttpCache(store, offline=offline, reuse_since=t0) if store else None
+            t1 = time.perf_counter()
+            Fetcher(workers=8, per_host=4, rate=0, cache=cache2).map(routes, lambda u, r: len(r.text))
+            wall2 = time.perf_counter() - t1
+            rows.append((label, wall, wall2, srv.requests - req0, srv.bytes_sent - sent0,
+                         cache.stats() if cache else None))
+            outputs.append({k: v.replace(host.encode(), b"HOST") for k, v in files.items()})
+        site_map._is_internal = real_is_internal
+        if not runs[-1][2]:
+            srv.shutdown()
+
+    print(f"\n{args.pages} páginas, latencia ~{args.latency_ms:.0f} ms")
+    print(f"{'corrida':>18} {'mapeo':>7} {'2.ª etapa':>10} {'peticiones':>11} {'MB':>6} "
+          f"{'frescas':>8} {'304':>5} {'descargas':>10} {'sin parsear':>12}")
+    for label, wall, wall2, nreq, sent, st in rows:
+        st = st or {"fresh": "-", "revalidated": "-", "miss": "-", "derived_hits": "-"}
+        print(f"{label:>18} {wall:>6.2f}s {wall2:>9.2f}s {nreq:>11} {sent / 1e6:>6.2f} "
+              f"{st['fresh']:>8} {st['revalidated']:>5} {st['miss']:>10} {st['derived_hits']:>12}")
+    same = all(o == outputs[0] for o in outputs)
+    print("Catálogos idénticos:", "✅ sí" if same else "❌ NO")
+    if not same:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
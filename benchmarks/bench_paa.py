@@ -0,0 +1,84 @@
+# benchmarks/bench_paa.py
+# Hojas del Plan Anual de Adquisiciones (chatbot.paa_store) sobre
+# data/documentos: construcción y tamaño del almacén columnar, latencia de
+# preguntas de filtro/suma, y cuántos trozos de texto habría que embeber si
+# esas mismas hojas se indexaran como prosa (lo que deja de hacerse). También
+# comprueba que las preguntas de definición («¿qué es el PAA?») no se desvíen.
+# Uso:  python -m benchmarks.bench_paa [--repeat 200] [--ms-per-chunk 25]
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from llama_index.core.node_parser import SentenceSplitter
+from llama_index.core.schema import Document
+
+from chatbot.config import CHUNK_OVERLAP, CHUNK_SIZE, DOCS_DIR
+from chatbot.doc_extract import ExtractCache, extract_files
+from chatbot.paa_store import PaaStore, build_paa_store
+
+QUESTIONS = [
+    "¿cuánto suma el PAA 2025 para contratos de obra?",
+    "¿qué compras hay en junio?",
+    "¿cuántas adquisiciones hay por mínima cuantía en 2024?",
+    "¿cuáles son las compras más costosas del PAA 2023?",
+    "compras de termómetros en 2025",
+    "¿cuánto suma el PAA 2022?",
+]
+
+# preguntas de contenido que mencionan el PAA: deben seguir a la búsqueda semántica
+NOT_PAA = [
+    "¿Qué es el plan anual de adquisiciones?",
+    "¿qué es el PAA?",
+    "¿Cuál es el objetivo del plan anual de adquisiciones?",
+    "¿Quién aprueba el plan de compras?",
+    "explícame las adquisiciones",
+]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=200)
+    ap.add_argument("--ms-per-chunk", type=float, default=25.0, help="costo estimado de embeber un trozo")
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench_paa_")
+    path = os.path.join(tmp, "paa_store.npz")
+    t0 = time.perf_counter()
+    files = build_paa_store(DOCS_DIR, path=path)
+    t_build = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    store = PaaStore.load(path)
+    t_load = time.perf_counter() - t0
+
+    lat = {}
+    for q in QUESTIONS:
+        times = []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            store.answer(q)
+            times.append(time.perf_counter() - t0)
+        lat[q] = statistics.median(times) * 1e3
+
+    routed = [q for q in NOT_PAA if store.answer(q) is not None]
+
+    texts = extract_files([os.path.join(DOCS_DIR, n) for n in sorted(files)],
+                          cache=ExtractCache(os.path.join(tmp, "texto")))
+    splitter = SentenceSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    chunks = splitter.get_nodes_from_documents([Document(text=r["text"]) for r in texts.values() if r["ok"]])
+
+    print(f"\n{len(files)} hojas → {len(store)} adquisiciones | construcción {t_build * 1e3:.0f} ms, "
+          f"carga {t_load * 1e3:.1f} ms, {os.path.getsize(path) / 1e3:.0f} KB en disco")
+    for q, ms in lat.items():
+        print(f"  {ms:7.3f} ms  {q}")
+    print(f"Preguntas de contenido desviadas al PAA: {len(routed)}/{len(NOT_PAA)}"
+          + "".join(f"\n  ✗ {q}" for q in routed))
+    print(f"Como prosa serían {len(chunks)} trozos a embeber "
+          f"(~{len(chunks) * args.ms_per_chunk / 1e3:.1f}s a {args.ms_per_chunk:g} ms/trozo) "
+          f"+ búsqueda vectorial y síntesis con el LLM por pregunta")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# benchmarks/bench_second_pass.py
+# Latencia de _second_pass: antes (3 encodes + 3 barridos SimpleVectorStore)
+# vs después (1 encode batch + 1 top-k matricial con DenseVectors).
+# Uso:  python -m benchmarks.bench_second_pass [--nodes 2000] [--model NOMBRE]
+# Sin --model usa un encoder sintético (costo fijo por llamada + por texto).
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+from llama_index.core.vector_stores import SimpleVectorStore, VectorStoreQuery
+from llama_index.core.vector_stores.simple import SimpleVectorStoreData
+
+from chatbot.text_utils import norm_text, tokens
+from chatbot.vector_store import DenseVectors
+
+QUERIES = [
+    "¿Cuál es el horario de atención al ciudadano?",
+    "Requisitos para radicar una PQRS",
+    "plan de compras 2018 actualización",
+    "¿Quién es el director de la UESVALLE?",
+    "convocatorias de empleo vigentes",
+]
+
+
+def make_encoder(args, dim):
+    if args.model:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(args.model)
+        return lambda texts: model.encode(texts, normalize_embeddings=True).tolist()
+
+    rnd = np.random.default_rng(0)
+
+    def encode(texts):
+        time.sleep((args.encode_ms + args.per_text_ms * len(texts)) / 1e3)
+        return rnd.standard_normal((len(texts), dim)).astype(np.float32).tolist()
+    return encode
+
+
+def variants(q):
+    base = norm_text(q)
+    kws = " ".join(tokens(base))
+    return [q, base] + ([kws] if kws else [])
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--nodes", type=int, default=2000)
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--top-k", type=int, default=12)
+    ap.add_argument("--reps", type=int, default=20)
+    ap.add_argument("--model", default="")
+    ap.add_argument("--encode-ms", type=float, default=8.0)
+    ap.add_argument("--per-text-ms", type=float, default=1.5)
+    args = ap.parse_args()
+
+    rnd = np.random.default_rng(1)
+    emb = rnd.standard_normal((args.nodes, args.dim)).astype(np.float32)
+    ids = [f"n{i}" for i in range(args.nodes)]
+    store = SimpleVectorStore(data=SimpleVectorStoreData(embedding_dict=dict(zip(ids, emb.tolist()))))
+    dense = DenseVectors(ids, emb)
+    encode = make_encoder(args, args.dim)
+
+    def before(q):
+        seen = set()
+        for v in variants(q):
+            vec = encode([v])[0]
+            res = store.query(VectorStoreQuery(query_embedding=vec, similarity_top_k=args.top_k))
+            seen.update(res.ids)
+        return seen
+
+    def after(q):
+        vs = variants(q)
+        vectors = encode(vs)
+        seen = set()
+        for hits in dense.search(vectors, args.top_k):
+            seen.update(nid for nid, _ in hits)
+        return seen
+
+    for name, fn in (("antes", before), ("después", after)):
+        lat = []
+        for _ in range(args.reps):
+            for q in QUERIES:
+                t0 = time.perf_counter()
+                fn(q)
+                lat.append((time.perf_counter() - t0) * 1e3)
+        lat.sort()
+        p95 = lat[int(len(lat) * 0.95) - 1]
+        print(f"{name:>8}: p50={statistics.median(lat):7.2f} ms  p95={p95:7.2f} ms  (nodos={args.nodes})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# benchmarks/bench_section_index.py
+# Micro-benchmark de _resolve_section_url: barrido lineal vs SectionIndex.
+# Uso:  python -m benchmarks.bench_section_index [--sizes 200 2000 20000]
+# Verifica además que ambos caminos elijan exactamente la misma URL.
+
+import argparse
+import random
+import time
+
+from chatbot import catalog
+from chatbot.config import SECTIONS_CATALOG_PATH
+from chatbot.section_index import SectionIndex
+from chatbot.text_utils import norm_text, path_depth, path_tokens, similarity, tokens
+
+QUERIES = [
+    "enlace a transparencia y acceso a la información pública",
+    "link de PQRSDF",
+    "sección de trámites",
+    "ruta para el plan anual de adquisiciones",
+    "url de la política de tratamiento de datos",
+    "ir a canales de atención",
+    "enlace del directorio de funcionarios",
+    "sección de noticias",
+    "link convocatorias",
+    "acceder a informes de gestión",
+    "enlace control interno",
+    "sección participa",
+]
+
+
+def resolve_linear(items: list[dict], q: str) -> str | None:
+    """Implementación original (referencia)."""
+    q_toks = tokens(q)
+    best, best_score = None, 0.0
+    for it in items:
+        cand_text = " ".join([
+            it.get("text", ""), it.get("page_title", ""),
+            it.get("h1", ""), it.get("section", ""),
+        ]).strip()
+        s = similarity(q, cand_text)
+        txt_toks = tokens(it.get("text", ""))
+        if q_toks and q_toks.issubset(txt_toks):
+            s += 0.20
+        path_toks = path_tokens(it.get("url", ""))
+        if q_toks and len(q_toks & path_toks) > 0:
+            s += 0.15
+        depth = path_depth(it.get("url", ""))
+        s += min(depth, 6) * 0.05
+        if depth == 0:
+            s -= 0.25
+        if s > best_score:
+            best_score, best = s, it
+    return best["url"] if best and best_score >= 0.55 else None
+
+
+def synth_catalog(base: list[dict], n: int, rnd: random.Random) -> list[dict]:
+    """Catálogo sintético de n secciones a partir del real (variando textos/rutas)."""
+    words = sorted({w for it in base for w in norm_text(it.get("text", "")).split() if len(w) > 3})
+    out = list(base[:n])
+    while len(out) < n:
+        it = dict(rnd.choice(base))
+        extra = " ".join(rnd.sample(words, k=min(len(words), rnd.randint(1, 3))))
+        slug = "-".join(extra.split())
+        it["text"] = f"{it.get('text', '')} {extra}".strip()
+        it["url"] = f"https://www.uesvalle.gov.co/publicaciones/{rnd.randint(1000, 99999)}/{slug}/"
+        out.append(it)
+    return out
+
+
+def _bench(fn, queries, reps):
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        for q in queries:
+            fn(q)
+    return (time.perf_counter() - t0) / (reps * len(queries))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[200, 2000, 20000])
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    base = catalog.read_all(SECTIONS_CATALOG_PATH)
+    rnd = random.Random(args.seed)
+
+    print(f"{'secciones':>10} {'lineal ms/q':>12} {'índice ms/q':>12} {'build ms':>9} {'speedup':>8}")
+    for n in args.sizes:
+        items = synth_catalog(base, n, rnd)
+        queries = QUERIES + [" ".join(rnd.sample(norm_text(it["text"]).split(), k=1))
+                             for it in rnd.sample(items, 8)]
+        t0 = time.perf_counter()
+        idx = SectionIndex(items)
+        build = time.perf_counter() - t0
+
+        for q in queries:
+            a, b = resolve_linear(items, q), idx.resolve(q)
+            assert a == b, f"distinto resultado para {q!r}: {a} != {b}"
+
+        reps_lin = max(1, 2000 // n)
+        lin = _bench(lambda q: resolve_linear(items, q), queries, reps_lin)
+        fast = _bench(idx.resolve, queries, max(1, 20000 // n))
+        print(f"{n:>10} {lin * 1e3:>12.2f} {fast * 1e3:>12.2f} {build * 1e3:>9.0f} {lin / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
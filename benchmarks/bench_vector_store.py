@@ -0,0 +1,101 @@
+# benchmarks/bench_vector_store.py
+# Arranque y RSS: índice JSON de LlamaIndex vs almacén binario (mmap).
+# Uso:  python -m benchmarks.bench_vector_store [--nodes 20000] [--dir /tmp/bench_store]
+# Cada carga se mide en un proceso nuevo (tiempo hasta la 1.ª consulta + maxrss).
+
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import time
+
+CHILD = r"""
+import json, resource, sys, time
+
+def _hwm_mb():
+    # VmHWM se reinicia en exec (ru_maxrss hereda el pico del proceso padre)
+    try:
+        for line in open("/proc/self/status"):
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+t0 = time.perf_counter()
+from llama_index.core import MockEmbedding
+from llama_index.core.retrievers import VectorIndexRetriever
+from chatbot.vector_store import load_index
+t_imp = time.perf_counter()
+embed = MockEmbedding(embed_dim=int(sys.argv[2]))
+index = load_index(sys.argv[1], embed)
+t_load = time.perf_counter()
+VectorIndexRetriever(index=index, similarity_top_k=5).retrieve("horario de atención")
+t_q = time.perf_counter()
+print(json.dumps({
+    "load_s": t_load - t_imp,
+    "first_query_s": t_q - t_load,
+    "maxrss_mb": _hwm_mb(),
+}))
+"""
+
+
+def build_legacy(path: str, n: int, dim: int) -> None:
+    import numpy as np
+    from llama_index.core import MockEmbedding, StorageContext, VectorStoreIndex
+    from llama_index.core.schema import TextNode
+
+    rnd = random.Random(0)
+    words = "plan anual adquisiciones atención ciudadano trámite pqrs saneamiento valle cauca".split()
+    emb = np.random.default_rng(0).standard_normal((n, dim)).astype(np.float32)
+    nodes = [
+        TextNode(text=" ".join(rnd.choices(words, k=130)), embedding=emb[i].tolist(),
+                 metadata={"source": f"https://www.uesvalle.gov.co/p/{i}/", "kind": "page"})
+        for i in range(n)
+    ]
+    storage = StorageContext.from_defaults()
+    index = VectorStoreIndex(nodes=nodes, storage_context=storage, embed_model=MockEmbedding(embed_dim=dim))
+    index.storage_context.persist(path)
+
+
+def measure(path: str, dim: int) -> dict:
+    out = subprocess.run([sys.executable, "-c", CHILD, path, str(dim)],
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _size_mb(path: str, names) -> float:
+    return sum(os.path.getsize(os.path.join(path, f)) for f in names if os.path.exists(os.path.join(path, f))) / 2**20
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--nodes", type=int, default=20000)
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--dir", default="/tmp/bench_store")
+    args = ap.parse_args()
+
+    from chatbot.vector_store import NODES_FILE, OFFSETS_FILE, VECTORS_FILE, META_FILE, convert_storage
+
+    legacy, binary = os.path.join(args.dir, "json"), os.path.join(args.dir, "bin")
+    shutil.rmtree(args.dir, ignore_errors=True)
+    t0 = time.perf_counter()
+    build_legacy(legacy, args.nodes, args.dim)
+    print(f"Índice sintético: {args.nodes} nodos × {args.dim} dims ({time.perf_counter() - t0:.1f}s)")
+    t0 = time.perf_counter()
+    convert_storage(legacy, binary)
+    print(f"Conversión: {time.perf_counter() - t0:.1f}s")
+
+    disk_json = _size_mb(legacy, os.listdir(legacy))
+    disk_bin = _size_mb(binary, [NODES_FILE, OFFSETS_FILE, VECTORS_FILE, META_FILE])
+    for name, path, disk in (("JSON", legacy, disk_json), ("binario", binary, disk_bin)):
+        r = measure(path, args.dim)
+        print(f"{name:>8}: carga={r['load_s']:6.2f}s  1.ª consulta={r['first_query_s'] * 1e3:7.1f}ms  "
+              f"maxrss={r['maxrss_mb']:7.1f}MB  disco={disk:6.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
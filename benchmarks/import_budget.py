@@ -0,0 +1,79 @@
+# benchmarks/import_budget.py
+# Presupuesto de arranque: mide `import webchat.main` con `python -X importtime`
+# en un proceso limpio y falla (código 1) si:
+#   - se importa algún módulo pesado (llama_index, torch, transformers…), o
+#   - el tiempo acumulado (mediana de --runs) supera --budget-ms.
+# Uso:  python -m benchmarks.import_budget [--budget-ms 1500] [--runs 3] [--top 10]
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+MODULE = "webchat.main"
+
+# Estos solo deben cargarse en segundo plano (chatbot.bot / indexer)
+HEAVY = (
+    "llama_index",
+    "torch",
+    "transformers",
+    "sentence_transformers",
+    "bs4",
+    "numpy",
+)
+
+
+def profile(module: str) -> list[tuple[str, int, int]]:
+    """[(módulo, self_us, acumulado_us)] de un import en un proceso nuevo."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        sys.stderr.write(proc.stderr)
+        raise SystemExit(f"❌ No se pudo importar {module}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((name[1:].rstrip(), int(self_us), int(cum_us)))
+    return rows
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--budget-ms", type=float, default=1500)
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--top", type=int, default=10)
+    args = ap.parse_args()
+
+    totals, rows = [], []
+    for _ in range(args.runs):
+        rows = profile(MODULE)
+        # acumulado de la línea del propio módulo = su import completo
+        totals.append(next(cum for name, _, cum in rows if name == MODULE) / 1e3)
+    total = statistics.median(totals)
+
+    print(f"import {MODULE}: {total:.0f} ms (mediana de {args.runs}; presupuesto {args.budget_ms:.0f} ms)")
+    print("Módulos con más tiempo propio (última corrida):")
+    for name, self_us, _ in sorted(rows, key=lambda r: -r[1])[:args.top]:
+        print(f"  {self_us / 1e3:8.1f} ms  {name.strip()}")
+
+    heavy = sorted({name.strip() for name, _, _ in rows
+                    if name.strip().split(".")[0] in HEAVY})
+    ok = True
+    if heavy:
+        ok = False
+        print(f"❌ Módulos pesados en el arranque: {', '.join(heavy[:10])}"
+              + (" …" if len(heavy) > 10 else ""))
+    if total > args.budget_ms:
+        ok = False
+        print(f"❌ Arranque sobre el presupuesto: {total:.0f} ms > {args.budget_ms:.0f} ms")
+    if ok:
+        print("✅ Arranque dentro del presupuesto")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+# benchmarks/load_preguntar.py
+# Prueba de carga de /preguntar con un modelo de embeddings simulado.
+# Uso:  python -m benchmarks.load_preguntar [--clients 16] [--embed-ms 120] [--inline]
+#
+# - Índice binario sintético + embedding stub (costo fijo por consulta);
+#   la síntesis se reemplaza por un resumen de los nodos (sin LLM).
+# - Mide la latencia de /health y /static mientras el pool está saturado, el
+#   throughput de /preguntar y cuántas preguntas idénticas se coalescen.
+# - --inline reproduce el comportamiento anterior (responder en el event loop).
+# Requiere las dependencias de requirements.txt + httpx.
+
+import argparse
+import asyncio
+import hashlib
+import statistics
+import tempfile
+import time
+
+import httpx
+import numpy as np
+from llama_index.core import MockEmbedding
+from llama_index.core.schema import TextNode
+
+import chatbot.bot as bot
+from chatbot.answer_cache import AnswerCache
+from chatbot.vector_store import write_binary_store
+
+DIM = 384
+
+
+class StubEmbedding(MockEmbedding):
+    """Embedding determinista que tarda `delay` segundos por llamada."""
+
+    delay: float = 0.1
+
+    def _vec(self, text: str) -> list[float]:
+        seed = int(hashlib.md5(text.encode()).hexdigest()[:8], 16)
+        return np.random.default_rng(seed).standard_normal(self.embed_dim).tolist()
+
+    def _get_query_embedding(self, query: str) -> list[float]:
+        time.sleep(self.delay)      # un forward real libera el GIL casi todo el tiempo
+        return self._vec(query)
+
+    def _get_text_embedding(self, text: str) -> list[float]:
+        return self._get_query_embedding(text)
+
+
+def setup_bot(embed_ms: float, nodes: int) -> None:
+    tmp = tempfile.mkdtemp(prefix="load_store_")
+    rnd = np.random.default_rng(0)
+    write_binary_store(
+        tmp,
+        [TextNode(text=f"Contenido sintético {i} de la UESVALLE.", metadata={"source": f"p{i}"}) for i in range(nodes)],
+        rnd.standard_normal((nodes, DIM)),
+    )
+    embed = StubEmbedding(embed_dim=DIM, delay=embed_ms / 1e3)
+    bot.STORAGE_DIR = tmp
+    bot.QUERY_EMBED_CACHE_PATH = ""
+    bot._get_embed = lambda: embed
+    bot._answer_cache = lambda: AnswerCache(max_entries=0)   # medir trabajo real
+    bot._synthesize = lambda qb, ns: " | ".join(n.node.get_content()[:40] for n in ns[:3])
+
+
+async def timed_get(client, url, out):
+    t0 = time.perf_counter()
+    r = await client.get(url)
+    out.append((time.perf_counter() - t0) * 1e3)
+    return r
+
+
+async def run(args):
+    import webchat.main as main
+
+    await main._arranque()          # lo que hace el startup (sin el ciclo de reindexación)
+    assert main._estado["fase"] == "listo", main._estado
+    if args.inline:
+        async def inline(q):
+            return bot.responder_pregunta(q)
+        main._responder = inline
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        await client.get("/preguntar", params={"q": "calentamiento"})
+
+        health, static, ask = [], [], []
+        stop = asyncio.Event()
+
+        async def prober():
+            while not stop.is_set():
+                await timed_get(client, "/health", health)
+                await timed_get(client, "/static/widget.css", static)
+                await asyncio.sleep(0.02)
+
+        async def asker(i):
+            for j in range(args.per_client):
+                r = await timed_get(client, f"/preguntar?q=pregunta {i}-{j} sobre trámites", ask)
+                assert r.status_code in (200, 503), r.status_code
+
+        probe = asyncio.create_task(prober())
+        t0 = time.perf_counter()
+        await asyncio.gather(*(asker(i) for i in range(args.clients)))
+        wall = time.perf_counter() - t0
+
+        # coalescencia: N copias simultáneas de la misma pregunta
+        calls = {"n": 0}
+        real = bot.responder_pregunta
+
+        def counted(q):
+            calls["n"] += 1
+            return real(q)
+        bot.responder_pregunta = counted
+        await asyncio.gather(*(client.get("/preguntar", params={"q": "¿Horario de atención?"})
+                               for _ in range(args.clients)))
+        bot.responder_pregunta = real
+        stop.set()
+        await probe
+
+    def pct(xs, p):
+        xs = sorted(xs)
+        return xs[min(len(xs) - 1, int(len(xs) * p))] if xs else float("nan")
+
+    mode = "inline (event loop)" if args.inline else f"pool {main.QA_EXECUTOR}×{main.QA_WORKERS}"
+    print(f"Modo: {mode} | clientes={args.clients} | embed={args.embed_ms}ms")
+    print(f"/preguntar: {len(ask)} resp en {wall:.2f}s → {len(ask) / wall:.1f} req/s, "
+          f"p50={statistics.median(ask):.0f}ms p95={pct(ask, .95):.0f}ms")
+    print(f"/health   : p50={statistics.median(health):.1f}ms p99={pct(health, .99):.1f}ms max={max(health):.1f}ms")
+    print(f"/static   : p50={statistics.median(static):.1f}ms p99={pct(static, .99):.1f}ms max={max(static):.1f}ms")
+    print(f"Coalescencia: {args.clients} preguntas idénticas → {calls['n']} ejecución(es)")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--clients", type=int, default=16)
+    ap.add_argument("--per-client", type=int, default=4)
+    ap.add_argument("--embed-ms", type=float, default=120)
+    ap.add_argument("--nodes", type=int, default=5000)
+    ap.add_argument("--inline", action="store_true")
+    args = ap.parse_args()
+    setup_bot(args.embed_ms, args.nodes)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# chatbot/answer_cache.py
+# -----------------------------------------------------------------------------
+# Caché de respuestas TTL + LRU con coalescencia "single-flight"
+# -----------------------------------------------------------------------------
+# - La clave la arma el llamador (p. ej. pregunta normalizada + generación del
+#   índice), así una reindexación invalida todo sin recorrer la caché.
+# - Si llegan N copias de la misma pregunta a la vez, solo una calcula; el
+#   resto espera ese resultado. Los errores no se guardan.
+# -----------------------------------------------------------------------------
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class _Flight:
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class AnswerCache:
+    """Caché thread-safe con expiración por tiempo y expulsión LRU."""
+
+    def __init__(self, max_entries: int = 2048, ttl: float = 6 * 60 * 60, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._data: OrderedDict = OrderedDict()   # key -> (expira, valor)
+        self._inflight: dict = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get_or_compute(self, key, fn):
+        """Devuelve el valor en caché o lo calcula (una sola vez por clave)."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                if entry[0] > self._clock():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._data[key]
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = fn()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+                if flight.error is None:
+                    self._data[key] = (self._clock() + self.ttl, flight.value)
+                    self._data.move_to_end(key)
+                    while len(self._data) > self.max_entries:
+                        self._data.popitem(last=False)
+            flight.event.set()
+        return flight.value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+        }
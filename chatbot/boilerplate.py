@@ -0,0 +1,90 @@
+# chatbot/boilerplate.py
+# -----------------------------------------------------------------------------
+# Plantilla del sitio (menú, cabecera, pie) aprendida de las propias páginas
+# -----------------------------------------------------------------------------
+# - Cada línea del texto extraído es un nodo de texto del HTML. Una línea que
+#   aparece en al menos BOILERPLATE_MIN_FRACTION de las páginas (y en no menos
+#   de BOILERPLATE_MIN_PAGES) es plantilla y se quita de todas antes de trocear.
+# - La plantilla se indexa UNA vez como fuente propia (kind="plantilla"): el
+#   pie tiene horarios, teléfonos y direcciones que sí se preguntan.
+# - Reporte por página (texto útil / texto total) en BOILERPLATE_REPORT_PATH.
+# -----------------------------------------------------------------------------
+
+import statistics
+from collections import Counter
+
+from llama_index.core.schema import Document
+
+from chatbot.catalog import CatalogWriter
+from chatbot.config import (
+    BASE_URL, BOILERPLATE_ENABLED, BOILERPLATE_MIN_FRACTION, BOILERPLATE_MIN_PAGES,
+    BOILERPLATE_REPORT_PATH,
+)
+
+TEMPLATE_KIND = "plantilla"
+
+
+def _line_key(line: str) -> str:
+    return " ".join(line.split())
+
+
+def learn_template(texts: list[str], min_fraction: float = BOILERPLATE_MIN_FRACTION,
+                   min_pages: int = BOILERPLATE_MIN_PAGES) -> list[str]:
+    """Líneas de plantilla, en el orden en que aparecen por primera vez."""
+    if len(texts) < min_pages:
+        return []
+    df, order = Counter(), {}
+    for text in texts:
+        keys = {_line_key(l) for l in text.splitlines()}
+        keys.discard("")
+        df.update(keys)
+        for line in text.splitlines():
+            order.setdefault(_line_key(line), len(order))
+    threshold = max(min_pages, min_fraction * len(texts))
+    return sorted((k for k, c in df.items() if c >= threshold), key=order.__getitem__)
+
+
+def strip(text: str, template: set[str]) -> str:
+    return "\n".join(l for l in text.splitlines() if _line_key(l) and _line_key(l) not in template)
+
+
+def strip_boilerplate(docs: list[Document], report_path: str = BOILERPLATE_REPORT_PATH) -> list[Document]:
+    """Páginas sin la plantilla + un documento con la plantilla (una vez).
+
+    Las páginas que quedan sin texto propio no se indexan (su contenido es
+    la plantilla). Los demás documentos pasan igual.
+    """
+    pages = [d for d in docs if d.metadata.get("kind") == "page"]
+    template = learn_template([d.text for d in pages]) if BOILERPLATE_ENABLED else []
+    if not template:
+        return docs
+    tpl = set(template)
+
+    out, ratios, empty = [], [], 0
+    with CatalogWriter(report_path, key="url") as report:
+        for d in docs:
+            if d.metadata.get("kind") != "page":
+                out.append(d)
+                continue
+            total = sum(len(_line_key(l)) for l in d.text.splitlines())
+            text = strip(d.text, tpl)
+            kept = sum(len(_line_key(l)) for l in text.splitlines())
+            ratio = kept / total if total else 0.0
+            ratios.append(ratio)
+            report.add({"url": d.metadata.get("source", ""), "chars": total,
+                        "content_chars": kept, "ratio": round(ratio, 3)})
+            if not text.strip():
+                empty += 1
+                continue
+            out.append(Document(text=text, metadata=dict(d.metadata),
+                                excluded_embed_metadata_keys=list(d.excluded_embed_metadata_keys),
+                                excluded_llm_metadata_keys=list(d.excluded_llm_metadata_keys)))
+    out.append(Document(text="\n".join(template),
+                        metadata={"source": BASE_URL, "kind": TEMPLATE_KIND,
+                                  "page_title": "Información general del sitio (menú y pie de página)"}))
+
+    print(f"🧹 Plantilla: {len(template)} líneas repetidas en ≥{BOILERPLATE_MIN_FRACTION:.0%} de "
+          f"{len(pages)} páginas | texto propio: mediana {statistics.median(ratios):.0%}, "
+          f"media {statistics.fmean(ratios):.0%} | {empty} páginas sin texto propio "
+          f"| reporte: {report_path}")
+    return out
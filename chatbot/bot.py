@@ -3,23 +3,21 @@
 # Motor de QA + Resolución determinista de enlaces a secciones del sitio
 # -----------------------------------------------------------------------------
 # - Para preguntas de ENLACES (link/ruta/sección), busca únicamente en
-#   data/sections_catalog.json (catálogo generado por el crawler).
+#   data/sections_catalog.jsonl (catálogo generado por el crawler).
 #   => Devuelve la URL EXACTA de la página (sin inventar).
+# - Filtros/sumas sobre el Plan Anual de Adquisiciones ("¿cuánto suma el PAA
+#   2025 para obra?") se responden con las tablas de chatbot/paa_store.py.
 # - Para preguntas de CONTENIDO, usa un índice semántico con recall de 2 pasos.
 # -----------------------------------------------------------------------------
 
 from functools import lru_cache
-import json
+import atexit
 import os
-import re
-import unicodedata
-import difflib
-from urllib.parse import urlparse
+import threading
 
-from llama_index.core import load_indices_from_storage, StorageContext
-from llama_index.core.query_engine import RetrieverQueryEngine
 from llama_index.core.response_synthesizers import get_response_synthesizer
 from llama_index.core.retrievers import VectorIndexRetriever
+from llama_index.core.schema import NodeWithScore, QueryBundle
 from llama_index.core.settings import Settings
 from llama_index.embeddings.huggingface import HuggingFaceEmbedding
 
@@ -30,178 +28,322 @@ from chatbot.config import (
     TOP_K_FALLBACK,
     CONFIDENCE_THRESHOLD,
     SECTIONS_CATALOG_PATH,
+    QUERY_EMBED_CACHE_MAX_ENTRIES,
+    QUERY_EMBED_CACHE_MAX_BYTES,
+    QUERY_EMBED_CACHE_PATH,
+    QUERY_EMBED_CACHE_SAVE_EVERY,
+    QUERY_EMBED_CACHE_SAVE_INTERVAL,
+    EMBED_BATCH_MAX,
+    EMBED_BATCH_WINDOW_MS,
+    ANSWER_CACHE_MAX_ENTRIES,
+    ANSWER_CACHE_TTL,
+    PAA_ENABLED,
+    PAA_STORE_PATH,
 )
-
-# ============================ utilidades de texto ============================
-
-STOPWORDS_ES = {
-    "de","la","que","el","en","y","a","los","del","se","las","por","un","para","con","no","una","su","al",
-    "lo","como","mas","más","pero","sus","le","ya","o","este","si","sí","porque","esta","entre","cuando",
-    "muy","sin","sobre","tambien","también","me","hasta","hay","donde","dónde","quien","quién","desde",
-    "todo","nos","durante","todos","uno","les","ni","contra","otros","ese","eso","ante","ellos","e","esto",
-    "mi","mí","antes","algunos","que","qué","unos","yo","otro","otras","otra","ir","seccion","sección",
-    "enlace","link","ruta","url","acceder","pagina","página","al","la","el"
-}
-
-def _norm(s: str) -> str:
-    """Normaliza: sin tildes, minúsculas, espacios compactados."""
-    s = "".join(c for c in unicodedata.normalize("NFD", s) if unicodedata.category(c) != "Mn")
-    return re.sub(r"\s+", " ", s).strip().lower()
-
-def _tokens(s: str) -> set[str]:
-    """Tokens sin stopwords, útiles para coincidencia."""
-    return {t for t in re.findall(r"[a-z0-9\-]+", _norm(s)) if t not in STOPWORDS_ES and len(t) > 2}
-
-def _path_tokens(u: str) -> set[str]:
-    """Tokens de la ruta /path/de/la/url (útil para detectar secciones)."""
-    p = urlparse(u).path.strip("/")
-    toks = set()
-    for part in p.split("/"):
-        if not part:
-            continue
-        toks |= set(re.findall(r"[a-z0-9]+", part.replace("-", " ")))
-    return toks
-
-def _path_depth(u: str) -> int:
-    p = urlparse(u).path.strip("/")
-    return 0 if not p else len([x for x in p.split("/") if x])
-
-def _similarity(a: str, b: str) -> float:
-    """Score combinado: similitud difusa + jaccard de tokens."""
-    ta, tb = _tokens(a), _tokens(b)
-    jacc = (len(ta & tb) / len(ta | tb)) if (ta and tb) else 0.0
-    fuzzy = difflib.SequenceMatcher(None, _norm(a), _norm(b)).ratio()
-    return 0.6 * fuzzy + 0.4 * jacc
+from chatbot import catalog
+from chatbot.answer_cache import AnswerCache
+from chatbot.embed_batcher import EmbeddingBatcher
+from chatbot.embedding_cache import QueryEmbeddingCache
+from chatbot.paa_store import LOAD_ERRORS as PAA_LOAD_ERRORS, PaaStore
+from chatbot.section_index import SectionIndex
+from chatbot.storage_versions import current_dir, has_index, pointer_path
+from chatbot.text_utils import norm_text as _norm, tokens as _tokens
+from chatbot.vector_store import BinaryVectorStore, DenseVectors, load_index
 
 # ============================ índice semántico ===============================
 
 @lru_cache(maxsize=1)
-def _get_index():
-    """Carga el índice persistido (contenido del sitio)."""
+def _get_embed():
     embed = HuggingFaceEmbedding(model_name=EMBEDDING_MODEL)
     Settings.embed_model = embed
-    storage = StorageContext.from_defaults(persist_dir=STORAGE_DIR)
-    return load_indices_from_storage(storage, embed_model=embed)[0]
-
-@lru_cache(maxsize=8)
-def _get_engine(top_k: int):
-    retriever = VectorIndexRetriever(index=_get_index(), similarity_top_k=top_k)
-    return RetrieverQueryEngine(
-        retriever=retriever,
-        response_synthesizer=get_response_synthesizer(response_mode="compact"),
+    return embed
+
+def _file_version(path: str) -> tuple[int, int]:
+    """Versión barata de un archivo (mtime_ns, tamaño); (0, 0) si no existe."""
+    try:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+    except OSError:
+        return 0, 0
+
+@lru_cache(maxsize=1)
+def _resolve_active_dir(root: str, pointer_version: tuple[int, int]) -> str:
+    return current_dir(root)
+
+def _published_dir() -> str:
+    return _resolve_active_dir(STORAGE_DIR, _file_version(pointer_path(STORAGE_DIR)))
+
+# Hot-swap: la versión publicada se carga en segundo plano y solo entonces pasa
+# a servir (una asignación). Mientras tanto se sigue respondiendo con la vieja.
+_serving: str | None = None
+_warming: set[str] = set()
+_swap_lock = threading.Lock()
+
+def _warm(path: str):
+    global _serving
+    try:
+        _dense(path)
+        _serving = path
+        print(f"🔀 Índice activo: {path}")
+    except Exception as e:
+        print(f"⚠️ No se pudo cargar {path}; se mantiene {_serving}: {e}")
+    finally:
+        # si falló, la próxima pregunta vuelve a intentarlo
+        with _swap_lock:
+            _warming.discard(path)
+
+def _active_dir() -> str:
+    """Versión del índice que responde ahora."""
+    global _serving
+    target = _published_dir()
+    if target == _serving:
+        return target
+    if _serving is None:
+        _serving = target           # primer uso: se carga en línea
+        return target
+    with _swap_lock:
+        if target not in _warming:
+            _warming.add(target)
+            threading.Thread(target=_warm, args=(target,), daemon=True).start()
+    return _serving
+
+@lru_cache(maxsize=2)   # activa + la que se está reemplazando (hot-swap)
+def _load_index_at(path: str):
+    return load_index(path, _get_embed())
+
+def _get_index(sdir: str | None = None):
+    """Carga el índice persistido (contenido del sitio)."""
+    return _load_index_at(sdir or _active_dir())
+
+def indice_disponible() -> bool:
+    return has_index(_published_dir())
+
+def precargar_indice() -> str:
+    """Carga la versión publicada y la pone a servir (tras una reindexación)."""
+    target = _published_dir()
+    _warm(target)
+    if _serving != target:
+        raise RuntimeError(f"no se pudo cargar el índice {target}")
+    return target
+
+@lru_cache(maxsize=1)
+def _get_synth():
+    return get_response_synthesizer(response_mode="compact")
+
+@lru_cache(maxsize=1)
+def _query_cache() -> QueryEmbeddingCache:
+    cache = QueryEmbeddingCache(
+        EMBEDDING_MODEL,
+        max_entries=QUERY_EMBED_CACHE_MAX_ENTRIES,
+        max_bytes=QUERY_EMBED_CACHE_MAX_BYTES,
+        path=QUERY_EMBED_CACHE_PATH,
+        save_every=QUERY_EMBED_CACHE_SAVE_EVERY,
+        save_interval=QUERY_EMBED_CACHE_SAVE_INTERVAL,
     )
+    atexit.register(cache.save)   # lo que quede desde el último guardado
+    return cache
+
+def _query_bundle(q: str) -> QueryBundle:
+    """Embebe la pregunta UNA vez; los pases y la síntesis reutilizan el vector."""
+    return QueryBundle(query_str=q, embedding=_query_embeddings([q])[0])
 
-def _first_pass(q: str):
-    retriever = VectorIndexRetriever(index=_get_index(), similarity_top_k=TOP_K)
-    xs = [n for n in retriever.retrieve(q) if getattr(n, "score", None) is not None]
+def _retrieve(qb: QueryBundle, top_k: int, sdir: str | None = None):
+    retriever = VectorIndexRetriever(index=_get_index(sdir), similarity_top_k=top_k)
+    return retriever.retrieve(qb)
+
+def _first_pass(qb: QueryBundle, sdir: str | None = None):
+    xs = [n for n in _retrieve(qb, TOP_K, sdir) if getattr(n, "score", None) is not None]
     xs.sort(key=lambda n: n.score, reverse=True)
     return xs
 
-def _second_pass(q: str):
+@lru_cache(maxsize=2)
+def _dense_at(path: str) -> DenseVectors:
+    store = _load_index_at(path).vector_store
+    if isinstance(store, BinaryVectorStore):
+        return store.dense              # ya está en disco (mmap), sin copiar
+    return DenseVectors.from_embedding_dict(store.to_dict().get("embedding_dict", {}))
+
+def _dense(sdir: str | None = None) -> DenseVectors:
+    """Matriz de embeddings del índice para búsquedas vectorizadas."""
+    return _dense_at(sdir or _active_dir())
+
+def _get_node(node_id: str, sdir: str | None = None):
+    index = _get_index(sdir)
+    if isinstance(index.vector_store, BinaryVectorStore):
+        return index.vector_store.get_node(node_id)
+    return index.docstore.get_node(node_id)
+
+def _encode_queries(texts: list[str]) -> list[list[float]]:
+    """Embebe varias consultas en UNA llamada batch al encoder."""
+    embed = _get_embed()
+    if hasattr(embed, "_embed"):
+        return embed._embed(texts, prompt_name="query")
+    return [embed.get_query_embedding(t) for t in texts]
+
+@lru_cache(maxsize=1)
+def _batcher() -> EmbeddingBatcher:
+    return EmbeddingBatcher(_encode_queries, max_batch=EMBED_BATCH_MAX, window_ms=EMBED_BATCH_WINDOW_MS)
+
+def _embed_queries(texts: list[str]) -> list[list[float]]:
+    """Embeddings de consultas; las de hilos concurrentes se agrupan en un batch."""
+    if not texts:
+        return []
+    return _batcher().embed(texts)
+
+def _query_embeddings(texts: list[str]) -> list[list[float]]:
+    """Embeddings de consultas pasando por la caché (clave = texto normalizado)."""
+    cache = _query_cache()
+    keys = [_norm(t) for t in texts]
+    out = [cache.get(k) for k in keys]
+    missing = {}
+    for t, k, v in zip(texts, keys, out):
+        if v is None and k not in missing:
+            missing[k] = t
+    if missing:
+        fresh = dict(zip(missing, _embed_queries(list(missing.values()))))
+        for k, v in fresh.items():
+            cache.put(k, v)
+        out = [v if v is not None else list(fresh[k]) for k, v in zip(keys, out)]
+    return out
+
+def _second_pass(qb: QueryBundle, sdir: str | None = None):
     """Recall ampliado: normaliza y usa solo keywords como variantes."""
+    q = qb.query_str
     base = _norm(q)
-    kws = " ".join(_tokens(base))
-    variants = [q, base] + ([kws] if kws else [])
+    kws = " ".join(sorted(_tokens(base)))  # orden estable (clave de caché)
+    # la variante original reutiliza el embedding ya calculado;
+    # las demás se embeben juntas y se buscan en una sola matriz
+    extra = [base] + ([kws] if kws else [])
+    vectors = [qb.embedding] + _query_embeddings(extra)
     seen, merged = set(), []
-    retriever = VectorIndexRetriever(index=_get_index(), similarity_top_k=TOP_K_FALLBACK)
-    for v in variants:
-        for n in retriever.retrieve(v):
-            nid = getattr(n.node, "node_id", None) or id(n.node)
+    for hits in _dense(sdir).search(vectors, TOP_K_FALLBACK):
+        for nid, score in hits:
             if nid in seen:
                 continue
             seen.add(nid)
-            if getattr(n, "score", None) is not None:
-                merged.append(n)
+            merged.append(NodeWithScore(node=_get_node(nid, sdir), score=score))
     merged.sort(key=lambda n: n.score, reverse=True)
     return merged
 
+def _synthesize(qb: QueryBundle, nodes) -> str:
+    """Responde con los nodos ya recuperados (sin volver a buscar)."""
+    return str(_get_synth().synthesize(qb, nodes=nodes)).strip()
+
 # ===================== catálogo de secciones (enlaces) =======================
 
+def _catalog_version() -> tuple[int, int]:
+    return _file_version(SECTIONS_CATALOG_PATH)
+
 @lru_cache(maxsize=1)
+def _load_sections(version: tuple[int, int]):
+    # el catálogo se publica con os.replace: nunca se lee uno a medio escribir
+    return catalog.read_all(SECTIONS_CATALOG_PATH)
+
 def _sections():
     """Carga el catálogo de secciones HTML (generado por el crawler)."""
-    if os.path.exists(SECTIONS_CATALOG_PATH):
-        with open(SECTIONS_CATALOG_PATH, "r", encoding="utf-8") as f:
-            return json.load(f).get("items", [])
-    return []
+    return _load_sections(_catalog_version())
 
 def _is_link_intent(q: str) -> bool:
     ql = _norm(q)
     return any(t in ql for t in ["enlace", "link", "seccion", "sección", "ruta", "url", "acceder", "ir a"])
 
-def _resolve_section_url(q: str) -> str | None:
-    """Devuelve la URL más probable de la sección pedida, de forma determinista."""
-    items = _sections()
-    if not items:
-        return None
-
-    q_toks = _tokens(q)
-    best, best_score = None, 0.0
-
-    for it in items:
-        cand_text = " ".join([
-            it.get("text", ""),
-            it.get("page_title", ""),
-            it.get("h1", ""),
-            it.get("section", ""),
-        ]).strip()
+@lru_cache(maxsize=1)
+def _build_section_index(version: tuple[int, int]) -> SectionIndex:
+    return SectionIndex(_load_sections(version))
 
-        s = _similarity(q, cand_text)
+def _section_index() -> SectionIndex:
+    """Índice léxico del catálogo; se reconstruye solo si el catálogo cambia."""
+    return _build_section_index(_catalog_version())
 
-        # bonus si palabras de la consulta aparecen en el TEXTO del enlace
-        txt_toks = _tokens(it.get("text", ""))
-        if q_toks and q_toks.issubset(txt_toks):
-            s += 0.20
+def _resolve_section_url(q: str) -> str | None:
+    """Devuelve la URL más probable de la sección pedida, de forma determinista."""
+    return _section_index().resolve(q)
 
-        # bonus si tokens del PATH coinciden con la consulta
-        path_toks = _path_tokens(it.get("url", ""))
-        if q_toks and len(q_toks & path_toks) > 0:
-            s += 0.15
+# ================= Plan Anual de Adquisiciones (filtros/sumas) ================
 
-        # preferir rutas internas (y penalizar fuerte la home)
-        depth = _path_depth(it.get("url", ""))
-        s += min(depth, 6) * 0.05
-        if depth == 0:
-            s -= 0.25
+def _paa_version() -> tuple[int, int]:
+    return _file_version(PAA_STORE_PATH)
 
-        if s > best_score:
-            best_score, best = s, it
+@lru_cache(maxsize=1)
+def _load_paa(version: tuple[int, int]) -> PaaStore | None:
+    # el almacén se publica con os.replace; se recarga solo si cambió
+    if version == (0, 0):
+        return None
+    try:
+        return PaaStore.load(PAA_STORE_PATH)
+    except PAA_LOAD_ERRORS as e:
+        print(f"⚠️ PAA: no se pudo cargar {PAA_STORE_PATH}: {e}")
+        return None
 
-    # Umbral exigente para evitar falsos positivos
-    return best["url"] if best and best_score >= 0.55 else None
+def _paa_store() -> PaaStore | None:
+    return _load_paa(_paa_version()) if PAA_ENABLED else None
 
 # ============================== interfaz QA =================================
 
+@lru_cache(maxsize=1)
+def _answer_cache() -> AnswerCache:
+    return AnswerCache(max_entries=ANSWER_CACHE_MAX_ENTRIES, ttl=ANSWER_CACHE_TTL)
+
 def responder_pregunta(pregunta: str) -> str:
     """
     - Si la pregunta pide un ENLACE/RUTA/SECCIÓN → devuelve SOLO la URL exacta.
+    - Si filtra o suma adquisiciones del PAA → tablas columnares (sin LLM).
     - Si es de CONTENIDO → usa el índice semántico (dos pasos).
+    Las respuestas se cachean por pregunta normalizada + versión del catálogo
+    (enlaces) o versión activa del índice (contenido).
     """
+    key = _norm(pregunta)
+    cache = _answer_cache()
+
     # 1) ¿Es intención de enlace?
     if _is_link_intent(pregunta):
-        url = _resolve_section_url(pregunta)
+        url = cache.get_or_compute(
+            ("url", key, _catalog_version()), lambda: _resolve_section_url(pregunta)
+        )
         if url:
             # Devuelve solo la URL (simple para el frontend).
             return url
         # si no encontramos sección clara, seguimos con contenido
 
+    # 2) ¿Filtro/suma sobre el Plan Anual de Adquisiciones? (None → contenido)
+    paa = _paa_store()
+    if paa is not None:
+        resp = cache.get_or_compute(("paa", key, _paa_version()), lambda: paa.answer(pregunta))
+        if resp:
+            return resp
+
+    # la versión se fija una vez: un hot-swap a mitad de pregunta no la afecta
+    sdir = _active_dir()
+    return cache.get_or_compute(
+        ("qa", key, sdir), lambda: _responder_contenido(pregunta, sdir)
+    )
+
+def _responder_contenido(pregunta: str, sdir: str) -> str:
+    """Respuesta desde el índice semántico (sin caché)."""
     # 2) Contenido — Pase 1 (preciso)
-    nodes = _first_pass(pregunta)
+    qb = _query_bundle(pregunta)
+    nodes = _first_pass(qb, sdir)
     if nodes and nodes[0].score >= CONFIDENCE_THRESHOLD:
-        resp = _get_engine(TOP_K).query(pregunta)
-        return str(resp).strip()
+        return _synthesize(qb, nodes)
 
     # 3) Contenido — Pase 2 (recall ampliado)
-    nodes2 = _second_pass(pregunta)
+    nodes2 = _second_pass(qb, sdir)
     if nodes2 and nodes2[0].score >= (CONFIDENCE_THRESHOLD * 0.85):
-        resp = _get_engine(TOP_K_FALLBACK).query(pregunta)
-        return str(resp).strip()
+        return _synthesize(qb, nodes2[:TOP_K_FALLBACK])
 
     # 4) Fallback
     return ("No encontré un enlace o contenido específico con suficiente certeza. "
             "Intenta con el nombre exacto de la sección como aparece en el menú, "
             "o formula la pregunta con más contexto.")
-    
+
+def metricas() -> dict:
+    """Contadores de este proceso (batching de embeddings y cachés)."""
+    return {
+        "embed_batcher": _batcher().stats(),
+        "query_embed_cache": _query_cache().stats(),
+        "answer_cache": _answer_cache().stats(),
+    }
+
 
 if __name__ == "__main__":
     # Modo consola para pruebas locales
@@ -0,0 +1,143 @@
+# chatbot/build_embedder.py
+# -----------------------------------------------------------------------------
+# Embeddings de trozos al INDEXAR repartidos en varios procesos
+# -----------------------------------------------------------------------------
+# - Con BUILD_EMBED_WORKERS > 1 se arrancan esos procesos (forkserver); cada
+#   uno carga el modelo una vez y fija sus hilos de torch (intra-op) en
+#   BUILD_EMBED_THREADS (0 = núcleos / procesos), para que no compitan entre sí.
+# - Los textos se cortan en tandas contiguas de BUILD_EMBED_BATCH textos; cada
+#   proceso libre recibe la siguiente tanda y el resultado se coloca por su
+#   posición: el orden de salida es siempre el de entrada, sin importar qué
+#   proceso termine primero.
+# - Con un solo proceso, o menos de BUILD_EMBED_MIN_PARALLEL textos (cargar el
+#   modelo en cada hijo cuesta más de lo que se gana), se embebe aquí mismo
+#   con el modelo ya cargado.
+# -----------------------------------------------------------------------------
+
+import multiprocessing as mp
+import os
+import time
+from collections import deque
+from multiprocessing.connection import wait
+
+import numpy as np
+
+from chatbot.config import (
+    BUILD_EMBED_BATCH, BUILD_EMBED_MIN_PARALLEL, BUILD_EMBED_THREADS, BUILD_EMBED_WORKERS, EMBEDDING_MODEL,
+)
+
+
+def resolve_workers(workers: int = BUILD_EMBED_WORKERS, threads: int = BUILD_EMBED_THREADS) -> tuple[int, int]:
+    """(procesos, hilos de torch por proceso) con los 0 resueltos según los núcleos."""
+    cpus = os.cpu_count() or 1
+    workers = workers or max(1, cpus // 2)
+    threads = threads or max(1, cpus // workers)
+    return workers, threads
+
+
+def _set_threads(threads: int):
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(threads)
+
+
+# ============================ proceso hijo ==================================
+
+def _worker(conn, model_name: str, batch_size: int, threads: int):
+    """Carga el modelo y responde tandas (inicio, textos) → (inicio, vectores) hasta recibir None."""
+    _set_threads(threads)
+    from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+
+    model = HuggingFaceEmbedding(model_name=model_name, embed_batch_size=batch_size)
+    conn.send(("listo", None))
+    while True:
+        job = conn.recv()
+        if job is None:
+            break
+        start, texts = job
+        vectors = np.asarray(model.get_text_embedding_batch(texts), dtype=np.float32)
+        conn.send((start, vectors))
+    conn.close()
+
+
+def _context():
+    methods = mp.get_all_start_methods()
+    return mp.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+# ================================ embeber ===================================
+
+def embed_texts(texts: list[str], local_model=None, model_name: str = EMBEDDING_MODEL,
+                workers: int = BUILD_EMBED_WORKERS, batch_size: int = BUILD_EMBED_BATCH,
+                threads: int = BUILD_EMBED_THREADS,
+                min_parallel: int = BUILD_EMBED_MIN_PARALLEL) -> np.ndarray:
+    """Matriz float32 (len(texts), dim) en el mismo orden que `texts`.
+
+    `local_model` se usa si no conviene repartir (si falta, se carga uno).
+    """
+    workers, threads = resolve_workers(workers, threads)
+    batch_size = max(1, int(batch_size))
+    t0 = time.perf_counter()
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+
+    if workers <= 1 or len(texts) < min_parallel:
+        if local_model is None:
+            from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+
+            local_model = HuggingFaceEmbedding(model_name=model_name)
+        local_model.embed_batch_size = batch_size
+        out = np.asarray(local_model.get_text_embedding_batch(texts, show_progress=len(texts) > 100),
+                         dtype=np.float32)
+        print(f"🧮 Embeddings: {len(texts)} textos en {time.perf_counter() - t0:.1f}s | 1 proceso, "
+              f"tandas de {batch_size}")
+        return out
+
+    workers = min(workers, -(-len(texts) // batch_size))
+    todo = deque((i, texts[i:i + batch_size]) for i in range(0, len(texts), batch_size))
+    ctx = _context()
+    procs, idle, busy = [], [], set()
+    parts: dict[int, np.ndarray] = {}
+    try:
+        for _ in range(workers):
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(target=_worker, args=(child, model_name, batch_size, threads), daemon=True)
+            proc.start()
+            child.close()
+            procs.append((proc, parent))
+            busy.add(parent)   # ocupado hasta que avise que cargó el modelo
+        t_ready = None
+        while busy:
+            for conn in wait(list(busy)):
+                busy.discard(conn)
+                try:
+                    start, vectors = conn.recv()
+                except EOFError:
+                    raise RuntimeError("un proceso de embeddings terminó sin resultado") from None
+                if start == "listo":
+                    t_ready = t_ready or time.perf_counter()
+                else:
+                    parts[start] = vectors
+                if todo:
+                    conn.send(todo.popleft())
+                    busy.add(conn)
+                else:
+                    idle.append(conn)
+    finally:
+        for proc, conn in procs:
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+            conn.close()
+            proc.join(5)
+            if proc.is_alive():
+                proc.kill()
+
+    out = np.concatenate([parts[i] for i in sorted(parts)])
+    wall = time.perf_counter() - t0
+    print(f"🧮 Embeddings: {len(texts)} textos en {wall:.1f}s ({len(texts) / wall:.0f}/s) | {workers} procesos × "
+          f"{threads} hilos, tandas de {batch_size} | carga del modelo {(t_ready or t0) - t0:.1f}s")
+    return out
@@ -0,0 +1,198 @@
+# chatbot/catalog.py
+# -----------------------------------------------------------------------------
+# Catálogos en JSON Lines (manifiesto de URLs, documentos, secciones)
+# -----------------------------------------------------------------------------
+# - Escritura en streaming: cada entrada se agrega al archivo apenas se
+#   procesa su página (nada de listas completas en memoria + json.dump final).
+# - Atómica: se escribe en <ruta>.<pid>.tmp y se publica con os.replace; un
+#   lector concurrente (la app web) ve el catálogo anterior o el nuevo entero.
+# - Índice lateral <ruta>.idx (JSON): clave → offsets de sus líneas, total de
+#   entradas, huella del .jsonl (inodo, mtime_ns, tamaño) y metadatos. Si la
+#   huella no coincide con el .jsonl abierto (se publicó uno nuevo entre medias,
+#   aunque mida lo mismo) se ignora y se recorre el archivo.
+# - Lectura perezosa (`iter_items`); acepta también el formato anterior
+#   ({"count": n, "items": [...]} / {"urls": [...]} en .json).
+# -----------------------------------------------------------------------------
+
+import json
+import os
+from typing import Iterator
+
+INDEX_SUFFIX = ".idx"
+
+
+def _legacy_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".json"
+
+
+def _fingerprint(st: os.stat_result) -> list[int]:
+    """Identifica UN archivo publicado: os.replace conserva el inodo del .tmp."""
+    return [st.st_ino, st.st_mtime_ns, st.st_size]
+
+
+def _write_atomic(path: str, data: bytes):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class CatalogWriter:
+    """Escribe un catálogo .jsonl entrada por entrada; `commit()` lo publica.
+
+    `key`: campo por el que se indexan las entradas en el .idx (None: sin índice).
+    Usado como context manager publica al salir bien y descarta si hubo error.
+    """
+
+    def __init__(self, path: str, key: str | None = None, meta: dict | None = None):
+        self.path = path
+        self.key = key
+        self.meta = meta or {}
+        self.count = 0
+        self._offsets: dict[str, list[int]] = {}
+        self._pos = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._tmp = f"{path}.{os.getpid()}.tmp"
+        self._f = open(self._tmp, "wb")
+
+    def add(self, item: dict):
+        line = (json.dumps(item, ensure_ascii=False) + "\n").encode("utf-8")
+        if self.key is not None:
+            self._offsets.setdefault(str(item.get(self.key, "")), []).append(self._pos)
+        self._f.write(line)
+        self._pos += len(line)
+        self.count += 1
+
+    def commit(self) -> int:
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        fingerprint = _fingerprint(os.fstat(self._f.fileno()))
+        self._f.close()
+        os.replace(self._tmp, self.path)
+        index = {"count": self.count, "file": fingerprint, "key": self.key,
+                 "meta": self.meta, "offsets": self._offsets}
+        _write_atomic(self.path + INDEX_SUFFIX, json.dumps(index, ensure_ascii=False).encode("utf-8"))
+        return self.count
+
+    def abort(self):
+        self._f.close()
+        try:
+            os.remove(self._tmp)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self) -> "CatalogWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+
+# ================================= lectura ==================================
+
+def exists(path: str) -> bool:
+    return os.path.exists(path) or os.path.exists(_legacy_path(path))
+
+
+def iter_items(path: str) -> Iterator[dict]:
+    """Entradas del catálogo, una a una (vacío si no existe)."""
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        yield from _iter_legacy(_legacy_path(path))
+        return
+    with f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _iter_legacy(path: str) -> Iterator[dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return
+    if "urls" in data:
+        yield from ({"url": u} for u in data["urls"])
+    else:
+        yield from data.get("items", [])
+
+
+def _load_index(path: str, f) -> dict | None:
+    """.idx válido para el archivo abierto `f` (misma huella), o None."""
+    try:
+        with open(path + INDEX_SUFFIX, "r", encoding="utf-8") as fi:
+            index = json.load(fi)
+    except (OSError, ValueError):
+        return None
+    return index if index.get("file") == _fingerprint(os.fstat(f.fileno())) else None
+
+
+def count(path: str) -> int:
+    try:
+        with open(path, "rb") as f:
+            index = _load_index(path, f)
+            if index is not None:
+                return index["count"]
+    except FileNotFoundError:
+        pass
+    return sum(1 for _ in iter_items(path))
+
+
+def meta(path: str) -> dict:
+    try:
+        with open(path, "rb") as f:
+            index = _load_index(path, f)
+    except FileNotFoundError:
+        return {}
+    return (index or {}).get("meta", {})
+
+
+class CatalogIndex:
+    """Búsqueda por clave con el .idx (lee solo las líneas pedidas)."""
+
+    def __init__(self, path: str, key: str):
+        self.path = path
+        self.key = key
+        self._f = open(path, "rb")
+        index = _load_index(path, self._f)
+        if index is None or index.get("key") != key:
+            # sin índice válido: se arma recorriendo el archivo una vez
+            offsets: dict[str, list[int]] = {}
+            pos = 0
+            for line in self._f:
+                if line.strip():
+                    offsets.setdefault(str(json.loads(line).get(key, "")), []).append(pos)
+                pos += len(line)
+            index = {"offsets": offsets}
+        self._offsets = index["offsets"]
+
+    def __contains__(self, value: str) -> bool:
+        return value in self._offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def get(self, value: str) -> list[dict]:
+        out = []
+        for off in self._offsets.get(value, []):
+            self._f.seek(off)
+            out.append(json.loads(self._f.readline()))
+        return out
+
+    def close(self):
+        self._f.close()
+
+    def __enter__(self) -> "CatalogIndex":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_all(path: str) -> list[dict]:
+    return list(iter_items(path))
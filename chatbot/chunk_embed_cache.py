@@ -0,0 +1,200 @@
+# chatbot/chunk_embed_cache.py
+# -----------------------------------------------------------------------------
+# Caché persistente de embeddings de TROZOS para la indexación
+# -----------------------------------------------------------------------------
+# - Clave: (modelo, hash del texto a embeber). Un subdirectorio por modelo;
+#   dentro, el hash es blake2b de 16 bytes del texto (MetadataMode.EMBED).
+# - Segmentos inmutables: cada corrida que embebe algo escribe
+#     <ts>-<pid>.vec.npy    float32 (n, dim)   (se abre con mmap)
+#     <ts>-<pid>.keys.npy   uint8   (n, 16)    (se escribe al final)
+#   Un segmento sin .keys no cuenta: una corrida cortada no deja basura
+#   visible, y dos procesos que indexan a la vez no se pisan.
+# - Al cargar se arma el índice hash → (segmento, fila); si un texto aparece
+#   en varios segmentos gana el más nuevo.
+# - Más de CHUNK_EMBED_CACHE_MAX_SEGMENTS segmentos o de
+#   CHUNK_EMBED_CACHE_MAX_ENTRIES entradas → se compacta en uno solo,
+#   primero las entradas usadas en esta corrida y luego las más nuevas.
+# -----------------------------------------------------------------------------
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+import numpy as np
+
+from chatbot.config import (
+    CHUNK_EMBED_CACHE_DIR, CHUNK_EMBED_CACHE_MAX_ENTRIES, CHUNK_EMBED_CACHE_MAX_SEGMENTS, EMBEDDING_MODEL,
+)
+
+KEY_BYTES = 16
+META_FILE = "meta.json"
+
+
+def text_key(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=KEY_BYTES).digest()
+
+
+def _slug(model_name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "__", model_name)
+
+
+def _save_npy(path: str, arr: np.ndarray):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, arr)
+    os.replace(tmp, path)
+
+
+class ChunkEmbeddingCache:
+    """Embeddings de trozos por hash del texto, con aciertos/fallos de la corrida."""
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL, root: str = CHUNK_EMBED_CACHE_DIR,
+                 max_entries: int = CHUNK_EMBED_CACHE_MAX_ENTRIES,
+                 max_segments: int = CHUNK_EMBED_CACHE_MAX_SEGMENTS):
+        self.model_name = model_name
+        self.dir = os.path.join(root, _slug(model_name))
+        self.max_entries, self.max_segments = max_entries, max_segments
+        self.hits = self.misses = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    # ------------------------------ segmentos --------------------------------
+
+    def _segment_names(self) -> list[str]:
+        try:
+            files = set(os.listdir(self.dir))
+        except FileNotFoundError:
+            return []
+        return sorted(f[:-9] for f in files if f.endswith(".keys.npy") and f[:-9] + ".vec.npy" in files)
+
+    def _load(self):
+        self._names: list[str] = []
+        self._segments: list[np.ndarray] = []
+        self._index: dict[bytes, tuple[int, int]] = {}
+        self._used: set[bytes] = set()
+        for name in self._segment_names():
+            try:
+                keys = np.load(os.path.join(self.dir, name + ".keys.npy"))
+                vecs = np.load(os.path.join(self.dir, name + ".vec.npy"), mmap_mode="r")
+            except (OSError, ValueError):
+                continue   # lo borró una compactación concurrente, o está dañado
+            if self._segments and vecs.shape[1:] != self._segments[0].shape[1:]:
+                continue
+            s = len(self._segments)
+            self._names.append(name)
+            self._segments.append(vecs)
+            for r, k in enumerate(keys[:len(vecs)]):
+                self._index[k.tobytes()] = (s, r)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _meta(self) -> dict:
+        try:
+            with open(os.path.join(self.dir, META_FILE), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_meta(self, meta: dict):
+        path = os.path.join(self.dir, META_FILE)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({**meta, "model": self.model_name}, f)
+        os.replace(tmp, path)
+
+    # -------------------------------- acceso ---------------------------------
+
+    def lookup(self, keys: list[bytes]) -> dict[int, np.ndarray]:
+        """{posición: vector} de las claves que están en la caché."""
+        found = {}
+        with self._lock:
+            for i, k in enumerate(keys):
+                loc = self._index.get(k)
+                if loc is not None:
+                    found[i] = np.asarray(self._segments[loc[0]][loc[1]], dtype=np.float32)
+                    self._used.add(k)
+        return found
+
+    def add(self, keys: list[bytes], vectors: np.ndarray):
+        """Guarda un segmento nuevo con estas claves (y compacta si hace falta)."""
+        if not keys:
+            return
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        os.makedirs(self.dir, exist_ok=True)
+        name = f"{time.time_ns():020d}-{os.getpid()}"
+        _save_npy(os.path.join(self.dir, name + ".vec.npy"), vectors)
+        _save_npy(os.path.join(self.dir, name + ".keys.npy"),
+                  np.frombuffer(b"".join(keys), dtype=np.uint8).reshape(len(keys), KEY_BYTES))
+        with self._lock:
+            s = len(self._segments)
+            self._names.append(name)
+            self._segments.append(np.load(os.path.join(self.dir, name + ".vec.npy"), mmap_mode="r"))
+            for r, k in enumerate(keys):
+                self._index[k] = (s, r)
+                self._used.add(k)
+        if len(self._segments) > self.max_segments or len(self._index) > self.max_entries:
+            self.compact()
+
+    def compact(self):
+        """Un solo segmento: primero lo usado en esta corrida, luego lo más nuevo."""
+        with self._lock:
+            order = sorted(self._index.items(), key=lambda kv: (kv[0] not in self._used, -kv[1][0], kv[1][1]))
+            order = order[:self.max_entries]
+            keys = [k for k, _ in order]
+            vectors = np.stack([self._segments[s][r] for _, (s, r) in order]) if order else None
+            old = list(self._names)
+        if vectors is not None:
+            name = f"{time.time_ns():020d}-{os.getpid()}"
+            _save_npy(os.path.join(self.dir, name + ".vec.npy"), vectors.astype(np.float32, copy=False))
+            _save_npy(os.path.join(self.dir, name + ".keys.npy"),
+                      np.frombuffer(b"".join(keys), dtype=np.uint8).reshape(len(keys), KEY_BYTES))
+        for n in old:
+            for ext in (".keys.npy", ".vec.npy"):   # .keys primero: el segmento deja de contar
+                try:
+                    os.remove(os.path.join(self.dir, n + ext))
+                except FileNotFoundError:
+                    pass
+        used = self._used
+        self._load()
+        self._used = used & set(self._index)
+
+    # ------------------------------- embeber ---------------------------------
+
+    def embed(self, texts: list[str], embed_fn) -> list[np.ndarray]:
+        """Vectores de `texts`; `embed_fn(lista)` corre solo con los que faltan
+        (cada texto distinto una vez). Imprime tasa de aciertos y ahorro."""
+        keys = [text_key(t) for t in texts]
+        found = self.lookup(keys)
+        todo: dict[bytes, int] = {}
+        for i, k in enumerate(keys):
+            if i not in found:
+                todo.setdefault(k, i)
+        self.hits += len(found)
+        self.misses += len(texts) - len(found)
+
+        meta = self._meta()
+        ms_per_text = meta.get("ms_per_text")
+        t_model = 0.0
+        if todo:
+            t0 = time.perf_counter()
+            fresh = np.asarray(embed_fn([texts[i] for i in todo.values()]), dtype=np.float32)
+            t_model = time.perf_counter() - t0
+            self.add(list(todo), fresh)
+            by_key = dict(zip(todo, fresh))
+            ms = t_model * 1e3 / len(todo)
+            ms_per_text = ms if ms_per_text is None else 0.7 * ms_per_text + 0.3 * ms
+            self._write_meta({**meta, "ms_per_text": ms_per_text})
+        else:
+            by_key = {}
+
+        out = [found[i] if i in found else by_key[k] for i, k in enumerate(keys)]
+        rate = len(found) / len(texts) if texts else 0.0
+        saved = f"≈{len(found) * ms_per_text / 1e3:.1f}s" if ms_per_text is not None else "?"
+        print(f"🗃️ Caché de embeddings: {len(found)}/{len(texts)} trozos ({rate:.0%}) | "
+              f"modelo: {len(todo)} textos en {t_model:.1f}s | ahorro {saved} | "
+              f"{len(self)} en caché ({len(self._segments)} segmentos)")
+        return out
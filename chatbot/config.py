@@ -8,13 +8,62 @@ TOP_K_FALLBACK = 12
 CHUNK_SIZE = 900
 CHUNK_OVERLAP = 120
 
+# ===== Plantilla del sitio (menú/pie) fuera de cada página (chatbot/boilerplate.py) =====
+BOILERPLATE_ENABLED = True
+BOILERPLATE_MIN_FRACTION = 0.5   # línea presente en al menos esta fracción de páginas → plantilla
+BOILERPLATE_MIN_PAGES = 5        # … y en al menos tantas páginas (sitios chicos: sin efecto)
+BOILERPLATE_REPORT_PATH = "data/boilerplate_report.jsonl"   # texto útil / total por página
+
+# ===== Casi-duplicados antes de indexar (chatbot/dedupe.py) =====
+DEDUPE_ENABLED = True
+DEDUPE_SHINGLE = 3            # palabras por shingle
+DEDUPE_MAX_DISTANCE = 3       # bits distintos (de 64) para ser candidato (SimHash)
+DEDUPE_MIN_OVERLAP = 0.98     # fracción de shingles del texto nuevo ya presentes en el conservado
+
+# ===== Plan Anual de Adquisiciones en tablas columnares (chatbot/paa_store.py) =====
+PAA_ENABLED = True
+PAA_STORE_PATH = "data/paa_store.npz"   # junto a data/storage; se rehace si cambia una hoja
+PAA_MAX_ROWS = 10                       # adquisiciones listadas en una respuesta
+
+# ===== Caché de embeddings de trozos al indexar (chatbot/chunk_embed_cache.py) =====
+CHUNK_EMBED_CACHE_ENABLED = True
+CHUNK_EMBED_CACHE_DIR = "data/cache/chunk_embeddings"   # un subdirectorio por modelo
+CHUNK_EMBED_CACHE_MAX_ENTRIES = 200_000                  # ~300 MB con 384 dimensiones
+CHUNK_EMBED_CACHE_MAX_SEGMENTS = 8                       # más segmentos → se compactan en uno
+
+# ===== Embeddings al indexar en varios procesos (chatbot/build_embedder.py) =====
+BUILD_EMBED_WORKERS = 0            # 0 = la mitad de los núcleos; 1 = en el proceso del indexador
+BUILD_EMBED_THREADS = 0            # hilos de torch por proceso (0 = núcleos / procesos)
+BUILD_EMBED_BATCH = 32             # textos por forward y por tanda enviada a un proceso
+BUILD_EMBED_MIN_PARALLEL = 256     # con menos textos no se arrancan procesos
+
+# ===== Caché de embeddings de consultas =====
+QUERY_EMBED_CACHE_MAX_ENTRIES = 4096
+QUERY_EMBED_CACHE_MAX_BYTES = 16 * 1024 * 1024      # tope de memoria (vectores + claves)
+QUERY_EMBED_CACHE_PATH = "data/cache/query_embeddings.npz"  # "" = solo en memoria
+QUERY_EMBED_CACHE_SAVE_EVERY = 32                   # guardar tras tantas consultas nuevas…
+QUERY_EMBED_CACHE_SAVE_INTERVAL = 60.0              # …o tras tantos segundos con alguna nueva
+
+# ===== Micro-batching de embeddings de consultas =====
+EMBED_BATCH_MAX = 32                                # textos por forward
+EMBED_BATCH_WINDOW_MS = 5.0                         # espera para juntar consultas (0 = sin espera)
+
+# ===== Caché de respuestas =====
+ANSWER_CACHE_MAX_ENTRIES = 2048
+ANSWER_CACHE_TTL = 6 * 60 * 60                      # segundos
+
 # ===== Rutas de datos =====
-DOCS_DIR = ""                                # ⛔ No indexar documentos locales
-STORAGE_DIR = "data/storage"
+DOCS_DIR = "data/documentos"                 # PDF/XLS/XLSX a indexar ("" = ninguno)
+STORAGE_DIR = "data/storage"                 # versiones en data/storage/versions/
+STORAGE_VERSIONS_KEEP = 2                    # versiones completas que se conservan (incluida la activa)
+REINDEX_INTERVAL_HOURS = 24                  # reindexación en segundo plano
+STARTUP_RETRY_MIN_S = 60                     # sin índice cargado: reintento de build/carga, se duplica…
+STARTUP_RETRY_MAX_S = 30 * 60                # …hasta este tope
 SNAPSHOT_DIR = "data/web_snapshot"
-URL_MANIFEST_PATH = "data/url_manifest.json"
-DOC_CATALOG_PATH = "data/doc_catalog.json"           # Catálogo de documentos (PDF/DOC…)
-SECTIONS_CATALOG_PATH = "data/sections_catalog.json" # Catálogo de secciones HTML
+# Catálogos en JSON Lines (+ índice lateral .idx); se lee también el .json anterior
+URL_MANIFEST_PATH = "data/url_manifest.jsonl"
+DOC_CATALOG_PATH = "data/doc_catalog.jsonl"           # Catálogo de documentos (PDF/DOC…)
+SECTIONS_CATALOG_PATH = "data/sections_catalog.jsonl" # Catálogo de secciones HTML
 
 # Archivo con TODAS las rutas (una URL por línea)
 ROUTES_FILE_PATH = "data/routes.txt"                 # <— coloca aquí tu .txt
@@ -33,13 +82,56 @@ USER_AGENT = (
 HTTP_TIMEOUT = 20
 RESPECT_ROBOTS = False         # puedes volverlo True si lo requieres
 
+# Cliente HTTP compartido (chatbot/http_client.py) y descarga concurrente
+FETCH_WORKERS = 8              # peticiones simultáneas en total
+FETCH_PER_HOST = 4             # … y por host
+FETCH_RATE = 20.0              # peticiones/s por host (token bucket; 0 = sin límite)
+FETCH_BURST = 4                # ráfaga máxima del token bucket
+FETCH_RETRIES = 2              # reintentos ante timeout / 5xx / 429
+FETCH_BACKOFF = 0.5            # s; se duplica en cada reintento
+FETCH_TIMEOUT = (5, 15)        # (conexión, lectura)
+FETCH_ADAPTIVE = True          # el ritmo sube con latencia baja y baja ante 429/5xx/lentitud
+FETCH_RATE_MIN = 2.0           # peticiones/s por host (piso al frenar)
+FETCH_RATE_MAX = 40.0          # … y techo al acelerar
+
+# Almacén de páginas crudas + peticiones condicionales (ETag / Last-Modified / max-age)
+HTTP_CACHE_ENABLED = True
+PAGE_STORE_DIR = "data/page_store"   # una entrada por URL (estado, cabeceras, cuerpo zlib)
+OFFLINE = False                      # True: mapear/indexar SOLO desde el almacén
+
+# Extracción HTML en una pasada (chatbot/html_extract.py)
+# "html.parser": determinista e idéntico a BeautifulSoup (por defecto);
+# "lxml" (o "auto": lxml si está instalado) es más rápido pero puede cambiar
+# el texto/contexto de páginas mal formadas → catálogos e índice distintos
+HTML_EXTRACT_BACKEND = "html.parser"
+
 # Cobertura del mapeo (si se usa crawler tradicional)
 CRAWL_MAX_DEPTH = 6
 MAX_PAGINAS_RASTREO = 2000
+CRAWL_STATE_DIR = "data/crawl_state"   # frontera/visitadas/catálogos parciales (SQLite)
+CRAWL_CHECKPOINT_EVERY = 25            # páginas entre checkpoints
+CRAWL_RESUME = True                    # retomar un rastreo interrumpido desde su checkpoint
+CRAWL_RESUME_MAX_AGE = 24 * 3600       # segundos; un checkpoint más viejo no se retoma (0 = sin límite)
 
 # Extensiones tratadas como “documentos” (no se descargan; sólo se catalogan)
 DOC_EXTS = (".pdf", ".doc", ".docx", ".xls", ".xlsx", ".ppt", ".pptx")
 
+# Documentos: descarga (chatbot/document_loader.py) y extracción (chatbot/doc_extract.py)
+TMP_DOC_DIR = DOCS_DIR                 # los descargados se indexan junto a los locales
+MAX_DOCUMENTOS_BUSQUEDA = 200          # documentos enlazados a descubrir como máximo
+MAX_DOC_BYTES = 25 * 1024 * 1024       # no se descargan archivos más grandes (se corta al cruzarlo)
+DOC_DOWNLOAD_CHUNK = 64 * 1024         # bytes por bloque escrito a disco
+DOC_DOWNLOAD_STATE_DIR = "data/cache/doc_downloads"   # ETag/Last-Modified por URL (+ .part a medias)
+DOC_EXTRACT_WORKERS = 0                # procesos a la vez (0 = núcleos de la CPU)
+DOC_EXTRACT_TIMEOUT = 60               # s por archivo; luego se mata el proceso
+DOC_EXTRACT_MAX_MEMORY = 1024 * 1024 * 1024   # bytes de memoria virtual por proceso (0 = sin límite)
+DOC_EXTRACT_CACHE_DIR = "data/cache/doc_text" # texto extraído por hash del archivo
+
+# ===== Servidor web (/preguntar) =====
+QA_EXECUTOR = "thread"          # "thread" | "process" (cada proceso carga su índice)
+QA_WORKERS = 4                  # preguntas ejecutándose a la vez
+QA_MAX_INFLIGHT = 32            # preguntas distintas en curso; por encima → 503
+
 # Umbral de confianza para respuestas semánticas
 CONFIDENCE_THRESHOLD = 0.30
 
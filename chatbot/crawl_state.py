@@ -0,0 +1,178 @@
+# chatbot/crawl_state.py
+# -----------------------------------------------------------------------------
+# Estado de un rastreo BFS en disco (frontera + visitadas + catálogos parciales)
+# -----------------------------------------------------------------------------
+# Un archivo SQLite por rastreo (data/crawl_state/<nombre>.sqlite):
+#   frontier(url, depth, seq, done)  cola FIFO (por seq) y, a la vez, el
+#                                    conjunto de visitadas: una URL entra una
+#                                    sola vez; al sacarla se marca done=1
+#   items(seq, kind, data)           filas de los catálogos (JSON por fila)
+#   meta(key, value)                 creación del rastreo y su configuración
+# Todo ocurre dentro de una transacción que se confirma cada
+# CRAWL_CHECKPOINT_EVERY páginas: si el proceso muere, se retoma desde el
+# último checkpoint (resume=True) y lo posterior se repite (las páginas ya
+# están en el almacén de páginas). La memoria no crece con el sitio.
+# Un checkpoint de hace más de CRAWL_RESUME_MAX_AGE segundos, o de otra
+# configuración (BASE_URL, profundidad…), no se retoma: se empieza de cero.
+# Al terminar bien, `finish()` borra el archivo.
+# -----------------------------------------------------------------------------
+
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Iterator
+
+from chatbot.config import CRAWL_CHECKPOINT_EVERY, CRAWL_RESUME_MAX_AGE, CRAWL_STATE_DIR
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS frontier (
+    url   TEXT PRIMARY KEY,
+    depth INTEGER NOT NULL,
+    seq   INTEGER NOT NULL,
+    done  INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS frontier_pending ON frontier (done, seq);
+CREATE TABLE IF NOT EXISTS items (
+    seq  INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS items_kind ON items (kind, seq);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class CrawlState:
+    """`config`: lo que define el rastreo (URL base, profundidad…); un estado
+    guardado con otra configuración, o más viejo que `max_age` segundos
+    (0 = sin límite), se descarta."""
+
+    def __init__(self, name: str, resume: bool = True, root: str = CRAWL_STATE_DIR,
+                 checkpoint_every: int = CRAWL_CHECKPOINT_EVERY, config: dict | None = None,
+                 max_age: float = CRAWL_RESUME_MAX_AGE):
+        os.makedirs(root, exist_ok=True)
+        self.path = os.path.join(root, f"{name}.sqlite")
+        config = json.dumps(config or {}, sort_keys=True, ensure_ascii=False)
+        if not resume:
+            self._remove()
+        self.db = self._open()
+        self._seq = self.db.execute("SELECT COALESCE(MAX(seq), 0) FROM frontier").fetchone()[0]
+        if self._seq:
+            reason = self._stale(config, max_age)
+            if reason:
+                print(f"🔄 Rastreo guardado descartado ({reason}): se empieza de cero")
+                self.db.close()
+                self._remove()
+                self.db = self._open()
+                self._seq = 0
+        if not self._seq:
+            self.db.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                                [("created", repr(time.time())), ("config", config)])
+            self.db.commit()
+        self.checkpoint_every = max(1, checkpoint_every)
+        self._since_checkpoint = 0
+        self.resumed = self._seq > 0
+
+    def _open(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path)
+        db.executescript(_SCHEMA)
+        db.commit()
+        return db
+
+    def _stale(self, config: str, max_age: float) -> str | None:
+        """Motivo para no retomar el estado guardado, o None."""
+        meta = dict(self.db.execute("SELECT key, value FROM meta"))
+        if "created" not in meta:
+            return "sin fecha de creación"
+        age = time.time() - float(meta["created"])
+        if max_age and age > max_age:
+            return f"de hace {age / 3600:.0f} h"
+        if meta.get("config") != config:
+            return "otra configuración"
+        return None
+
+    def _remove(self):
+        for suffix in ("", "-journal", "-wal", "-shm"):
+            try:
+                os.remove(self.path + suffix)
+            except FileNotFoundError:
+                pass
+
+    # -------------------------------- frontera -------------------------------
+
+    def push(self, url: str, depth: int) -> bool:
+        """Encola `url` si nunca se encoló (ni visitó). True si entró."""
+        self._seq += 1
+        cur = self.db.execute(
+            "INSERT OR IGNORE INTO frontier (url, depth, seq) VALUES (?, ?, ?)",
+            (url, depth, self._seq))
+        return cur.rowcount > 0
+
+    def pop(self) -> tuple[str, int] | None:
+        """Siguiente URL pendiente (FIFO); queda marcada como visitada."""
+        row = self.db.execute(
+            "SELECT url, depth FROM frontier WHERE done = 0 ORDER BY seq LIMIT 1").fetchone()
+        if row is None:
+            return None
+        self.db.execute("UPDATE frontier SET done = 1 WHERE url = ?", (row[0],))
+        return row[0], row[1]
+
+    def seen(self, url: str) -> bool:
+        return self.db.execute("SELECT 1 FROM frontier WHERE url = ?", (url,)).fetchone() is not None
+
+    def pending(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM frontier WHERE done = 0").fetchone()[0]
+
+    # ------------------------------- catálogos -------------------------------
+
+    def add(self, kind: str, item: Any):
+        self.db.execute("INSERT INTO items (kind, data) VALUES (?, ?)",
+                        (kind, json.dumps(item, ensure_ascii=False)))
+
+    def items(self, kind: str) -> Iterator[Any]:
+        for (data,) in self.db.execute("SELECT data FROM items WHERE kind = ? ORDER BY seq", (kind,)):
+            yield json.loads(data)
+
+    def best_items(self, kind: str, key: str, field: str) -> Iterator[Any]:
+        """Una fila por valor de `key`: la de `field` más largo (ante empate, la
+        primera), en el orden de la primera aparición de cada clave."""
+        rows = self.db.execute(
+            """
+            SELECT data FROM (
+                SELECT data,
+                       MIN(seq) OVER w AS first,
+                       ROW_NUMBER() OVER (w ORDER BY length(json_extract(data, '$.' || :field)) DESC, seq) AS rn
+                FROM items WHERE kind = :kind
+                WINDOW w AS (PARTITION BY json_extract(data, '$.' || :key))
+            ) WHERE rn = 1 ORDER BY first
+            """, {"kind": kind, "key": key, "field": field})
+        for (data,) in rows:
+            yield json.loads(data)
+
+    def count(self, kind: str) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM items WHERE kind = ?", (kind,)).fetchone()[0]
+
+    # ------------------------------ checkpoints ------------------------------
+
+    def page_done(self):
+        """Llamar tras procesar cada página; confirma cada `checkpoint_every`."""
+        self._since_checkpoint += 1
+        if self._since_checkpoint >= self.checkpoint_every:
+            self.checkpoint()
+
+    def checkpoint(self):
+        self.db.commit()
+        self._since_checkpoint = 0
+
+    def finish(self):
+        """Rastreo completo: se descarta el estado."""
+        self.db.close()
+        self._remove()
+
+    def close(self):
+        """Cierra sin confirmar lo posterior al último checkpoint."""
+        self.db.close()
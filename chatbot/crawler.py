@@ -1,21 +1,19 @@
 # chatbot/crawler.py
-import time
 import xml.etree.ElementTree as ET
-from collections import deque
-from urllib.parse import urljoin, urlparse
-
-import requests
-from bs4 import BeautifulSoup
 from urllib import robotparser
+from urllib.parse import urljoin, urlparse
 
 from chatbot.config import (
     BASE_URL, USER_AGENT, HTTP_TIMEOUT, MAX_PAGINAS_RASTREO,
-    CRAWL_MAX_DEPTH, ALLOWED_DOMAINS, RESPECT_ROBOTS,
+    CRAWL_MAX_DEPTH, ALLOWED_DOMAINS, RESPECT_ROBOTS, CRAWL_RESUME,
 )
+from chatbot.crawl_state import CrawlState
+from chatbot.fetcher import Fetcher
+from chatbot.html_extract import extract
+from chatbot.http_cache import default_cache
+from chatbot.http_client import default_client
 from chatbot.url_utils import normalize_url
 
-HEADERS = {"User-Agent": USER_AGENT}
-
 
 def _allowed(url: str, rp: robotparser.RobotFileParser | None) -> bool:
     if not RESPECT_ROBOTS or rp is None:
@@ -31,13 +29,6 @@ def _is_internal(url: str) -> bool:
     return any(host.endswith(d) for d in ALLOWED_DOMAINS) or host == ""
 
 
-def _clean_text(html: str) -> str:
-    soup = BeautifulSoup(html, "html.parser")
-    for tag in soup(["script", "style", "noscript"]):
-        tag.decompose()
-    return soup.get_text(separator="\n", strip=True)
-
-
 def _discover_from_sitemap(base_url: str) -> list[str]:
     """
     Intenta leer /sitemap.xml y extraer URLs iniciales.
@@ -49,7 +40,7 @@ def _discover_from_sitemap(base_url: str) -> list[str]:
     found = []
     for s in candidates:
         try:
-            r = requests.get(s, headers=HEADERS, timeout=HTTP_TIMEOUT)
+            r = default_client().get(s, timeout=HTTP_TIMEOUT)
             if r.status_code != 200 or "xml" not in r.headers.get("Content-Type", "").lower():
                 continue
             root = ET.fromstring(r.text)
@@ -62,10 +53,13 @@ def _discover_from_sitemap(base_url: str) -> list[str]:
     return list({normalize_url(u) for u in found if u})
 
 
-def rastrear_sitio(url_inicial: str = BASE_URL, max_paginas: int = MAX_PAGINAS_RASTREO):
+def rastrear_sitio(url_inicial: str = BASE_URL, max_paginas: int = MAX_PAGINAS_RASTREO,
+                   resume: bool = CRAWL_RESUME):
     """
     Rastreo BFS con límites de profundidad y respeto de robots+sitemap.
     Devuelve lista de dicts: {"url": URL, "text": CONTENIDO}
+    Cola, visitadas y resultados viven en disco (CrawlState); con `resume`
+    un rastreo interrumpido sigue desde el último checkpoint.
     """
     dominio_base = urlparse(url_inicial).netloc.lower()
 
@@ -80,23 +74,28 @@ def rastrear_sitio(url_inicial: str = BASE_URL, max_paginas: int = MAX_PAGINAS_R
         except Exception:
             rp = None
 
-    # cola inicial: homepage + sitemap (si existe)
-    queue = deque()
-    start_urls = {normalize_url(url_inicial)}
-    start_urls.update(_discover_from_sitemap(url_inicial))
-    for u in start_urls:
-        queue.append((u, 0))
-
-    visited = set()
-    results = []
-    print(f"🌐 Inicio rastreo: {url_inicial} | seeds: {len(start_urls)}")
-
-    while queue and len(results) < max_paginas:
-        url, depth = queue.popleft()
-        url = normalize_url(url)
-        if url in visited:
-            continue
-        visited.add(url)
+    state = CrawlState("crawler", resume=resume,
+                       config={"base": url_inicial, "depth": CRAWL_MAX_DEPTH, "robots": RESPECT_ROBOTS})
+    if state.resumed:
+        print(f"⏯️ Retomando rastreo: {state.count('page')} páginas hechas, {state.pending()} en cola")
+    else:
+        # cola inicial: homepage + sitemap (si existe)
+        start_urls = {normalize_url(url_inicial)}
+        start_urls.update(_discover_from_sitemap(url_inicial))
+        for u in sorted(start_urls):
+            state.push(u, 0)
+        state.checkpoint()
+        print(f"🌐 Inicio rastreo: {url_inicial} | seeds: {len(start_urls)}")
+
+    # las páginas pasan por el almacén compartido (no se re-descargan si ya están)
+    fetcher = Fetcher(workers=1, cache=default_cache())
+    n_results = state.count("page")
+
+    while n_results < max_paginas:
+        item = state.pop()
+        if item is None:
+            break
+        url, depth = item
 
         if not _is_internal(url):
             continue
@@ -106,28 +105,31 @@ def rastrear_sitio(url_inicial: str = BASE_URL, max_paginas: int = MAX_PAGINAS_R
             continue
 
         try:
-            resp = requests.get(url, headers=HEADERS, timeout=HTTP_TIMEOUT)
+            resp, _ = fetcher.get(url)
             ctype = resp.headers.get("Content-Type", "").lower()
             if "text/html" not in ctype:
                 # omitimos aquí los binarios; los maneja document_loader.py
                 continue
-            html = resp.text
-            text = _clean_text(html)
-            results.append({"url": url, "text": text})
-            print(f"✅ [{len(results)}] {url} (d={depth})")
-
-            soup = BeautifulSoup(html, "html.parser")
-            for a in soup.find_all("a", href=True):
-                link = urljoin(url, a["href"])
+            page = extract(resp.text)   # texto y enlaces en un solo recorrido
+            state.add("page", {"url": url, "text": page.text})
+            n_results += 1
+            print(f"✅ [{n_results}] {url} (d={depth})")
+
+            for a in page.links:
+                link = urljoin(url, a.href)
                 link = normalize_url(link)
-                if link not in visited and _is_internal(link):
-                    queue.append((link, depth + 1))
+                if _is_internal(link):
+                    state.push(link, depth + 1)
 
         except Exception as e:
             print(f"⚠️ Error: {url} -> {e}")
+            continue
+        finally:
+            state.page_done()
 
-        time.sleep(0.3)  # buen ciudadano
-
+    state.checkpoint()
+    print(fetcher.client.summary())
+    results = list(state.items("page"))
+    state.finish()
     print(f"🧭 Fin rastreo. Páginas HTML extraídas: {len(results)}")
     return results
-
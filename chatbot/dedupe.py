@@ -0,0 +1,137 @@
+# chatbot/dedupe.py
+# -----------------------------------------------------------------------------
+# Casi-duplicados (SimHash) entre la extracción y la indexación
+# -----------------------------------------------------------------------------
+# - Huella: SimHash de 64 bits sobre shingles de DEDUPE_SHINGLE palabras
+#   (en minúsculas).
+# - Candidatos: la huella se parte en DEDUPE_MAX_DISTANCE + 1 bandas; dos
+#   huellas a distancia de Hamming <= DEDUPE_MAX_DISTANCE coinciden al menos en
+#   una banda (palomar), así que basta mirar los cubos de cada banda.
+# - Confirmación: el texto nuevo es duplicado solo si al menos
+#   DEDUPE_MIN_OVERLAP de sus shingles ya están en el conservado (una página
+#   con poco contenido propio y mucho menú no se pierde por parecerse).
+# Se usa en dos niveles: páginas (una representante por grupo, las demás URLs
+# quedan en `alt_sources`) y trozos (menús/pies repetidos se embeben una vez).
+# -----------------------------------------------------------------------------
+
+import hashlib
+import re
+from typing import Any, Iterator
+
+import numpy as np
+
+from chatbot.config import DEDUPE_MAX_DISTANCE, DEDUPE_MIN_OVERLAP, DEDUPE_SHINGLE
+
+BITS = 64
+
+
+def _mix(h: np.ndarray) -> np.ndarray:
+    """Finalizador de splitmix64: reparte los bits de cada hash."""
+    h = h ^ (h >> np.uint64(33))
+    h = h * np.uint64(0xFF51AFD7ED558CCD)
+    h = h ^ (h >> np.uint64(33))
+    h = h * np.uint64(0xC4CEB9FE1A85EC53)
+    return h ^ (h >> np.uint64(33))
+
+
+def shingles(text: str, size: int = DEDUPE_SHINGLE) -> np.ndarray:
+    """Hashes (uint64) de los shingles de palabras del texto, en orden.
+
+    Cada palabra distinta se hashea una vez; los shingles combinan esos
+    hashes con aritmética uint64 vectorizada (desborde = módulo 2**64).
+    """
+    words = re.findall(r"\w+", text.lower())
+    if not words:
+        return np.zeros(0, dtype=np.uint64)
+    vocab: dict[str, int] = {}
+    ids = [vocab.setdefault(w, len(vocab)) for w in words]
+    raw = b"".join(hashlib.blake2b(w.encode("utf-8"), digest_size=8).digest() for w in vocab)
+    wh = np.frombuffer(raw, dtype="<u8").astype(np.uint64)[ids]
+    size = min(size, len(words))
+    n = len(words) - size + 1
+    h = np.zeros(n, dtype=np.uint64)
+    for k in range(size):
+        h = h * np.uint64(0x9E3779B97F4A7C15) + wh[k:k + n]
+    return _mix(h)
+
+
+def simhash(hashes: np.ndarray) -> int:
+    """SimHash de 64 bits: voto por bit de los hashes de los shingles."""
+    if not len(hashes):
+        return 0
+    bits = np.unpackbits(hashes.astype("<u8").view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    votes = 2 * bits.sum(axis=0, dtype=np.int64) - len(hashes)
+    return int.from_bytes(np.packbits(votes > 0, bitorder="little").tobytes(), "little")
+
+
+class NearDupIndex:
+    """Textos conservados; `match` devuelve el payload de un casi-duplicado."""
+
+    def __init__(self, max_distance: int = DEDUPE_MAX_DISTANCE, min_overlap: float = DEDUPE_MIN_OVERLAP):
+        self.max_distance = max_distance
+        self.min_overlap = min_overlap
+        nb = max_distance + 1
+        edges = [round(i * BITS / nb) for i in range(nb + 1)]
+        self._bands = [(lo, (1 << (hi - lo)) - 1) for lo, hi in zip(edges, edges[1:])]
+        self._buckets: list[dict[int, list[int]]] = [{} for _ in self._bands]
+        self._entries: list[tuple[int, np.ndarray, Any]] = []   # (huella, shingles únicos, payload)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _candidates(self, fp: int) -> Iterator[int]:
+        seen = set()
+        for (lo, mask), buckets in zip(self._bands, self._buckets):
+            for i in buckets.get((fp >> lo) & mask, ()):
+                if i not in seen:
+                    seen.add(i)
+                    yield i
+
+    def match(self, text: str) -> Any | None:
+        return self._match(shingles(text))[0]
+
+    def _match(self, sh: np.ndarray) -> tuple[Any | None, int, np.ndarray]:
+        uniq = np.unique(sh)
+        if not len(uniq):
+            return None, 0, uniq
+        fp = simhash(sh)
+        for i in sorted(self._candidates(fp)):
+            other_fp, other, payload = self._entries[i]
+            if (fp ^ other_fp).bit_count() > self.max_distance:
+                continue
+            if np.isin(uniq, other, assume_unique=True).mean() >= self.min_overlap:
+                return payload, fp, uniq
+        return None, fp, uniq
+
+    def add(self, text: str, payload: Any):
+        sh = shingles(text)
+        self._add(simhash(sh), np.unique(sh), payload)
+
+    def _add(self, fp: int, uniq: np.ndarray, payload: Any):
+        if not len(uniq):
+            return
+        i = len(self._entries)
+        self._entries.append((fp, uniq, payload))
+        for (lo, mask), buckets in zip(self._bands, self._buckets):
+            buckets.setdefault((fp >> lo) & mask, []).append(i)
+
+    def match_or_add(self, text: str, payload: Any) -> Any | None:
+        """Payload del casi-duplicado ya conservado, o None (y el texto queda conservado)."""
+        found, fp, uniq = self._match(shingles(text))
+        if found is None:
+            self._add(fp, uniq, payload)
+        return found
+
+
+def cluster(items: list[tuple[str, str]]) -> dict[str, str]:
+    """{clave duplicada: clave representante} para [(clave, texto)] en orden.
+
+    La representante de cada grupo es la primera que aparece.
+    """
+    index = NearDupIndex()
+    dup_of = {}
+    for key, text in items:
+        rep = index.match_or_add(text, key)
+        if rep is not None:
+            dup_of[key] = rep
+    return dup_of
@@ -0,0 +1,182 @@
+# chatbot/doc_download.py
+# -----------------------------------------------------------------------------
+# Descarga de documentos en streaming: tope de tamaño, reanudación, validadores
+# -----------------------------------------------------------------------------
+# - El cuerpo se escribe por bloques (DOC_DOWNLOAD_CHUNK) en "<destino>.part":
+#   la memoria no crece con el tamaño del archivo. Se corta en cuanto se pasa
+#   de MAX_DOC_BYTES (antes de leer nada si llega Content-Length; si no, al
+#   cruzar el tope).
+# - Transferencia interrumpida: el .part se conserva y se continúa con
+#   Range + If-Range (ETag fuerte o Last-Modified). Si el archivo cambió en el
+#   servidor llega un 200 completo y se empieza de cero. En la misma llamada
+#   se reintenta así hasta FETCH_RETRIES veces; si no, en la próxima corrida.
+# - Archivo ya descargado: If-None-Match / If-Modified-Since; un 304 no baja
+#   nada.
+# - Al terminar: os.replace(.part → destino). Quien lee el directorio ve el
+#   archivo anterior o el nuevo completo, nunca uno a medias.
+# Validadores por URL en DOC_DOWNLOAD_STATE_DIR/<sha1(url)>.json.
+# -----------------------------------------------------------------------------
+
+import hashlib
+import json
+import os
+import re
+
+import requests
+
+from chatbot.config import DOC_DOWNLOAD_CHUNK, DOC_DOWNLOAD_STATE_DIR, FETCH_RETRIES, MAX_DOC_BYTES
+from chatbot.http_client import HttpClient, default_client
+
+
+class DownloadRejected(Exception):
+    """La respuesta no se guarda: pasa del tope de tamaño o no es un documento."""
+
+
+class IncompleteDownload(Exception):
+    """El cuerpo llegó incompleto o el rango no cuadra; se puede reintentar."""
+
+
+RESUMABLE = (IncompleteDownload, requests.exceptions.ChunkedEncodingError,
+             requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+
+# ================================== estado ==================================
+
+def _state_path(url: str, state_dir: str) -> str:
+    return os.path.join(state_dir, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".json")
+
+
+def _load_state(url: str, state_dir: str) -> dict:
+    try:
+        with open(_state_path(url, state_dir), "r", encoding="utf-8") as f:
+            st = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return st if st.get("url") == url else {}
+
+
+def _save_state(url: str, st: dict, state_dir: str):
+    path = _state_path(url, state_dir)
+    os.makedirs(state_dir, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({**st, "url": url}, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _validators(r) -> dict:
+    v = {"etag": r.headers.get("ETag"), "last_modified": r.headers.get("Last-Modified")}
+    return {k: x for k, x in v.items() if x}
+
+
+def _if_range(v: dict | None) -> str | None:
+    """Validador para If-Range (solo sirve un ETag fuerte o la fecha)."""
+    if not v:
+        return None
+    etag = v.get("etag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return v.get("last_modified")
+
+
+def _drop(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+# ================================= descarga =================================
+
+def _attempt(url: str, dest: str, st: dict, client: HttpClient, max_bytes: int,
+             content_types, state_dir: str) -> str:
+    part = dest + ".part"
+    # sin compresión: Range y Content-Length cuentan los bytes del archivo
+    headers = {"Accept-Encoding": "identity"}
+    offset = os.path.getsize(part) if os.path.exists(part) else 0
+    validator = _if_range(st.get("part"))
+    if offset and validator:
+        headers["Range"] = f"bytes={offset}-"
+        headers["If-Range"] = validator
+    elif offset:
+        _drop(part)
+        offset = 0
+    had = os.path.exists(dest)
+    done = st.get("done") or {}
+    if had and st.get("size") == os.path.getsize(dest):
+        if done.get("etag"):
+            headers["If-None-Match"] = done["etag"]
+        if done.get("last_modified"):
+            headers["If-Modified-Since"] = done["last_modified"]
+
+    r, _ = client.request("GET", url, headers=headers, stream=True)
+    with r:
+        if r.status_code == 304:
+            _drop(part)
+            if st.pop("part", None) is not None:
+                _save_state(url, st, state_dir)
+            return "sin cambios"
+        if r.status_code == 416:   # el .part no corresponde a lo que hay en el servidor
+            _drop(part)
+            raise IncompleteDownload("rango no satisfacible")
+        r.raise_for_status()
+        ctype = r.headers.get("Content-Type", "").lower()
+        if content_types and not any(ct in ctype for ct in content_types):
+            raise DownloadRejected(f"tipo {ctype or 'desconocido'}")
+
+        if r.status_code == 206:
+            m = re.match(r"bytes (\d+)-", r.headers.get("Content-Range", ""))
+            if not m or int(m.group(1)) != offset:
+                _drop(part)
+                raise IncompleteDownload("Content-Range no coincide")
+            mode = "ab"
+        else:
+            offset, mode = 0, "wb"
+        length = r.headers.get("Content-Length", "")
+        expected = offset + int(length) if length.isdigit() else None
+        if expected is not None and expected > max_bytes:
+            _drop(part)
+            raise DownloadRejected(f"{expected / 1e6:.1f} MB > {max_bytes / 1e6:.1f} MB")
+
+        st["part"] = _validators(r)
+        _save_state(url, st, state_dir)
+        os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+        written, too_big = offset, False
+        with open(part, mode) as f:
+            for block in r.iter_content(DOC_DOWNLOAD_CHUNK):
+                written += len(block)
+                if written > max_bytes:
+                    too_big = True
+                    break
+                f.write(block)
+        if too_big:
+            _drop(part)
+            raise DownloadRejected(f"más de {max_bytes / 1e6:.1f} MB")
+        if expected is not None and written != expected:
+            raise IncompleteDownload(f"{written} de {expected} bytes")
+
+    os.replace(part, dest)
+    st.clear()
+    st.update({"done": _validators(r), "size": written})
+    _save_state(url, st, state_dir)
+    return "actualizado" if had else "nuevo"
+
+
+def download(url: str, dest: str, client: HttpClient | None = None, max_bytes: int = MAX_DOC_BYTES,
+             content_types: tuple[str, ...] | None = None, retries: int = FETCH_RETRIES,
+             state_dir: str = DOC_DOWNLOAD_STATE_DIR) -> str:
+    """Descarga `url` en `dest`: "nuevo" | "actualizado" | "sin cambios".
+
+    Lanza DownloadRejected (tamaño/tipo) o, agotados los reintentos, el error
+    de red; en ese caso el .part queda para reanudar.
+    """
+    client = client or default_client()
+    st = _load_state(url, state_dir)
+    attempt = 0
+    while True:
+        try:
+            return _attempt(url, dest, st, client, max_bytes, content_types, state_dir)
+        except RESUMABLE:
+            attempt += 1
+            if attempt > retries:
+                raise
@@ -0,0 +1,263 @@
+# chatbot/doc_extract.py
+# -----------------------------------------------------------------------------
+# Texto y tablas de documentos (PDF / XLSX / XLS) en procesos aparte + caché
+# -----------------------------------------------------------------------------
+# - Hasta DOC_EXTRACT_WORKERS procesos (forkserver) que reciben un archivo a
+#   la vez: un PDF patológico no bloquea ni tumba la reindexación. Cada hijo
+#   corre con RLIMIT_AS = DOC_EXTRACT_MAX_MEMORY; si un archivo pasa de
+#   DOC_EXTRACT_TIMEOUT segundos se mata ese proceso y se arranca otro.
+# - Caché en disco por hash (sha256) del CONTENIDO del archivo:
+#     data/cache/doc_text/<ab>/<sha256>.json.z   resultado (JSON, zlib)
+#   Un archivo sin cambios no se vuelve a parsear. Los fallos también se
+#   guardan (con los límites usados): con los mismos límites no se reintentan.
+#   Si falta una librería (pypdf, openpyxl, xlrd; en requirements.txt) no se
+#   guarda nada: al instalarla se extrae en la siguiente corrida.
+# - Tablas: cada fila de una hoja de cálculo es una línea "celda | celda | …"
+#   bajo "Hoja: <nombre>"; en los PDF las tablas salen como texto por página.
+# -----------------------------------------------------------------------------
+
+import datetime
+import hashlib
+import json
+import multiprocessing as mp
+import os
+import time
+import zlib
+from collections import deque
+from multiprocessing.connection import wait
+
+try:
+    import resource
+except ImportError:   # Windows: sin límite de memoria por proceso
+    resource = None
+
+from chatbot.config import (
+    DOC_EXTRACT_CACHE_DIR, DOC_EXTRACT_MAX_MEMORY, DOC_EXTRACT_TIMEOUT, DOC_EXTRACT_WORKERS,
+)
+
+EXTRACT_VERSION = 1   # cambiar si cambia lo que extraen los parsers (invalida la caché)
+SUPPORTED = (".pdf", ".xlsx", ".xls")
+
+
+# =========================== parsers (en el hijo) ============================
+
+def _cell(v) -> str:
+    if v is None:
+        return ""
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    if isinstance(v, (datetime.datetime, datetime.date)):
+        return v.strftime("%Y-%m-%d")
+    return " ".join(str(v).split())
+
+
+def _row(values) -> str:
+    return " | ".join(c for c in (_cell(v) for v in values) if c)
+
+
+def _pdf(path: str) -> dict:
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    pages = [(p.extract_text() or "").strip() for p in reader.pages]
+    return {"text": "\n\n".join(t for t in pages if t), "pages": len(pages)}
+
+
+def _xlsx(path: str) -> dict:
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        parts = []
+        for ws in wb.worksheets:
+            lines = [line for line in (_row(r) for r in ws.iter_rows(values_only=True)) if line]
+            if lines:
+                parts.append(f"Hoja: {ws.title}\n" + "\n".join(lines))
+        return {"text": "\n\n".join(parts), "sheets": len(wb.worksheets)}
+    finally:
+        wb.close()
+
+
+def _xls(path: str) -> dict:
+    import xlrd
+
+    book = xlrd.open_workbook(path, on_demand=True)
+    try:
+        parts = []
+        for sh in book.sheets():
+            lines = []
+            for r in range(sh.nrows):
+                values = []
+                for c in sh.row(r):
+                    if c.ctype == xlrd.XL_CELL_DATE:
+                        values.append(xlrd.xldate.xldate_as_datetime(c.value, book.datemode))
+                    else:
+                        values.append(c.value)
+                line = _row(values)
+                if line:
+                    lines.append(line)
+            if lines:
+                parts.append(f"Hoja: {sh.name}\n" + "\n".join(lines))
+        return {"text": "\n\n".join(parts), "sheets": book.nsheets}
+    finally:
+        book.release_resources()
+
+
+_PARSERS = {".pdf": _pdf, ".xlsx": _xlsx, ".xls": _xls}
+
+
+def _parse(path: str) -> dict:
+    ext = os.path.splitext(path)[1].lower()
+    try:
+        return {"ok": True, **_PARSERS[ext](path)}
+    except ImportError as e:
+        return {"ok": False, "missing": e.name, "error": f"falta {e.name}"}
+    except MemoryError:
+        return {"ok": False, "error": "memoria excedida"}
+    except Exception as e:
+        return {"ok": False, "error": f"{type(e).__name__}: {e}"[:300]}
+
+
+def _worker(conn, max_memory: int):
+    """Bucle del proceso hijo: ruta → resultado, hasta recibir None."""
+    if resource is not None and max_memory:
+        resource.setrlimit(resource.RLIMIT_AS, (max_memory, max_memory))
+    while True:
+        path = conn.recv()
+        if path is None:
+            break
+        conn.send(_parse(path))
+    conn.close()
+
+
+# ================================== caché ===================================
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class ExtractCache:
+    def __init__(self, root: str = DOC_EXTRACT_CACHE_DIR):
+        self.root = root
+
+    def _path(self, sha: str) -> str:
+        return os.path.join(self.root, sha[:2], sha + ".json.z")
+
+    def get(self, sha: str) -> dict | None:
+        try:
+            with open(self._path(sha), "rb") as f:
+                entry = json.loads(zlib.decompress(f.read()))
+        except (OSError, ValueError, zlib.error):
+            return None
+        return entry if entry.get("v") == EXTRACT_VERSION else None
+
+    def put(self, sha: str, result: dict):
+        path = self._path(sha)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(zlib.compress(json.dumps({**result, "v": EXTRACT_VERSION}, ensure_ascii=False).encode("utf-8"), 6))
+        os.replace(tmp, path)
+
+
+# ================================ extracción ================================
+
+def _context():
+    methods = mp.get_all_start_methods()
+    return mp.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def extract_files(paths: list[str], workers: int = DOC_EXTRACT_WORKERS,
+                  timeout: float = DOC_EXTRACT_TIMEOUT, max_memory: int = DOC_EXTRACT_MAX_MEMORY,
+                  cache: ExtractCache | None = None) -> dict[str, dict]:
+    """{ruta: {"ok", "text", … | "error"}} para cada archivo soportado de `paths`."""
+    cache = cache or ExtractCache()
+    workers = workers or os.cpu_count() or 1
+    limits = [timeout, max_memory]
+    t0 = time.perf_counter()
+    results, todo = {}, deque()
+    counts = {"cache": 0, "parsed": 0, "errors": 0, "timeouts": 0}
+    for path in paths:
+        if os.path.splitext(path)[1].lower() not in _PARSERS:
+            continue
+        sha = file_sha256(path)
+        hit = cache.get(sha)
+        if hit is not None and (hit["ok"] or hit.get("limits") == limits):
+            results[path] = hit
+            counts["cache"] += 1
+        else:
+            todo.append((path, sha))
+
+    ctx = _context()
+    idle = []      # (proceso, conexión) libres
+    busy = {}      # conexión → (proceso, ruta, sha, límite de tiempo)
+    missing = set()
+
+    def spawn():
+        parent, child = ctx.Pipe()
+        proc = ctx.Process(target=_worker, args=(child, max_memory), daemon=True)
+        proc.start()
+        child.close()
+        return proc, parent
+
+    def retire(proc, conn):
+        proc.kill()
+        proc.join(5)
+        conn.close()
+
+    try:
+        while todo or busy:
+            while todo and len(busy) < workers:
+                path, sha = todo.popleft()
+                proc, conn = idle.pop() if idle else spawn()
+                conn.send(path)
+                busy[conn] = (proc, path, sha, time.monotonic() + timeout)
+
+            next_deadline = min(d for _, _, _, d in busy.values())
+            for conn in wait(list(busy), timeout=max(0.0, next_deadline - time.monotonic())):
+                proc, path, sha, _ = busy.pop(conn)
+                try:
+                    result = conn.recv()
+                    idle.append((proc, conn))
+                except EOFError:   # el hijo murió (p. ej. por el límite de memoria)
+                    retire(proc, conn)
+                    result = {"ok": False, "error": f"el proceso terminó sin resultado (código {proc.exitcode})"}
+                if result.get("missing"):
+                    missing.add(result["missing"])
+                else:
+                    if not result["ok"]:
+                        result["limits"] = limits
+                    cache.put(sha, result)
+                counts["parsed" if result["ok"] else "errors"] += 1
+                results[path] = result
+
+            now = time.monotonic()
+            for conn, (proc, path, sha, deadline) in list(busy.items()):
+                if deadline <= now:
+                    del busy[conn]
+                    retire(proc, conn)
+                    result = {"ok": False, "error": f"tiempo agotado ({timeout:g}s)", "limits": limits}
+                    cache.put(sha, result)
+                    counts["timeouts"] += 1
+                    results[path] = result
+    finally:
+        for proc, conn in idle:
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+            conn.close()
+            proc.join(5)
+        for conn, (proc, *_rest) in busy.items():
+            retire(proc, conn)
+
+    print(f"📑 Documentos: {len(results)} archivos en {time.perf_counter() - t0:.1f}s "
+          f"({counts['cache']} desde caché, {counts['parsed']} procesados, {counts['errors']} con error, "
+          f"{counts['timeouts']} por tiempo) | hasta {workers} procesos")
+    if missing:
+        print(f"ℹ️ Para extraer todos los tipos instala: pip install {' '.join(sorted(missing))}")
+    return results
@@ -1,18 +1,21 @@
 # chatbot/document_loader.py
 import os
 from pathlib import Path
-from urllib.parse import urljoin, urlparse
+from urllib.parse import unquote, urljoin, urlparse
 
-import requests
-from bs4 import BeautifulSoup
-from llama_index.core import SimpleDirectoryReader
+from llama_index.core.schema import Document
 
+from chatbot import catalog
 from chatbot.config import (
-    BASE_URL, USER_AGENT, TMP_DOC_DIR, MAX_DOCUMENTOS_BUSQUEDA,
-    HTTP_TIMEOUT, MAX_DOC_BYTES, ALLOWED_DOMAINS
+    BASE_URL, TMP_DOC_DIR, MAX_DOCUMENTOS_BUSQUEDA,
+    ALLOWED_DOMAINS, DOC_CATALOG_PATH, DOCS_DIR
 )
+from chatbot.doc_download import DownloadRejected, download
+from chatbot.doc_extract import SUPPORTED, extract_files
+from chatbot.fetcher import Fetcher
+from chatbot.html_extract import extract
+from chatbot.http_cache import default_cache
 
-HEADERS = {"User-Agent": USER_AGENT}
 VALID_CT = (
     "application/pdf",
     "application/vnd.openxmlformats-officedocument",
@@ -28,28 +31,19 @@ def _looks_doc_by_ext(url: str) -> bool:
     u = url.lower()
     return u.endswith((".pdf", ".docx", ".xlsx", ".xls", ".doc"))
 
-def _head_ok(url: str) -> bool:
-    try:
-        r = requests.head(url, headers=HEADERS, timeout=HTTP_TIMEOUT, allow_redirects=True)
-        if int(r.headers.get("Content-Length", "0")) > MAX_DOC_BYTES:
-            return False
-        ctype = r.headers.get("Content-Type", "").lower()
-        return any(ct in ctype for ct in VALID_CT)
-    except Exception:
-        return False
-
-def _download(url: str, destino: str):
-    r = requests.get(url, headers=HEADERS, timeout=HTTP_TIMEOUT, allow_redirects=True)
-    r.raise_for_status()
-    if int(r.headers.get("Content-Length", "0")) > MAX_DOC_BYTES:
-        raise RuntimeError("archivo demasiado grande")
-    with open(destino, "wb") as f:
-        f.write(r.content)
-    print(f"📄 Descargado: {url}")
+def _download(url: str, destino: str) -> str:
+    # en streaming, con tope, reanudable y condicional (chatbot/doc_download.py);
+    # tipo y tamaño se validan con las cabeceras del propio GET (sin HEAD previo)
+    estado = download(url, destino, content_types=VALID_CT)
+    if estado != "sin cambios":
+        print(f"📄 Descargado ({estado}): {url}")
+    return estado
 
 def _discover_docs(max_docs: int = MAX_DOCUMENTOS_BUSQUEDA):
     print("🔍 Descubriendo documentos enlazados…")
     encontrados, visitadas, por_visitar = set(), set(), [BASE_URL]
+    # páginas HTML desde el almacén compartido (mapeo/indexación ya las bajaron)
+    fetcher = Fetcher(workers=1, cache=default_cache())
 
     while por_visitar and len(encontrados) < max_docs:
         url = por_visitar.pop(0)
@@ -57,14 +51,13 @@ def _discover_docs(max_docs: int = MAX_DOCUMENTOS_BUSQUEDA):
             continue
         visitadas.add(url)
         try:
-            r = requests.get(url, headers=HEADERS, timeout=HTTP_TIMEOUT)
+            r, _ = fetcher.get(url)
             r.raise_for_status()
-            soup = BeautifulSoup(r.text, "html.parser")
-            for a in soup.find_all("a", href=True):
-                link = urljoin(url, a["href"].split("#")[0])
+            for a in extract(r.text).links:
+                link = urljoin(url, a.href.split("#")[0])
                 if not _is_internal(link):
                     continue
-                if _looks_doc_by_ext(link) and _head_ok(link):
+                if _looks_doc_by_ext(link):
                     encontrados.add(link)
                 else:
                     if link not in visitadas:
@@ -78,22 +71,78 @@ def _discover_docs(max_docs: int = MAX_DOCUMENTOS_BUSQUEDA):
 def cargar_documentos_web():
     Path(TMP_DOC_DIR).mkdir(parents=True, exist_ok=True)
     urls = _discover_docs()
-    rutas = []
+    rutas, sin_cambios = [], 0
 
     for url in urls:
-        nombre = url.split("/")[-1].split("?")[0]
+        nombre = os.path.basename(unquote(urlparse(url).path))
         ruta = os.path.join(TMP_DOC_DIR, nombre)
-        if not os.path.exists(ruta):
-            try:
-                _download(url, ruta)
-            except Exception as e:
-                print(f"⚠️ No se pudo descargar {url}: {e}")
+        try:
+            sin_cambios += _download(url, ruta) == "sin cambios"
+        except DownloadRejected as e:
+            print(f"⏭️ Omitido {url}: {e}")
+            continue
+        except Exception as e:
+            print(f"⚠️ No se pudo descargar {url}: {e}")
+            if not os.path.exists(ruta):
                 continue
         rutas.append(ruta)
+    print(f"📥 Documentos: {len(rutas)} en disco ({sin_cambios} sin cambios en el servidor)")
 
     if rutas:
         print("📚 Procesando documentos descargados…")
-        return SimpleDirectoryReader(TMP_DOC_DIR).load_data()
+        return cargar_documentos_locales(TMP_DOC_DIR)
 
     print("ℹ️ No hay documentos para procesar.")
     return []
+
+def doc_urls() -> dict[str, str]:
+    """{nombre de archivo: URL publicada} según el catálogo de documentos."""
+    urls = {}
+    if catalog.exists(DOC_CATALOG_PATH):
+        for it in catalog.iter_items(DOC_CATALOG_PATH):
+            url = it.get("doc_url", "")
+            if url:
+                urls.setdefault(os.path.basename(unquote(urlparse(url).path)), url)
+    return urls
+
+def cargar_documentos_locales(directorio: str = DOCS_DIR, excluir: set[str] = frozenset()) -> list[Document]:
+    """Un Document (kind="documento") por archivo PDF/XLS/XLSX con texto.
+
+    `excluir`: nombres de archivo que no se indexan como texto (p. ej. las
+    hojas del PAA, que van al almacén columnar de chatbot/paa_store.py).
+
+    La extracción corre en procesos aparte con tiempo y memoria acotados y se
+    guarda por hash del archivo (chatbot/doc_extract.py). `source` es la URL
+    del documento en el sitio si está en el catálogo; si no, la ruta local.
+    """
+    if not directorio or not os.path.isdir(directorio):
+        return []
+    rutas = sorted(
+        os.path.join(directorio, n) for n in os.listdir(directorio)
+        if n.lower().endswith(SUPPORTED) and n not in excluir
+    )
+    resultados = extract_files(rutas)
+    urls = doc_urls()
+
+    docs, fallidos = [], []
+    for ruta in rutas:
+        r = resultados.get(ruta)
+        nombre = os.path.basename(ruta)
+        if not r or not r["ok"]:
+            fallidos.append(f"{nombre}: {r['error'] if r else 'sin resultado'}")
+            continue
+        if not r["text"].strip():
+            fallidos.append(f"{nombre}: sin texto (¿escaneado?)")
+            continue
+        docs.append(Document(
+            text=r["text"],
+            metadata={
+                "source": urls.get(nombre, ruta.replace(os.sep, "/")),
+                "kind": "documento",
+                "file_name": nombre,
+            },
+        ))
+    for f in fallidos:
+        print(f"⚠️ Documento sin indexar → {f}")
+    print(f"📚 Documentos con texto: {len(docs)} de {len(rutas)}")
+    return docs
@@ -0,0 +1,123 @@
+# chatbot/embed_batcher.py
+# -----------------------------------------------------------------------------
+# Micro-batching de embeddings de consultas
+# -----------------------------------------------------------------------------
+# Con varias preguntas a la vez, cada hilo hacía su propio forward de UNA frase.
+# Aquí los hilos dejan sus textos en una cola; un único hilo despachador junta
+# lo que llega durante `window_ms` (o hasta `max_batch` textos), hace UN encode
+# batch y reparte cada vector a quien lo pidió. Textos repetidos en la misma
+# tanda se embeben una sola vez.
+#   window_ms = 0  → sin espera: se agrupa solo lo que se acumuló mientras el
+#                    encoder estaba ocupado (latencia mínima con poca carga).
+# -----------------------------------------------------------------------------
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Sequence
+
+
+class EmbeddingBatcher:
+    """Agrupa llamadas concurrentes a `encode(texts) -> vectores`."""
+
+    def __init__(self, encode: Callable[[list[str]], Sequence], max_batch: int = 32,
+                 window_ms: float = 5.0):
+        self._encode = encode
+        self.max_batch = max(1, int(max_batch))
+        self.window = max(0.0, window_ms) / 1e3
+        self._queue: "queue.Queue[tuple[list[str], Future]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._batches = 0
+        self._texts = 0
+        self._callers = 0
+        self._max_batch_seen = 0
+        self._max_queue = 0
+        self._wait_s = 0.0
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="embed-batcher", daemon=True)
+                    self._thread.start()
+
+    def embed(self, texts: list[str]) -> list:
+        """Vectores de `texts` (bloquea hasta que su tanda se procese)."""
+        if not texts:
+            return []
+        self._ensure_thread()
+        fut: Future = Future()
+        self._queue.put((list(texts), fut))
+        depth = self._queue.qsize()
+        if depth > self._max_queue:
+            self._max_queue = depth
+        return fut.result()
+
+    # ------------------------------ despachador ------------------------------
+
+    def _collect(self) -> list[tuple[list[str], Future, float]]:
+        texts, fut = self._queue.get()
+        t0 = time.perf_counter()
+        pending = [(texts, fut, t0)]
+        n = len(texts)
+        deadline = t0 + self.window
+        while n < self.max_batch:
+            try:
+                if self.window:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    texts, fut = self._queue.get(timeout=remaining)
+                else:
+                    texts, fut = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            pending.append((texts, fut, time.perf_counter()))
+            n += len(texts)
+        return pending
+
+    def _run(self):
+        while True:
+            pending = self._collect()
+            unique: dict[str, int] = {}
+            for texts, _, _ in pending:
+                for t in texts:
+                    unique.setdefault(t, len(unique))
+            # cualquier error (del encoder o de su salida) va a quienes esperan;
+            # el despachador sigue vivo para las tandas siguientes
+            try:
+                vectors = list(self._encode(list(unique)))
+                if len(vectors) != len(unique):
+                    raise ValueError(f"el encoder devolvió {len(vectors)} vectores para {len(unique)} textos")
+                results = [[vectors[unique[t]] for t in texts] for texts, _, _ in pending]
+            except BaseException as e:
+                for _, fut, _ in pending:
+                    fut.set_exception(e)
+                continue
+            done = time.perf_counter()
+            with self._lock:
+                self._batches += 1
+                self._texts += len(unique)
+                self._callers += len(pending)
+                self._max_batch_seen = max(self._max_batch_seen, len(unique))
+                self._wait_s += sum(done - t for _, _, t in pending)
+            for (_, fut, _), result in zip(pending, results):
+                fut.set_result(result)
+
+    # -------------------------------- métricas -------------------------------
+
+    def stats(self) -> dict:
+        with self._lock:
+            b = self._batches
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self._max_queue,
+                "batches": b,
+                "texts": self._texts,
+                "callers": self._callers,
+                "avg_batch_size": (self._texts / b) if b else 0.0,
+                "max_batch_size": self._max_batch_seen,
+                "avg_latency_ms": (1e3 * self._wait_s / self._callers) if self._callers else 0.0,
+            }
@@ -0,0 +1,168 @@
+# chatbot/embedding_cache.py
+# -----------------------------------------------------------------------------
+# Caché LRU acotada de embeddings de CONSULTAS (opcionalmente persistente)
+# -----------------------------------------------------------------------------
+# - Clave: texto normalizado (_norm). all-MiniLM-L6-v2 usa un tokenizer
+#   "uncased" que ya quita tildes y mayúsculas, así que "Horario de Atención"
+#   y "horario de atencion" producen el mismo vector.
+# - Tope por número de entradas y/o bytes; se expulsa la menos usada.
+# - Persistencia en .npz (claves + matriz float32 + nombre del modelo).
+#   Si cambia EMBEDDING_MODEL, el archivo se descarta al cargar.
+# - Se guarda durante la ejecución (cada `save_every` entradas nuevas o
+#   `save_interval` segundos con alguna nueva), no solo al salir: un worker
+#   que termina con os._exit o un SIGKILL pierde a lo sumo lo último.
+# - Varios procesos (QA_EXECUTOR="process") comparten el archivo: al guardar
+#   se toma un lock (<ruta>.lock), se une lo que ya hay en disco con lo de este
+#   proceso (lo de disco cuenta como menos reciente), se recorta al tope y se
+#   publica con os.replace. Nadie pisa lo que aprendieron los demás.
+# -----------------------------------------------------------------------------
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:   # Windows: sin lock entre procesos
+    fcntl = None
+
+
+class QueryEmbeddingCache:
+    """LRU de embeddings con contadores de aciertos/fallos."""
+
+    def __init__(self, model_name: str, max_entries: int = 4096,
+                 max_bytes: int = 0, path: str = "", save_every: int = 0,
+                 save_interval: float = 0.0):
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.path = path
+        self.save_every = save_every
+        self.save_interval = save_interval
+        self._unsaved = 0
+        self._saved_at = time.monotonic()
+        self._save_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._bytes = 0
+        self._dirty = False
+        self._lock = threading.Lock()
+        if path:
+            self.load()
+
+    @staticmethod
+    def _size(key: str, vec: np.ndarray) -> int:
+        return vec.nbytes + len(key.encode("utf-8"))
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> list[float] | None:
+        with self._lock:
+            vec = self._data.get(key)
+            if vec is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return vec.tolist()
+
+    def put(self, key: str, embedding) -> None:
+        vec = np.asarray(embedding, dtype=np.float32)
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= self._size(key, old)
+            self._data[key] = vec
+            self._bytes += self._size(key, vec)
+            self._dirty = True
+            self._unsaved += 1
+            self._evict()
+            due = self.path and (
+                (self.save_every and self._unsaved >= self.save_every)
+                or (self.save_interval and time.monotonic() - self._saved_at >= self.save_interval))
+        if due:
+            self.save(blocking=False)
+
+    def _evict(self) -> None:
+        while self._data and (
+            (self.max_entries and len(self._data) > self.max_entries)
+            or (self.max_bytes and self._bytes > self.max_bytes)
+        ):
+            k, v = self._data.popitem(last=False)
+            self._bytes -= self._size(k, v)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
+
+    # ------------------------------ persistencia -----------------------------
+
+    def _read_file(self) -> tuple[list[str], np.ndarray]:
+        """(claves, vectores) del archivo, de la menos a la más reciente."""
+        if not self.path or not os.path.exists(self.path):
+            return [], np.zeros((0, 0), np.float32)
+        try:
+            with np.load(self.path, allow_pickle=False) as z:
+                if str(z["model"]) != self.model_name:
+                    print(f"ℹ️ Caché de consultas descartada (modelo distinto: {z['model']})")
+                    return [], np.zeros((0, 0), np.float32)
+                return z["keys"].tolist(), z["vectors"]
+        except Exception as e:
+            print(f"⚠️ No se pudo leer la caché de consultas: {e}")
+            return [], np.zeros((0, 0), np.float32)
+
+    def _merge_older(self, keys: list[str], vectors: np.ndarray) -> None:
+        """Agrega (con el lock tomado) las claves que faltan como las menos recientes."""
+        older = OrderedDict()
+        for k, v in zip(keys, vectors):
+            if k not in self._data:
+                older[k] = np.array(v, dtype=np.float32)
+                self._bytes += self._size(k, older[k])
+        older.update(self._data)
+        self._data = older
+        self._evict()
+
+    def load(self) -> None:
+        """Carga el archivo si existe y corresponde al mismo modelo."""
+        keys, vectors = self._read_file()
+        with self._lock:
+            self._merge_older(keys, vectors)
+
+    def save(self, blocking: bool = True) -> None:
+        """Une con lo que hay en disco y publica (tmp + replace) si hubo cambios.
+
+        `blocking=False`: si otro hilo ya está guardando, no espera.
+        """
+        if not self.path or not self._dirty:
+            return
+        if not self._save_lock.acquire(blocking=blocking):
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path + ".lock", "a") as lock:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                disk_keys, disk_vectors = self._read_file()
+                with self._lock:
+                    self._merge_older(disk_keys, disk_vectors)
+                    keys = list(self._data.keys())
+                    vectors = np.stack(list(self._data.values())) if keys else np.zeros((0, 0), np.float32)
+                    self._dirty = False
+                    self._unsaved = 0
+                    self._saved_at = time.monotonic()
+                tmp = f"{self.path}.{os.getpid()}.tmp.npz"   # un .tmp por proceso (QA_EXECUTOR="process")
+                np.savez(tmp, model=np.array(self.model_name), keys=np.array(keys, dtype=str), vectors=vectors)
+                os.replace(tmp, self.path)
+        finally:
+            self._save_lock.release()
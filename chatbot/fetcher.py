@@ -0,0 +1,100 @@
+# chatbot/fetcher.py
+# -----------------------------------------------------------------------------
+# Descarga concurrente y "educada" de muchas URLs (mapeo desde routes.txt)
+# -----------------------------------------------------------------------------
+# - Pool de hilos (límite global); límites por host, ritmo adaptativo,
+#   reintentos y keep-alive los pone el cliente HTTP (chatbot/http_client.py).
+# - `map()` devuelve los resultados en el MISMO orden de entrada, así que los
+#   catálogos quedan idénticos a los del recorrido secuencial.
+# - Con `cache` (HttpCache) las peticiones son condicionales y, con `cache_ns`,
+#   el resultado de `handle` se reutiliza si el cuerpo no cambió.
+# -----------------------------------------------------------------------------
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import requests
+
+from chatbot.config import FETCH_WORKERS
+from chatbot.http_cache import HttpCache
+from chatbot.http_client import HttpClient, default_client
+
+
+@dataclass
+class FetchResult:
+    url: str
+    value: Any = None               # lo que devolvió `handle(url, response)`
+    error: Exception | None = None  # excepción final (tras reintentos)
+    attempts: int = 0
+
+
+class Fetcher:
+    """Pool de hilos sobre un HttpClient (el compartido, salvo que se pidan
+    límites propios: per_host, rate, burst, retries, backoff, timeout…)."""
+
+    def __init__(self, workers: int = FETCH_WORKERS, cache: HttpCache | None = None,
+                 client: HttpClient | None = None, **client_opts):
+        self.workers = max(1, workers)
+        self.cache = cache
+        if client is None:
+            client = HttpClient(pool_size=self.workers, **client_opts) if client_opts else default_client()
+        self.client = client
+        self._lock = threading.Lock()
+        self.errors = 0
+
+    @property
+    def stats(self) -> dict:
+        """Métricas del cliente HTTP + errores de `map()`."""
+        return {**self.client.stats(), "map_errors": self.errors}
+
+    def get(self, url: str) -> tuple[requests.Response, int]:
+        """GET con límites, reintentos y caché. Devuelve (respuesta, intentos)."""
+        meta = self.cache.lookup(url) if self.cache else None
+        if self.cache:
+            cached = self.cache.fresh_response(url, meta)
+            if cached is not None:
+                return cached, 0
+        r, attempts = self.client.request("GET", url, headers=HttpCache.conditional_headers(meta))
+        if self.cache:
+            r = self.cache.update(url, r, meta)
+        return r, attempts
+
+    def map(self, urls: list[str], handle: Callable[[str, requests.Response], Any],
+             on_done: Callable[[int, int], None] | None = None,
+             cache_ns: str | None = None) -> list[FetchResult]:
+        """Descarga `urls` en paralelo y aplica `handle` en el hilo del worker.
+
+        Resultados en el orden de `urls`. `on_done(hechas, total)` se llama
+        al terminar cada URL (para mostrar progreso). Con `cache_ns`, lo que
+        devuelve `handle` (serializable en JSON) se guarda en la caché HTTP.
+        """
+        results: list[FetchResult | None] = [None] * len(urls)
+        done = [0]
+
+        def work(i: int, url: str):
+            res = FetchResult(url)
+            try:
+                r, res.attempts = self.get(url)
+                value = self.cache.get_derived(url, cache_ns, r) if (self.cache and cache_ns) else None
+                if value is None:
+                    value = handle(url, r)
+                    if self.cache and cache_ns:
+                        self.cache.put_derived(url, cache_ns, r, value)
+                res.value = value
+            except Exception as e:
+                res.error = e
+                with self._lock:
+                    self.errors += 1
+            results[i] = res
+            if on_done:
+                with self._lock:
+                    done[0] += 1
+                    n = done[0]
+                on_done(n, len(urls))
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="fetch") as pool:
+            for f in [pool.submit(work, i, u) for i, u in enumerate(urls)]:
+                f.result()
+        return results
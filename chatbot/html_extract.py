@@ -0,0 +1,355 @@
+# chatbot/html_extract.py
+# -----------------------------------------------------------------------------
+# Extracción HTML en UNA pasada (sin construir el árbol de BeautifulSoup)
+# -----------------------------------------------------------------------------
+# En un solo recorrido de eventos (start/end/texto) se obtiene:
+#   - título (<title>, como soup.title.string) y primer <h1>
+#   - texto limpio (como soup.get_text("\n", strip=True) sin script/style/noscript)
+#   - enlaces <a href> en orden, con su texto y el de su contenedor más cercano
+#     (p/li/div/section/article), que es el "contexto" de los documentos
+# Los textos se guardan una vez en una lista plana; cada elemento recuerda su
+# rango [inicio, fin) en esa lista, así que el texto de cualquier ancestro se
+# arma al vuelo solo cuando se pide.
+#
+# Backends:
+#   "html.parser"  (por defecto) mismo tokenizador y mismas reglas que
+#                  BeautifulSoup con html.parser → resultados idénticos a los
+#                  de antes, con o sin lxml instalado
+#   "lxml"         opcional, más rápido (libxml2); en HTML mal formado libxml2
+#                  cierra etiquetas a su manera y el contexto puede variar
+#   "auto"         lxml si está instalado, si no html.parser
+# -----------------------------------------------------------------------------
+
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+
+from bs4.builder import HTMLTreeBuilder
+from bs4.dammit import EntitySubstitution
+
+from chatbot.config import HTML_EXTRACT_BACKEND
+
+try:
+    from lxml import etree as _lxml_etree
+except ImportError:  # opcional
+    _lxml_etree = None
+
+# Igual que BeautifulSoup: etiquetas vacías y contenedores cuyo texto NO
+# cuenta en get_text() (script, style, template, rt, rp)
+_VOID = frozenset(HTMLTreeBuilder.empty_element_tags)
+_HIDDEN = frozenset(HTMLTreeBuilder.DEFAULT_STRING_CONTAINERS)
+_CONTEXT = frozenset(("p", "li", "div", "section", "article"))
+_ENTITIES = EntitySubstitution.HTML_ENTITY_TO_CHARACTER
+
+
+@dataclass
+class Link:
+    href: str
+    _page: "PageExtract" = field(repr=False)
+    _start: int = 0
+    _end: int = 0
+    _ctx: int = -1            # índice del contenedor de contexto (-1: ninguno)
+    _elem: int = -1           # índice del propio <a> en _ranges
+
+    @property
+    def text(self) -> str:
+        """Como a.get_text(strip=True) (sin separador)."""
+        return "".join(self._page._strings[self._start:self._end])
+
+    @property
+    def label(self) -> str:
+        """Como a.get_text(" ", strip=True)."""
+        return " ".join(self._page._strings[self._start:self._end])
+
+    @property
+    def context(self) -> str | None:
+        """Texto del p/li/div/section/article más cercano (None si no hay)."""
+        if self._ctx < 0:
+            return None
+        s, e = self._page._ranges[self._ctx]
+        return " ".join(self._page._strings[s:e])
+
+
+@dataclass
+class PageExtract:
+    title: str = ""
+    h1: str = ""
+    links: list[Link] = field(default_factory=list)
+    backend: str = ""
+    _strings: list[str] = field(default_factory=list, repr=False)   # strip() y no vacíos
+    _noscript: list[bool] = field(default_factory=list, repr=False)
+    _ranges: list[list[int]] = field(default_factory=list, repr=False)
+
+    @property
+    def text(self) -> str:
+        """Como soup.get_text("\\n", strip=True) tras quitar script/style/noscript."""
+        return "\n".join(s for s, hidden in zip(self._strings, self._noscript) if not hidden)
+
+
+class _Walker:
+    """Recibe eventos de cualquier backend y arma el PageExtract."""
+
+    def __init__(self, backend: str):
+        self.page = PageExtract(backend=backend)
+        self._buf: list[str] = []
+        # pila: (nombre, índice en _ranges)
+        self._stack: list[tuple[str, int]] = []
+        self._open: dict[str, int] = {}
+        self._hidden = 0          # dentro de script/style/template/rt/rp
+        self._noscript = 0
+        self._ctx: list[int] = []
+        self._links_open: list[Link] = []
+        self._h1 = -1             # rango del primer h1
+        self._title: list | None = None      # hijos del primer <title> (árbol mínimo)
+        self._title_stack: list[list] = []
+        self._title_done = False
+
+    # --------------------------------- texto ---------------------------------
+
+    def data(self, text: str):
+        self._buf.append(text)
+
+    def flush(self):
+        if not self._buf:
+            return
+        s = "".join(self._buf)
+        self._buf.clear()
+        if self._title_stack:
+            self._title_stack[-1].append(s)
+        if self._hidden:
+            return
+        st = s.strip()
+        if st:
+            self.page._strings.append(st)
+            self.page._noscript.append(self._noscript > 0)
+
+    def cdata(self, text: str):
+        """<![CDATA[…]]>: BeautifulSoup lo cuenta como texto aparte (aun en script/template)."""
+        self.flush()
+        if self._title_stack:
+            self._title_stack[-1].append(text)
+        st = text.strip()
+        if st:
+            self.page._strings.append(st)
+            self.page._noscript.append(self._noscript > 0)
+
+    def special(self, data: str = ""):
+        """Comentario / doctype / CDATA / PI: cortan el texto y no cuentan."""
+        self.flush()
+        if self._title_stack:
+            self._title_stack[-1].append(data)
+
+    # ------------------------------- etiquetas -------------------------------
+
+    def start(self, name: str, attrs: dict):
+        self.flush()
+        page = self.page
+        idx = len(page._ranges)
+        page._ranges.append([len(page._strings), -1])
+        self._stack.append((name, idx))
+        self._open[name] = self._open.get(name, 0) + 1
+        if name in _HIDDEN:
+            self._hidden += 1
+        elif name == "noscript":
+            self._noscript += 1
+        if name in _CONTEXT:
+            self._ctx.append(idx)
+        if name == "a" and "href" in attrs:
+            link = Link(attrs["href"], page, len(page._strings), -1,
+                        self._ctx[-1] if self._ctx else -1, idx)
+            page.links.append(link)
+            self._links_open.append(link)
+        if name == "h1" and self._h1 < 0:
+            self._h1 = idx
+        if self._title_stack:
+            child: list = []
+            self._title_stack[-1].append(child)
+            self._title_stack.append(child)
+        elif name == "title" and not self._title_done:
+            self._title = []
+            self._title_stack.append(self._title)
+
+    def _pop(self):
+        name, idx = self._stack.pop()
+        page = self.page
+        page._ranges[idx][1] = len(page._strings)
+        self._open[name] -= 1
+        if name in _HIDDEN:
+            self._hidden -= 1
+        elif name == "noscript":
+            self._noscript -= 1
+        if self._ctx and self._ctx[-1] == idx:
+            self._ctx.pop()
+        if self._links_open and self._links_open[-1]._elem == idx:
+            self._links_open.pop()._end = len(page._strings)
+        if self._title_stack:
+            self._title_stack.pop()
+            if not self._title_stack:
+                self._title_done = True
+
+    def end(self, name: str):
+        """Cierra hasta el `name` abierto más reciente (si no hay, se ignora)."""
+        self.flush()
+        if not self._open.get(name):
+            return
+        while self._stack:
+            top = self._stack[-1][0]
+            self._pop()
+            if top == name:
+                break
+
+    def close(self) -> PageExtract:
+        self.flush()
+        while self._stack:
+            self._pop()
+        page = self.page
+        page.title = _title_string(self._title).strip() if self._title is not None else ""
+        if self._h1 >= 0:
+            s, e = page._ranges[self._h1]
+            page.h1 = " ".join(" ".join(page._strings[s:e]).split())
+        return page
+
+
+def _title_string(children: list) -> str:
+    """Como Tag.string: solo si hay exactamente un hijo (texto o, recursivo, etiqueta)."""
+    while True:
+        if children is None or len(children) != 1:
+            return ""
+        child = children[0]
+        if isinstance(child, str):
+            return child
+        children = child
+
+
+# ============================ backend html.parser ============================
+
+class _StdlibParser(HTMLParser):
+    """Mismos eventos y reglas que BeautifulSoupHTMLParser."""
+
+    def __init__(self, walker: _Walker):
+        super().__init__(convert_charrefs=False)
+        self.w = walker
+        self._closed_void: list[str] = []
+
+    def handle_startendtag(self, tag, attrs):
+        self._start(tag, attrs, handle_void=False)
+        self.handle_endtag(tag)
+
+    def handle_starttag(self, tag, attrs):
+        self._start(tag, attrs, handle_void=True)
+
+    def _start(self, tag, attrs, handle_void: bool):
+        d = {}
+        for k, v in attrs:
+            d[k] = "" if v is None else v
+        self.w.start(tag, d)
+        if handle_void and tag in _VOID:
+            self.w.end(tag)
+            self._closed_void.append(tag)
+
+    def handle_endtag(self, tag):
+        if tag in self._closed_void:
+            self._closed_void.remove(tag)
+        else:
+            self.w.end(tag)
+
+    def handle_data(self, data):
+        self.w.data(data)
+
+    def handle_charref(self, name):
+        if name[:1] in ("x", "X"):
+            n = int(name.lstrip("xX"), 16)
+        else:
+            n = int(name)
+        data = None
+        if n < 256:
+            try:
+                data = bytearray([n]).decode("windows-1252")
+            except UnicodeDecodeError:
+                pass
+        if not data:
+            try:
+                data = chr(n)
+            except (ValueError, OverflowError):
+                pass
+        self.w.data(data or "\N{REPLACEMENT CHARACTER}")
+
+    def handle_entityref(self, name):
+        ch = _ENTITIES.get(name)
+        self.w.data(ch if ch is not None else f"&{name}")
+
+    def handle_comment(self, data):
+        self.w.special(data)
+
+    def handle_decl(self, data):
+        self.w.special(data)
+
+    def unknown_decl(self, data):
+        if data.upper().startswith("CDATA["):
+            self.w.cdata(data[len("CDATA["):])
+        else:
+            self.w.special(data)
+
+    def handle_pi(self, data):
+        self.w.special(data)
+
+
+def _extract_stdlib(html: str) -> PageExtract:
+    w = _Walker("html.parser")
+    p = _StdlibParser(w)
+    p.feed(html)
+    p.close()
+    return w.close()
+
+
+# ================================ backend lxml ===============================
+
+class _LxmlTarget:
+    def __init__(self, walker: _Walker):
+        self.w = walker
+
+    def start(self, tag, attrib):
+        if isinstance(tag, str):
+            self.w.start(tag.lower(), dict(attrib))
+
+    def end(self, tag):
+        if isinstance(tag, str):
+            self.w.end(tag.lower())
+
+    def data(self, data):
+        self.w.data(data)
+
+    def comment(self, text):
+        self.w.special(text)
+
+    def pi(self, target, data=None):
+        self.w.special()
+
+    def doctype(self, *args):
+        self.w.special()
+
+    def close(self):
+        return self.w.close()
+
+
+def _extract_lxml(html: str) -> PageExtract:
+    w = _Walker("lxml")
+    parser = _lxml_etree.HTMLParser(target=_LxmlTarget(w), recover=True, no_network=True)
+    try:
+        return _lxml_etree.fromstring(html, parser)
+    except _lxml_etree.XMLSyntaxError:
+        return _extract_stdlib(html)      # documento vacío o ilegible para libxml2
+
+
+def backend_name(backend: str = HTML_EXTRACT_BACKEND) -> str:
+    if backend == "auto":
+        return "lxml" if _lxml_etree is not None else "html.parser"
+    if backend == "lxml" and _lxml_etree is None:
+        return "html.parser"
+    return backend
+
+
+def extract(html: str, backend: str = HTML_EXTRACT_BACKEND) -> PageExtract:
+    """Título, h1, texto limpio y enlaces de una página en un solo recorrido."""
+    if backend_name(backend) == "lxml":
+        return _extract_lxml(html)
+    return _extract_stdlib(html)
@@ -0,0 +1,179 @@
+# chatbot/http_cache.py
+# -----------------------------------------------------------------------------
+# Peticiones condicionales (ETag / Last-Modified) sobre el almacén de páginas
+# -----------------------------------------------------------------------------
+# Las respuestas viven en el PageStore (chatbot/page_store.py). Por URL:
+# - Entrada fresca (Cache-Control max-age / Expires), o ya descargada en esta
+#   misma corrida (`reuse_since`) → no se pide nada.
+# - Si no, se envía If-None-Match / If-Modified-Since; un 304 cuenta como hit
+#   y reutiliza el cuerpo guardado.
+# - Error de red pasajero (5xx, 429, 408 tras agotar reintentos) u otro error
+#   que no sea 404/410 con un 200 guardado → se sirve el 200 guardado ("stale")
+#   y no se toca el almacén. Un error pasajero sin 200 guardado no se guarda.
+#   Solo 404/410 (la página ya no existe) reemplazan un 200 guardado.
+# - Modo offline: solo se lee del almacén; lo que no esté es un error.
+# - "Derivados": lo que cada etapa sacó del cuerpo (p. ej. sección + docs), por
+#   espacio de nombres y hash del cuerpo; con un hit no hace falta ni parsear.
+# -----------------------------------------------------------------------------
+
+import email.utils
+import re
+import threading
+import time
+from typing import Any
+
+from requests.structures import CaseInsensitiveDict
+
+from chatbot.config import HTTP_CACHE_ENABLED, OFFLINE
+from chatbot.http_client import transferred_bytes
+from chatbot.page_store import KEEP_HEADERS, PageStore
+
+
+TRANSIENT_STATUS = frozenset((408, 425, 429))   # además de todo 5xx
+GONE_STATUS = frozenset((404, 410))
+
+
+class OfflineMiss(Exception):
+    """La URL no está en el almacén y estamos en modo offline."""
+
+
+def _http_date(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def _fresh_until(headers, now: float) -> float:
+    """Hasta cuándo la respuesta se puede usar sin preguntar (0 = revalidar siempre)."""
+    cc = (headers.get("Cache-Control") or "").lower()
+    if "no-cache" in cc or "no-store" in cc:
+        return 0.0
+    m = re.search(r"max-age=(\d+)", cc)
+    if m:
+        age = str(headers.get("Age") or "0")
+        age = int(age) if age.isdigit() else 0
+        return now + max(0, int(m.group(1)) - age)
+    expires, date = _http_date(headers.get("Expires")), _http_date(headers.get("Date"))
+    if expires:
+        return now + max(0.0, expires - (date or now))
+    return 0.0
+
+
+class HttpCache:
+    def __init__(self, store: PageStore | None = None, offline: bool = False,
+                 reuse_since: float | None = None, clock=time.time):
+        self.store = store or PageStore()
+        self.offline = offline
+        self.reuse_since = reuse_since
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.counts = {"fresh": 0, "stored": 0, "revalidated": 0, "miss": 0, "stale": 0,
+                       "derived_hits": 0, "bytes_downloaded": 0}
+
+    def _count(self, key: str, n: int = 1):
+        with self._lock:
+            self.counts[key] += n
+
+    # ------------------------------ respuestas -------------------------------
+
+    def lookup(self, url: str) -> dict | None:
+        return self.store.meta(url)
+
+    def fresh_response(self, url: str, meta: dict | None):
+        """Respuesta guardada si se puede usar sin tocar la red."""
+        if meta is None:
+            if self.offline:
+                raise OfflineMiss(f"{url} no está en el almacén (modo offline)")
+            return None
+        if self.offline or (self.reuse_since is not None and meta.get("checked_at", 0) >= self.reuse_since):
+            self._count("stored")
+            return self.store.page(url, meta, "store")
+        if meta.get("fresh_until", 0) > self.clock():
+            self._count("fresh")
+            return self.store.page(url, meta, "fresh")
+        return None
+
+    @staticmethod
+    def conditional_headers(meta: dict | None) -> dict:
+        h = {}
+        if meta and meta.get("status") == 200:
+            hdrs = meta.get("headers", {})
+            if hdrs.get("ETag"):
+                h["If-None-Match"] = hdrs["ETag"]
+            if hdrs.get("Last-Modified"):
+                h["If-Modified-Since"] = hdrs["Last-Modified"]
+        return h
+
+    def update(self, url: str, r, meta: dict | None):
+        """Procesa la respuesta de red: 304 → cuerpo guardado; error pasajero →
+        el 200 guardado (sin tocarlo); otra → se guarda."""
+        now = self.clock()
+        error = r.status_code >= 400 and r.status_code not in GONE_STATUS
+        if error and meta and meta.get("status") == 200:
+            # sin checked_at nuevo: la próxima corrida vuelve a preguntar
+            self._count("stale")
+            return self.store.page(url, meta, "stale")
+        if r.status_code == 304 and meta:
+            self._count("revalidated")
+            # el 304 puede traer validadores/frescura nuevos
+            for h in KEEP_HEADERS:
+                if h in r.headers and h not in ("Content-Type", "Content-Length"):
+                    meta["headers"][h] = r.headers[h]
+            meta["fresh_until"] = _fresh_until(CaseInsensitiveDict(meta["headers"]), now)
+            meta["checked_at"] = now
+            self.store.touch(url, meta)
+            return self.store.page(url, meta, "revalidated")
+
+        self._count("miss")
+        self._count("bytes_downloaded", transferred_bytes(r))
+        r.from_cache = "miss"
+        cc = (r.headers.get("Cache-Control") or "").lower()
+        if "no-store" in cc or (error and (r.status_code >= 500 or r.status_code in TRANSIENT_STATUS)):
+            r.body_sha = None
+            return r
+        meta = self.store.put(
+            url, r,
+            fresh_until=_fresh_until(r.headers, now) if r.status_code == 200 else 0.0,
+            fetched_at=now,
+            checked_at=now,
+        )
+        r.body_sha = meta["sha1"]
+        return r
+
+    # ------------------------------- derivados -------------------------------
+
+    def get_derived(self, url: str, ns: str, r) -> Any | None:
+        """Resultado guardado de `ns` para ESTE cuerpo (None si no hay)."""
+        if getattr(r, "from_cache", "miss") == "miss":
+            return None
+        value = self.store.get_derived(url, ns, getattr(r, "body_sha", None))
+        if value is not None:
+            self._count("derived_hits")
+        return value
+
+    def put_derived(self, url: str, ns: str, r, value: Any):
+        sha = getattr(r, "body_sha", None)
+        if sha and getattr(r, "status_code", 0) == 200:
+            self.store.put_derived(url, ns, sha, value)
+
+    # -------------------------------- métricas -------------------------------
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counts)
+
+    def summary(self) -> str:
+        c = self.stats()
+        return (f"🗄️ Páginas: {c['stored']} del almacén, {c['fresh']} frescas, "
+                f"{c['revalidated']} revalidadas (304), {c['stale']} guardadas ante un error, {c['miss']} descargas "
+                f"({c['bytes_downloaded'] / 1e6:.1f} MB), {c['derived_hits']} sin re-parsear")
+
+
+def default_cache(offline: bool = OFFLINE, reuse_since: float | None = None) -> HttpCache | None:
+    """Caché/almacén de páginas según config (offline siempre usa el almacén)."""
+    if not (HTTP_CACHE_ENABLED or offline):
+        return None
+    return HttpCache(offline=offline, reuse_since=reuse_since)
@@ -0,0 +1,271 @@
+# chatbot/http_client.py
+# -----------------------------------------------------------------------------
+# Cliente HTTP compartido: pool de conexiones + reintentos + ritmo adaptativo
+# -----------------------------------------------------------------------------
+# - Una sola requests.Session por proceso (keep-alive): las peticiones al mismo
+#   host reutilizan la conexión TCP/TLS en vez de abrir una nueva cada vez.
+# - Por host: semáforo (concurrencia) + token bucket cuyo ritmo se adapta
+#   (AIMD): sube poco a poco mientras la latencia se mantiene cerca de la
+#   base y se reduce a la mitad ante 429/5xx, timeouts o latencia disparada.
+#   Un Retry-After del servidor se respeta.
+# - Reintentos con backoff exponencial (+ jitter) ante timeouts, errores de
+#   conexión y 429/5xx.
+# - Métricas del proceso (= de la corrida): peticiones, reintentos,
+#   conexiones nuevas / reutilizadas, bytes transferidos (comprimidos, no el
+#   cuerpo decodificado), bajadas de ritmo.
+# -----------------------------------------------------------------------------
+
+import datetime
+import email.utils
+import random
+import threading
+import time
+from collections import defaultdict
+from functools import lru_cache
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectTimeout, ReadTimeout
+
+from chatbot.config import (
+    USER_AGENT, FETCH_WORKERS, FETCH_PER_HOST, FETCH_RATE, FETCH_BURST,
+    FETCH_RETRIES, FETCH_BACKOFF, FETCH_TIMEOUT, FETCH_ADAPTIVE,
+    FETCH_RATE_MIN, FETCH_RATE_MAX,
+)
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+RETRY_EXC = (ReadTimeout, ConnectTimeout, requests.exceptions.ConnectionError)
+MAX_RETRY_AFTER = 30.0   # s; tope para un Retry-After del servidor
+LATENCY_SLACK = 0.05     # s; variación de latencia que no cuenta como "lento"
+
+
+class TokenBucket:
+    """`rate` fichas por segundo, hasta `burst` acumuladas (rate <= 0: sin límite)."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class AdaptiveThrottle:
+    """Token bucket de un host cuyo ritmo sigue la salud del servidor (AIMD)."""
+
+    def __init__(self, rate: float, burst: int, min_rate: float, max_rate: float, adaptive: bool = True):
+        self.bucket = TokenBucket(rate, burst)
+        self.min_rate, self.max_rate = min_rate, max(rate, max_rate)
+        self.adaptive = adaptive and rate > 0
+        self._fast: float | None = None    # latencia reciente (EWMA rápida)
+        self._base: float | None = None    # latencia base (mínimo con deriva lenta)
+        self._pause_until = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self) -> float:
+        return self.bucket.rate
+
+    def acquire(self):
+        wait = self._pause_until - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self.bucket.acquire()
+
+    def slow_down(self, retry_after: float | None = None) -> bool:
+        """429/5xx/timeout: mitad de ritmo (y pausa si el servidor la pidió)."""
+        with self._lock:
+            if retry_after:
+                self._pause_until = max(self._pause_until, time.monotonic() + min(retry_after, MAX_RETRY_AFTER))
+            if not self.adaptive:
+                return False
+            self.bucket.rate = max(self.min_rate, self.bucket.rate * 0.5)
+            return True
+
+    def observe(self, latency: float) -> bool:
+        """Respuesta sana: +ritmo si la latencia está cerca de la base; True si se frenó."""
+        if not self.adaptive:
+            return False
+        with self._lock:
+            if self._base is None:
+                self._fast = self._base = latency
+                return False
+            self._fast = 0.7 * self._fast + 0.3 * latency
+            # la base sigue al mínimo y solo sube despacio (un servidor que se
+            # pone lento no se vuelve "lo normal" en unas pocas respuestas)
+            self._base = latency if latency < self._base else 0.99 * self._base + 0.01 * latency
+            if self._fast > 2.0 * self._base + LATENCY_SLACK:
+                self.bucket.rate = max(self.min_rate, self.bucket.rate * 0.9)
+                return True
+            if self._fast <= 1.25 * self._base + LATENCY_SLACK / 2:
+                self.bucket.rate = min(self.max_rate, self.bucket.rate + 0.02 * self.max_rate)
+            return False
+
+
+def transferred_bytes(r) -> int:
+    """Bytes que viajaron por la red (comprimidos con gzip/br), no los del cuerpo
+    decodificado: lo leído del socket, o Content-Length. Si no hay ninguno (p. ej.
+    chunked: urllib3 no cuenta esos bytes), el largo del cuerpo decodificado."""
+    raw = getattr(r, "raw", None)
+    try:
+        n = raw.tell() if raw is not None else 0
+    except (AttributeError, OSError):
+        n = 0
+    if n:
+        return n
+    length = (r.headers.get("Content-Length") or "").strip()
+    return int(length) if length.isdigit() else len(r.content or b"")
+
+
+def _retry_after(r) -> float | None:
+    """Segundos de Retry-After: "120" o una fecha HTTP (RFC 9110); None si no hay."""
+    value = (r.headers.get("Retry-After") or "").strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:   # "-0000": sin zona explícita, es GMT
+        when = when.replace(tzinfo=datetime.timezone.utc)
+    return max(0.0, when.timestamp() - time.time())
+
+
+class _CountingAdapter(HTTPAdapter):
+    """HTTPAdapter que recuerda sus pools (para contar conexiones reutilizadas)."""
+
+    def __init__(self, *args, **kwargs):
+        self.pools = set()
+        super().__init__(*args, **kwargs)
+
+    def get_connection(self, url, proxies=None):
+        conn = super().get_connection(url, proxies)
+        self.pools.add(conn)
+        return conn
+
+    def get_connection_with_tls_context(self, request, verify, proxies=None, cert=None):
+        conn = super().get_connection_with_tls_context(request, verify, proxies, cert)
+        self.pools.add(conn)
+        return conn
+
+
+class HttpClient:
+    def __init__(self, pool_size: int = FETCH_WORKERS, per_host: int = FETCH_PER_HOST,
+                 rate: float = FETCH_RATE, burst: int = FETCH_BURST,
+                 retries: int = FETCH_RETRIES, backoff: float = FETCH_BACKOFF,
+                 timeout=FETCH_TIMEOUT, headers: dict | None = None,
+                 adaptive: bool = FETCH_ADAPTIVE, min_rate: float = FETCH_RATE_MIN,
+                 max_rate: float = FETCH_RATE_MAX):
+        self.per_host = max(1, per_host)
+        self.rate, self.burst = rate, burst
+        self.retries, self.backoff = retries, backoff
+        self.timeout = timeout
+        self.adaptive, self.min_rate, self.max_rate = adaptive, min_rate, max_rate
+        self.session = requests.Session()
+        self.session.headers.update(headers or {"User-Agent": USER_AGENT})
+        self._adapter = _CountingAdapter(pool_connections=16, pool_maxsize=max(pool_size, self.per_host))
+        self.session.mount("http://", self._adapter)
+        self.session.mount("https://", self._adapter)
+        self._lock = threading.Lock()
+        self._hosts: dict[str, tuple[threading.Semaphore, AdaptiveThrottle]] = {}
+        self.counts = defaultdict(int)
+
+    def _host(self, url: str) -> tuple[threading.Semaphore, AdaptiveThrottle]:
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = (
+                    threading.Semaphore(self.per_host),
+                    AdaptiveThrottle(self.rate, self.burst, self.min_rate, self.max_rate, self.adaptive),
+                )
+            return self._hosts[host]
+
+    def _count(self, key: str, n: int = 1):
+        with self._lock:
+            self.counts[key] += n
+
+    def request(self, method: str, url: str, headers: dict | None = None,
+                stream: bool = False, timeout=None) -> tuple[requests.Response, int]:
+        """Petición con límites, ritmo adaptativo y reintentos. Devuelve (respuesta, intentos)."""
+        sem, throttle = self._host(url)
+        attempt = 0
+        while True:
+            attempt += 1
+            retry_after = None
+            with sem:
+                throttle.acquire()
+                t0 = time.monotonic()
+                try:
+                    r = self.session.request(method, url, headers=headers, stream=stream,
+                                             timeout=timeout or self.timeout, allow_redirects=True)
+                except RETRY_EXC:
+                    self._count("errors")
+                    if throttle.slow_down():
+                        self._count("slowdowns")
+                    if attempt > self.retries:
+                        raise
+                    r = None
+            if r is not None:
+                self._count("requests")
+                if not stream:
+                    r.content   # lee el cuerpo: raw.tell() ya cuenta lo transferido
+                    self._count("bytes", transferred_bytes(r))
+                if r.status_code in RETRY_STATUS:
+                    retry_after = _retry_after(r)
+                    if throttle.slow_down(retry_after):
+                        self._count("slowdowns")
+                elif throttle.observe(time.monotonic() - t0):
+                    self._count("slowdowns")
+                if r.status_code not in RETRY_STATUS or attempt > self.retries:
+                    return r, attempt
+                r.close()
+            self._count("retries")
+            delay = self.backoff * (2 ** (attempt - 1)) * (1 + random.random() * 0.25)
+            time.sleep(max(delay, min(retry_after or 0.0, MAX_RETRY_AFTER)))
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)[0]
+
+    def head(self, url: str, **kwargs) -> requests.Response:
+        return self.request("HEAD", url, **kwargs)[0]
+
+    # -------------------------------- métricas -------------------------------
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self.counts)
+            pools = list(self._adapter.pools)
+            out["rates"] = {h: round(t.rate, 2) for h, (_, t) in self._hosts.items()}
+        out["connections"] = sum(p.num_connections for p in pools)
+        out["reused"] = max(0, sum(p.num_requests for p in pools) - out["connections"])
+        for k in ("requests", "retries", "errors", "bytes", "slowdowns"):
+            out.setdefault(k, 0)
+        return out
+
+    def summary(self) -> str:
+        s = self.stats()
+        rates = ", ".join(f"{h} {r:g}/s" for h, r in s["rates"].items()) or "-"
+        return (f"🔌 HTTP: {s['requests']} peticiones, {s['connections']} conexiones "
+                f"({s['reused']} reutilizadas), {s['retries']} reintentos, "
+                f"{s['bytes'] / 1e6:.1f} MB, {s['slowdowns']} frenadas | ritmo: {rates}")
+
+
+@lru_cache(maxsize=1)
+def default_client() -> HttpClient:
+    """Cliente del proceso (lo comparten mapeo, crawler, indexador y documentos)."""
+    return HttpClient()
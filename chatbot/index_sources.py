@@ -0,0 +1,74 @@
+# chatbot/index_sources.py
+# -----------------------------------------------------------------------------
+# Fuentes del índice y su hash de contenido (para reindexar incrementalmente)
+# -----------------------------------------------------------------------------
+# Una "fuente" es una página (por URL) o la ficha de un documento (por URL del
+# documento + página que lo publica). Cada versión del índice guarda en
+# sources.json, por fuente: hash del texto + metadatos y los ids de sus nodos.
+# En la siguiente reindexación solo se trocean y embeben las fuentes nuevas o
+# cuyo hash cambió; las demás copian nodos y vectores de la versión activa y
+# las que ya no están en el manifiesto/catálogo desaparecen.
+# Con la deduplicación, una fuente guarda además `dup_of` (página casi igual a
+# otra: sin nodos), `deps` (ids de nodos de otras fuentes que cubren sus trozos
+# descartados) y `skipped` (trozos que no se embebieron).
+# -----------------------------------------------------------------------------
+
+import hashlib
+import json
+import os
+
+from llama_index.core.schema import Document
+
+from chatbot.config import (
+    CHUNK_OVERLAP, CHUNK_SIZE, DEDUPE_ENABLED, DEDUPE_MAX_DISTANCE, DEDUPE_MIN_OVERLAP,
+    DEDUPE_SHINGLE, EMBEDDING_MODEL,
+)
+
+SOURCES_FILE = "sources.json"
+# si cambia cualquiera de estos, los nodos/vectores viejos no sirven
+SETTINGS = {"model": EMBEDDING_MODEL, "chunk_size": CHUNK_SIZE, "chunk_overlap": CHUNK_OVERLAP,
+            "dedupe": [DEDUPE_ENABLED, DEDUPE_SHINGLE, DEDUPE_MAX_DISTANCE, DEDUPE_MIN_OVERLAP]}
+
+
+def source_key(doc: Document) -> str:
+    md = doc.metadata
+    kind = md.get("kind", "")
+    if kind == "doc_card":
+        return f"doc_card:{md.get('source', '')}|{md.get('from_page', '')}"
+    return f"{kind or 'otro'}:{md.get('source', '')}"
+
+
+def group_sources(docs: list[Document]) -> dict[str, tuple[str, list[Document]]]:
+    """{clave: (hash, documentos)} en el orden de `docs`."""
+    groups: dict[str, list[Document]] = {}
+    for d in docs:
+        groups.setdefault(source_key(d), []).append(d)
+    out = {}
+    for key, group in groups.items():
+        h = hashlib.sha1()
+        for d in group:
+            h.update(d.text.encode("utf-8"))
+            h.update(b"\0")
+            h.update(json.dumps(d.metadata, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+            h.update(b"\0")
+        out[key] = (h.hexdigest(), group)
+    return out
+
+
+def load_sources(persist_dir: str) -> dict[str, dict] | None:
+    """Fuentes de una versión ({clave: {"hash", "nodes"}}) o None si no sirve."""
+    try:
+        with open(os.path.join(persist_dir, SOURCES_FILE), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("settings") != SETTINGS:
+        return None
+    return data.get("sources", {})
+
+
+def write_sources(persist_dir: str, sources: dict[str, dict]) -> None:
+    path = os.path.join(persist_dir, SOURCES_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"settings": SETTINGS, "sources": sources}, f, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
@@ -1,60 +1,77 @@
 # chatbot/indexer.py
-import json, os, requests
-from bs4 import BeautifulSoup
-from llama_index.core import VectorStoreIndex, StorageContext, load_indices_from_storage
+import argparse, os, shutil, time
+import numpy as np
 from llama_index.core.node_parser import SentenceSplitter
-from llama_index.core.schema import Document
+from llama_index.core.schema import Document, MetadataMode
 from llama_index.core.settings import Settings
 from llama_index.embeddings.huggingface import HuggingFaceEmbedding
 
 from chatbot.config import (
-    EMBEDDING_MODEL, STORAGE_DIR, CHUNK_SIZE, CHUNK_OVERLAP,
-    URL_MANIFEST_PATH, DOC_CATALOG_PATH, HTTP_TIMEOUT
+    EMBEDDING_MODEL, CHUNK_SIZE, CHUNK_OVERLAP,
+    URL_MANIFEST_PATH, DOC_CATALOG_PATH, STORAGE_VERSIONS_KEEP, OFFLINE, DEDUPE_ENABLED,
+    DOCS_DIR, PAA_ENABLED, CHUNK_EMBED_CACHE_ENABLED
 )
+from chatbot import catalog
+from chatbot.boilerplate import strip_boilerplate
+from chatbot.build_embedder import embed_texts
+from chatbot.chunk_embed_cache import ChunkEmbeddingCache
+from chatbot.dedupe import NearDupIndex, cluster
+from chatbot.document_loader import cargar_documentos_locales, doc_urls
+from chatbot.fetcher import Fetcher
+from chatbot.html_extract import backend_name, extract
+from chatbot.http_cache import default_cache
+from chatbot.index_sources import group_sources, load_sources, write_sources
+from chatbot.paa_store import build_paa_store
 from chatbot.site_map import build_map_and_catalog
+from chatbot.storage_versions import current_dir, gc, new_version_dir, publish
+from chatbot.vector_store import BinaryVectorStore, has_binary_store, load_index, write_binary_store
 
 def _configure():
     Settings.embed_model = HuggingFaceEmbedding(model_name=EMBEDDING_MODEL)
     Settings.node_parser = SentenceSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
 
-def _html_to_text(html: str) -> str:
-    soup = BeautifulSoup(html, "html.parser")
-    for tag in soup(["script", "style", "noscript"]): tag.decompose()
-    return soup.get_text(separator="\n", strip=True)
+def _page_fields(url: str, r) -> dict | None:
+    """Título, H1 y texto de una página HTML (corre en el worker del fetcher)."""
+    if "text/html" not in r.headers.get("Content-Type", "").lower():
+        return None
+    page = extract(r.text)
+    return {"title": page.title, "h1": page.h1, "text": page.text}
 
-def _load_all_html_from_manifest() -> list[Document]:
-    try:
-        with open(URL_MANIFEST_PATH, "r", encoding="utf-8") as f:
-            urls = json.load(f).get("urls", [])
-        print(f"🔎 Manifiesto: {len(urls)} URLs.")
-    except Exception:
-        urls, _, _ = build_map_and_catalog()
+def _load_all_html_from_manifest(offline: bool = OFFLINE, reuse_since: float | None = None) -> list[Document]:
+    """Texto de las páginas del manifiesto, leído del almacén de páginas.
 
+    Lo descargado desde `reuse_since` (el mapeo de esta misma corrida) se
+    reutiliza sin volver a la red; `offline` no toca la red en absoluto.
+    """
+    if not catalog.exists(URL_MANIFEST_PATH):
+        build_map_and_catalog(offline)
+    urls = [it["url"] for it in catalog.iter_items(URL_MANIFEST_PATH)]
+    print(f"🔎 Manifiesto: {len(urls)} URLs.")
+
+    fetcher = Fetcher(cache=default_cache(offline, reuse_since))
+    # "v1": cambiar si cambia lo que extrae _page_fields (invalida derivados);
+    # el backend va en el nombre porque lxml puede cerrar etiquetas distinto
+    results = fetcher.map(urls, _page_fields, cache_ns=f"indexer.pages.v1.{backend_name()}")
     docs = []
-    for u in urls:
-        try:
-            r = requests.get(u, headers={"User-Agent": "Mozilla/5.0"}, timeout=HTTP_TIMEOUT)
-            if "text/html" in r.headers.get("Content-Type", "").lower():
-                soup = BeautifulSoup(r.text, "html.parser")
-                title = (soup.title.string.strip() if soup.title and soup.title.string else "")
-                h1 = ""
-                h1_tag = soup.find("h1")
-                if h1_tag:
-                    h1 = " ".join(h1_tag.get_text(" ", strip=True).split())
-                txt = _html_to_text(r.text)
-                if txt.strip():
-                    docs.append(Document(
-                        text=txt,
-                        metadata={"source": u, "kind": "page", "page_title": title or h1, "h1": h1}
-                    ))
-        except Exception as e:
-            print(f"⚠️ Error HTML {u}: {e}")
+    for res in results:
+        if res.error is not None:
+            print(f"⚠️ Error HTML {res.url}: {res.error}")
+            continue
+        if res.value and res.value["text"].strip():
+            docs.append(Document(
+                text=res.value["text"],
+                metadata={"source": res.url, "kind": "page",
+                          "page_title": res.value["title"] or res.value["h1"], "h1": res.value["h1"]}
+            ))
+    if fetcher.cache:
+        print(fetcher.cache.summary())
+    print(fetcher.client.summary())
 
     if not docs and urls:
         try:
-            r = requests.get(urls[0], headers={"User-Agent": "Mozilla/5.0"}, timeout=HTTP_TIMEOUT)
+            r, _ = fetcher.get(urls[0])
             if "text/html" in r.headers.get("Content-Type", "").lower():
-                txt = _html_to_text(r.text)
+                txt = extract(r.text).text
                 if txt.strip():
                     docs.append(Document(text=txt, metadata={"source": urls[0], "kind": "page"}))
                     print("ℹ️ Fallback: se indexó la home.")
@@ -65,15 +82,12 @@ def _load_all_html_from_manifest() -> list[Document]:
     return docs
 
 def _load_doc_cards_from_catalog() -> list[Document]:
-    try:
-        with open(DOC_CATALOG_PATH, "r", encoding="utf-8") as f:
-            items = json.load(f).get("items", [])
-        print(f"🔎 Catálogo de documentos: {len(items)} entradas.")
-    except Exception:
-        _, items, _ = build_map_and_catalog()
+    if not catalog.exists(DOC_CATALOG_PATH):
+        build_map_and_catalog()
+    print(f"🔎 Catálogo de documentos: {catalog.count(DOC_CATALOG_PATH)} entradas.")
 
     docs = []
-    for it in items:
+    for it in catalog.iter_items(DOC_CATALOG_PATH):
         txt = (
             f"Título de la página: {it.get('page_title','')}\n"
             f"H1: {it.get('h1','')}\n"
@@ -97,39 +111,257 @@ def _load_doc_cards_from_catalog() -> list[Document]:
     print(f"📎 Fichas de documentos creadas: {len(docs)}")
     return docs
 
-def _build_index(docs):
-    _configure()
-    index = VectorStoreIndex.from_documents(docs, embed_model=Settings.embed_model)
-    index.storage_context.persist(STORAGE_DIR)
-    print("✅ Índice guardado en", STORAGE_DIR)
-    return index
+def _embed_nodes(nodes) -> list:
+    texts = [n.get_content(metadata_mode=MetadataMode.EMBED) for n in nodes]
+    run = lambda batch: embed_texts(batch, local_model=Settings.embed_model)
+    if not CHUNK_EMBED_CACHE_ENABLED:
+        return run(texts)
+    # el modelo solo corre con los textos que no están en la caché (por hash)
+    return ChunkEmbeddingCache(EMBEDDING_MODEL).embed(texts, run)
+
+def _previous(full: bool = False):
+    """(almacén de la versión activa, sus fuentes) si se puede reutilizar; si no (None, None)."""
+    prev_dir = current_dir()
+    if full or not has_binary_store(prev_dir):
+        return None, None
+    sources = load_sources(prev_dir)
+    if sources is None:
+        return None, None
+    return BinaryVectorStore(persist_dir=prev_dir), sources
+
+def _page_duplicates(groups: dict) -> dict[str, str]:
+    """{página casi idéntica a otra: representante} (la primera del manifiesto)."""
+    if not DEDUPE_ENABLED:
+        return {}
+    return cluster([(key, "\n".join(d.text for d in docs))
+                    for key, (_, docs) in groups.items() if key.startswith("page:")])
 
-def crear_o_cargar_indice():
-    # Siempre (re)construir manifiestos/catalogos desde routes.txt o crawler
-    build_map_and_catalog()
+def _changed_sources(groups: dict, prev: dict, page_dup: dict) -> set:
+    """Fuentes a (re)procesar: hash distinto o cambio de representante."""
+    return {k for k, (h, _) in groups.items()
+            if prev.get(k, {}).get("hash") != h or prev.get(k, {}).get("dup_of") != page_dup.get(k)}
 
-    if not os.path.exists(STORAGE_DIR) or not os.listdir(STORAGE_DIR):
-        os.makedirs(STORAGE_DIR, exist_ok=True)
+def _split_source(docs: list, store, entry: dict | None) -> tuple[list, dict]:
+    """Trozos de una fuente. Un trozo cuyo texto a embeber ya tenía un nodo en
+    la versión activa conserva su id y su vector: {id: vector}."""
+    nodes = Settings.node_parser.get_nodes_from_documents(docs)
+    if store is None or not entry or not entry["nodes"]:
+        return nodes, {}
+    old: dict[str, list[str]] = {}
+    for nid in entry["nodes"]:
+        old.setdefault(store.get_node(nid).get_content(metadata_mode=MetadataMode.EMBED), []).append(nid)
+    remap = {}
+    for n in nodes:
+        ids = old.get(n.get_content(metadata_mode=MetadataMode.EMBED))
+        if ids:
+            remap[n.node_id] = ids.pop(0)
+            n.id_ = remap[n.node_id]
+    for n in nodes:
+        for rel in n.relationships.values():
+            if getattr(rel, "node_id", None) in remap:
+                rel.node_id = remap[rel.node_id]
+    reused = list(remap.values())
+    return nodes, dict(zip(reused, store.get_vectors(reused)))
 
-        docs_pages = _load_all_html_from_manifest()
-        docs_cards = _load_doc_cards_from_catalog()
-        documentos = docs_pages + docs_cards
+def _dedupe(groups: dict, changed: set, copied: dict, split: dict, page_dup: dict):
+    """Trozos nuevos que se conservan + dependencias (ids de nodos de otras
+    fuentes que cubren los descartados) + trozos descartados por fuente."""
+    index = NearDupIndex() if DEDUPE_ENABLED else None
+    if index is not None:
+        for key in groups:
+            if key not in changed:
+                for n in copied[key][0]:
+                    index.add(n.get_content(metadata_mode=MetadataMode.NONE), (key, n.node_id))
+    keep, deps, skipped = {}, {}, {}
+    for key in groups:
+        if key not in changed:
+            continue
+        keep[key] = []
+        for node in split[key]:
+            found = None
+            if key in page_dup:
+                found = (page_dup[key], None)
+            elif index is not None:
+                found = index.match_or_add(node.get_content(metadata_mode=MetadataMode.NONE), (key, node.node_id))
+            if found is None:
+                keep[key].append(node)
+                continue
+            skipped[key] = skipped.get(key, 0) + 1
+            if found[0] != key and found[1] is not None:
+                deps.setdefault(key, set()).add(found[1])
+    return keep, deps, skipped
 
-        if not documentos:
-            documentos = [Document(text="Contenido básico del sitio UESVALLE.", metadata={"source": "placeholder"})]
+class NothingToIndex(RuntimeError):
+    """Ninguna fuente conserva nodos (todas duplicadas o vacías tras quitar la plantilla)."""
 
-        print(f"🧠 Generando índice con {len(documentos)} documentos…")
-        return _build_index(documentos)
+def _build_index(groups: dict, changed: set, store, prev: dict | None, persist_dir: str,
+                 page_dup: dict | None = None):
+    """Escribe la versión: fuentes cambiadas → trocear + embeber; el resto se copia.
 
-    print("📚 Cargando índice existente…")
+    Casi-duplicados: las páginas de `page_dup` no aportan nodos y los trozos
+    casi iguales a uno ya conservado no se embeben; las URLs que cubren quedan
+    en `alt_sources` del nodo conservado. Una fuente sin cambios cuyos trozos
+    descartados remitían a un nodo que ya no está se vuelve a procesar.
+    """
     _configure()
-    storage = StorageContext.from_defaults(persist_dir=STORAGE_DIR)
-    index_list = load_indices_from_storage(storage, embed_model=Settings.embed_model)
-    return index_list[0]
+    page_dup, prev = page_dup or {}, prev or {}
+    changed = set(changed)
+    url_of = {key: docs[0].metadata.get("source", "") for key, (_, docs) in groups.items()}
+    copied: dict[str, tuple[list, np.ndarray]] = {}
+    for key in groups:
+        if key not in changed:
+            ids = prev[key]["nodes"]
+            copied[key] = ([store.get_node(i) for i in ids], store.get_vectors(ids))
 
-if __name__ == "__main__":
-    _ = crear_o_cargar_indice()
-    print("🎉 ¡Índice listo!")
+    split, reused = {}, {}
+    while True:
+        for key in groups:
+            if key in changed and key not in split:
+                split[key], vecs = _split_source(groups[key][1], store, prev.get(key))
+                reused.update(vecs)
+        keep, deps, skipped = _dedupe(groups, changed, copied, split, page_dup)
+        alive = {n.node_id for k in groups if k not in changed for n in copied[k][0]}
+        alive |= {n.node_id for part in keep.values() for n in part}
+        more = {k for k in groups if k not in changed
+                and any(nid not in alive for nid in prev[k].get("deps", []))}
+        if not more:
+            break
+        changed |= more
+
+    new_nodes = [n for key in groups if key in changed for n in keep[key] if n.node_id not in reused]
+    vectors = dict(zip([n.node_id for n in new_nodes], _embed_nodes(new_nodes))) if new_nodes else {}
+    vectors.update(reused)
 
+    nodes, blocks, sources, owner = [], [], {}, {}
+    for key, (h, _) in groups.items():
+        if key in changed:
+            part = keep[key]
+            vecs = np.asarray([vectors[n.node_id] for n in part], dtype=np.float32)
+            entry = {"hash": h, "nodes": [n.node_id for n in part]}
+            if key in page_dup:
+                entry["dup_of"] = page_dup[key]
+            if deps.get(key):
+                entry["deps"] = sorted(deps[key])
+            if skipped.get(key):
+                entry["skipped"] = skipped[key]
+        else:
+            part, vecs = copied[key]
+            entry = prev[key]
+        if part:
+            nodes.extend(part)
+            blocks.append(vecs.reshape(len(part), -1))
+        for n in part:
+            owner[n.node_id] = key
+        sources[key] = entry
 
+    # URLs alternativas: páginas casi idénticas + fuentes cuyos trozos se descartaron
+    page_alts: dict[str, set] = {}
+    for key, rep in page_dup.items():
+        page_alts.setdefault(rep, set()).add(url_of[key])
+    node_alts: dict[str, set] = {}
+    for key, entry in sources.items():
+        for nid in entry.get("deps", []):
+            node_alts.setdefault(nid, set()).add(url_of[key])
+    with_alts = 0
+    for n in nodes:
+        alt = page_alts.get(owner[n.node_id], set()) | node_alts.get(n.node_id, set())
+        alt.discard(n.metadata.get("source", ""))
+        if alt:
+            with_alts += 1
+            n.metadata["alt_sources"] = sorted(alt)
+            for excluded in (n.excluded_embed_metadata_keys, n.excluded_llm_metadata_keys):
+                if "alt_sources" not in excluded:
+                    excluded.append("alt_sources")
+        else:
+            n.metadata.pop("alt_sources", None)
 
+    if not nodes:
+        raise NothingToIndex(f"no hay nodos que indexar: {len(groups)} fuentes, todas duplicadas o sin texto")
+    write_sources(persist_dir, sources)
+    write_binary_store(persist_dir, nodes, np.vstack(blocks), model_name=EMBEDDING_MODEL)
+    print(f"✅ Índice guardado en {persist_dir} ({len(nodes)} nodos, {len(new_nodes)} embebidos, "
+          f"{len(reused)} reutilizados)")
+    if DEDUPE_ENABLED:
+        total = sum(e.get("skipped", 0) for e in sources.values())
+        print(f"🧬 Casi-duplicados: {len(page_dup)} páginas agrupadas con otra, "
+              f"{with_alts} nodos con URLs alternativas | trozos sin embeber: "
+              f"{sum(skipped.values())} en esta corrida, {total} en el índice")
+
+def reconstruir_indice(offline: bool = OFFLINE, full: bool = False) -> str:
+    """Mapeo + indexación en una versión NUEVA de STORAGE_DIR (incremental).
+
+    Solo se trocean y embeben las fuentes (páginas / fichas / documentos)
+    nuevas o cuyo contenido cambió; las demás copian nodos y vectores de la
+    versión activa y las que desaparecieron del manifiesto se quitan. Sin
+    cambios no se escribe nada. Solo al terminar bien se publica (cambio
+    atómico del puntero CURRENT). Devuelve el directorio de la versión activa.
+    """
+    inicio = time.time()
+    build_map_and_catalog(offline)
+
+    # sin menú/pie repetido en cada página (la plantilla se indexa una vez)
+    docs_pages = strip_boilerplate(_load_all_html_from_manifest(offline, reuse_since=inicio))
+    docs_cards = _load_doc_cards_from_catalog()
+    # hojas del PAA → almacén columnar (filtros y sumas); no se embeben como texto
+    paa_files = build_paa_store(DOCS_DIR, urls=doc_urls()) if PAA_ENABLED else set()
+    docs_files = cargar_documentos_locales(excluir=paa_files)   # texto de PDF/XLS/XLSX (caché por hash)
+    documentos = docs_pages + docs_cards + docs_files
+
+    if not documentos:
+        documentos = [Document(text="Contenido básico del sitio UESVALLE.", metadata={"source": "placeholder"})]
+
+    groups = group_sources(documentos)
+    page_dup = _page_duplicates(groups)
+    store, prev = _previous(full)
+    if prev is None:
+        changed = set(groups)
+        print(f"🧮 {len(groups)} fuentes: indexación completa")
+    else:
+        changed = _changed_sources(groups, prev, page_dup)
+        removed = [k for k in prev if k not in groups]
+        print(f"🧮 {len(groups)} fuentes: {len(changed)} nuevas/cambiadas, "
+              f"{len(groups) - len(changed)} sin cambios, {len(removed)} eliminadas")
+        if not changed and not removed:
+            print(f"✅ Sin cambios: se mantiene {os.path.basename(current_dir())} "
+                  f"({time.time() - inicio:.1f}s, nada embebido)")
+            return current_dir()
+
+    destino = new_version_dir()
+    print(f"🧠 Generando índice con {len(documentos)} documentos en {destino}…")
+    try:
+        _build_index(groups, changed, store, prev, destino, page_dup)
+    except NothingToIndex as e:
+        shutil.rmtree(destino, ignore_errors=True)
+        print(f"⚠️ {e}; se mantiene la versión activa")
+        raise
+    except Exception:
+        shutil.rmtree(destino, ignore_errors=True)
+        raise
+    publish(destino)
+    borradas = gc(keep=STORAGE_VERSIONS_KEEP)
+    print(f"🔀 Versión activa: {os.path.basename(destino)} | versiones borradas: {len(borradas)} "
+          f"| {time.time() - inicio:.1f}s")
+    return destino
+
+def crear_o_cargar_indice(offline: bool = OFFLINE):
+    # Siempre (re)construir manifiestos/catálogos y reindexar lo que cambió
+    reconstruir_indice(offline)
+
+    print("📚 Cargando índice…")
+    _configure()
+    return load_index(current_dir(), Settings.embed_model)
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Mapeo + índice del sitio UESVALLE")
+    ap.add_argument("--rebuild", action="store_true",
+                    help="reindexar (incremental) en una versión nueva y publicarla (la usa la app web)")
+    ap.add_argument("--offline", action="store_true", default=OFFLINE,
+                    help="no tocar el sitio: mapear e indexar desde el almacén de páginas")
+    ap.add_argument("--full", action="store_true",
+                    help="re-embeber todo (ignorar lo que ya tiene la versión activa)")
+    args = ap.parse_args()
+    if args.rebuild:
+        reconstruir_indice(args.offline, full=args.full)
+    else:
+        crear_o_cargar_indice(args.offline)
+    print("🎉 ¡Índice listo!")
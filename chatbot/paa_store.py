@@ -0,0 +1,449 @@
+# chatbot/paa_store.py
+# -----------------------------------------------------------------------------
+# Plan Anual de Adquisiciones (PAA): tablas columnares + preguntas de filtro/suma
+# -----------------------------------------------------------------------------
+# - Las hojas XLS/XLSX del PAA (un formato distinto casi cada año) se leen por
+#   encabezado: se busca la fila con "Descripción" y "Valor total estimado" y
+#   cada columna se reconoce por su nombre (español o inglés).
+# - Se guardan como columnas NumPy tipadas (año, mes, valores, segmento UNSPSC)
+#   y columnas de texto codificadas por diccionario (códigos int32 + valores
+#   únicos) en un solo PAA_STORE_PATH (.npz, publicado con os.replace). Se
+#   reconstruye solo si cambia el hash de alguna hoja.
+# - Varias versiones del mismo año (V2, V3…): cuenta solo la última.
+# - Preguntas ("¿cuánto suma el PAA 2025 para obra?", "¿qué compras hay en
+#   junio?"): año, mes, modalidad y términos → máscaras vectorizadas; los
+#   filtros de texto se evalúan sobre el diccionario y se expanden con los
+#   códigos. Sin coincidencias, o sin operación ni filtro ("¿qué es el PAA?"),
+#   se devuelve None (sigue la búsqueda semántica).
+# -----------------------------------------------------------------------------
+
+import datetime
+import json
+import os
+import re
+import zipfile
+
+import numpy as np
+
+from chatbot.config import PAA_MAX_ROWS, PAA_STORE_PATH
+from chatbot.doc_extract import file_sha256
+from chatbot.text_utils import norm_text, tokens_of_norm
+
+STORE_VERSION = 2   # 2: la fuente sin URL es el nombre del archivo, no su ruta
+# errores de un .npz dañado o copiado a medias
+LOAD_ERRORS = (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile)
+TEXT_COLUMNS = ("unspsc", "descripcion", "modalidad", "fuente", "estado", "dependencia", "contacto", "archivo")
+
+MESES = ("enero", "febrero", "marzo", "abril", "mayo", "junio", "julio",
+         "agosto", "septiembre", "octubre", "noviembre", "diciembre")
+_MONTHS = {m: i + 1 for i, m in enumerate(MESES)}
+_MONTHS.update({m: i + 1 for i, m in enumerate((
+    "january", "february", "march", "april", "may", "june", "july",
+    "august", "september", "october", "november", "december"))})
+_MONTHS["setiembre"] = 9
+
+# columna → patrones (regex sobre el encabezado normalizado); gana la primera
+# columna de la hoja que coincida
+_HEADERS = {
+    "unspsc": (r"unspsc",),
+    "descripcion": (r"^descripcion", r"^description"),
+    "mes": (r"fecha estimada de inicio", r"begin date"),
+    "duracion": (r"^duracion", r"duration date \(number"),
+    "modalidad": (r"^modalidad", r"^type$"),
+    "fuente": (r"fuente de los recursos", r"budget origin"),
+    "valor_total": (r"valor total", r"expected total value"),
+    "valor_vigencia": (r"vigencia actual", r"actual budget"),
+    "estado": (r"estado del proceso",),
+    "dependencia": (r"proceso responsable", r"unidad de contratacion", r"^bo \(reference\)"),
+    "contacto": (r"datos de contacto", r"responsable name"),
+}
+
+# temas → segmentos UNSPSC (además de buscar la palabra en la descripción)
+TOPICS = {
+    "obra": {72}, "construccion": {72}, "adecuacion": {72},
+    "vigilancia": {92}, "seguridad": {92},
+    "aseo": {76}, "limpieza": {76},
+    "laboratorio": {41},
+    "computador": {43}, "software": {43}, "tecnologia": {43},
+    "papeleria": {44},
+    "transporte": {78},
+}
+
+MODALIDADES = {
+    "minima cuantia": "mínima cuantía",
+    "contratacion directa": "contratación directa",
+    "licitacion": "licitación pública",
+    "seleccion abreviada": "selección abreviada",
+    "concurso de meritos": "concurso de méritos",
+}
+
+# palabras de la pregunta que no filtran la descripción
+_VOCAB = {
+    "paa", "plan", "planes", "anual", "adquisicion", "adquisiciones", "adquisiones", "compra", "compras",
+    "contrato", "contratos", "contratar", "contratacion", "cuanto", "cuanta", "cuantos", "cuantas", "suma",
+    "suman", "sumar", "total", "totales", "valor", "valores", "monto", "presupuesto", "estimado", "estimada",
+    "previsto", "prevista", "previstos", "previstas", "programado", "programada", "programados",
+    "programadas", "cuales", "lista", "listar", "dime", "mes", "meses", "ano", "vigencia", "uesvalle",
+    "entidad", "gasta", "gastar", "invierte", "invertir", "inversion", "mayor", "mayores", "costosa",
+    "costosas", "costoso", "costosos", "caras", "principales", "numero", "inicio", "inician", "empiezan",
+    "proceso", "procesos", "modalidad", "cuesta", "cuestan", "vale", "valen", "tiene", "tienen", "van",
+    "hacer", "realizar", "pesos", "cual", "son",
+} | set(_MONTHS) | {w for k in MODALIDADES for w in k.split()}
+
+
+# ================================ lectura ===================================
+
+def _sheets(path: str):
+    """(nombre, filas) de cada hoja; filas = listas de valores de celda."""
+    if path.lower().endswith(".xlsx"):
+        from openpyxl import load_workbook
+
+        wb = load_workbook(path, read_only=True, data_only=True)
+        try:
+            for ws in wb.worksheets:
+                yield ws.title, [list(r) for r in ws.iter_rows(values_only=True)]
+        finally:
+            wb.close()
+    else:
+        import xlrd
+
+        book = xlrd.open_workbook(path)
+        for sh in book.sheets():
+            rows = []
+            for i in range(sh.nrows):
+                row = []
+                for c in sh.row(i):
+                    if c.ctype == xlrd.XL_CELL_DATE:
+                        row.append(xlrd.xldate.xldate_as_datetime(c.value, book.datemode))
+                    else:
+                        row.append(c.value)
+                rows.append(row)
+            yield sh.name, rows
+
+
+def _text(v) -> str:
+    if v is None:
+        return ""
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return " ".join(str(v).split())
+
+
+def _number(v) -> float:
+    if isinstance(v, (int, float)) and not isinstance(v, bool):
+        return float(v)
+    s = re.sub(r"[^\d,.\-]", "", _text(v))
+    if "," in s and "." in s:
+        s = s.replace(".", "").replace(",", ".")
+    elif s.count(".") > 1 or re.search(r"\.\d{3}$", s):
+        s = s.replace(".", "")
+    elif "," in s:
+        s = s.replace(",", "" if re.search(r",\d{3}$", s) else ".")
+    try:
+        return float(s)
+    except ValueError:
+        return float("nan")
+
+
+def _month(v) -> int:
+    if isinstance(v, (datetime.datetime, datetime.date)):
+        return v.month
+    n = _number(v)
+    if n == n and 1 <= n <= 12 and float(n).is_integer():
+        return int(n)
+    for w in norm_text(_text(v)).split():
+        if w in _MONTHS:
+            return _MONTHS[w]
+    return 0
+
+
+def _header_map(row) -> dict[str, int]:
+    cols = {}
+    for j, cell in enumerate(row):
+        h = norm_text(_text(cell))
+        if not h:
+            continue
+        for col, patterns in _HEADERS.items():
+            if col not in cols and any(re.search(p, h) for p in patterns):
+                cols[col] = j
+                break
+    return cols
+
+
+def read_paa_sheet(path: str) -> list[dict]:
+    """Filas de la hoja del PAA con más adquisiciones ([] si no es un PAA)."""
+    best = []
+    for _, rows in _sheets(path):
+        for i, row in enumerate(rows[:40]):
+            cols = _header_map(row)
+            if "descripcion" in cols and "valor_total" in cols:
+                break
+        else:
+            continue
+        out = []
+        for k, row in enumerate(rows[i + 1:], start=i + 2):
+            cell = lambda c: row[cols[c]] if c in cols and cols[c] < len(row) else None
+            desc, total = _text(cell("descripcion")), _number(cell("valor_total"))
+            if not desc or total != total:
+                continue
+            out.append({
+                "fila": k, "descripcion": desc, "valor_total": total,
+                "valor_vigencia": _number(cell("valor_vigencia")),
+                "mes": _month(cell("mes")), "duracion": _number(cell("duracion")),
+                **{c: _text(cell(c)) for c in ("unspsc", "modalidad", "fuente", "estado", "dependencia", "contacto")},
+            })
+        if len(out) > len(best):
+            best = out
+    return best
+
+
+def _year_version(name: str) -> tuple[int, int]:
+    m = re.search(r"(20\d\d)", name)
+    v = re.search(r"(?:\bv|versi[oó]n\s*)(\d+)", name, re.IGNORECASE)
+    return (int(m.group(1)) if m else 0), (int(v.group(1)) if v else 1)
+
+
+def _encode(values: list[str]) -> tuple[np.ndarray, list[str]]:
+    """Codificación por diccionario: (códigos int32, valores únicos)."""
+    index: dict[str, int] = {}
+    codes = np.fromiter((index.setdefault(v, len(index)) for v in values), dtype=np.int32, count=len(values))
+    return codes, list(index)
+
+
+# ================================ almacén ===================================
+
+class PaaStore:
+    """Adquisiciones de todas las hojas del PAA, por columnas."""
+
+    def __init__(self, cols: dict[str, np.ndarray], dicts: dict[str, list[str]], meta: dict):
+        self.cols, self.dicts, self.meta = cols, dicts, meta
+        # diccionarios normalizados (una vez): los filtros de texto son vectoriales
+        self._norm = {c: np.array([norm_text(v.replace("_", " ")) for v in dicts[c]] or [""])
+                      for c in ("descripcion", "modalidad")}
+        vig = cols["vigente"]
+        self.years = sorted(set(cols["anio"][vig].tolist()) - {0})
+
+    def __len__(self) -> int:
+        return len(self.cols["anio"])
+
+    def text(self, col: str, i: int) -> str:
+        return self.dicts[col][self.cols[col][i]]
+
+    # ------------------------------ persistencia -----------------------------
+
+    @classmethod
+    def from_rows(cls, rows: list[dict], meta: dict) -> "PaaStore":
+        cols = {
+            "anio": np.array([r["anio"] for r in rows], dtype=np.int16),
+            "vigente": np.array([r["vigente"] for r in rows], dtype=bool),
+            "fila": np.array([r["fila"] for r in rows], dtype=np.int32),
+            "mes": np.array([r["mes"] for r in rows], dtype=np.int8),
+            "duracion": np.array([r["duracion"] for r in rows], dtype=np.float32),
+            "valor_total": np.array([r["valor_total"] for r in rows], dtype=np.float64),
+            "valor_vigencia": np.array([r["valor_vigencia"] for r in rows], dtype=np.float64),
+            "segmento": np.array([int(m.group(1)[:2]) if (m := re.search(r"(\d{8})", r["unspsc"])) else 0
+                                  for r in rows], dtype=np.int8),
+        }
+        dicts = {}
+        for c in TEXT_COLUMNS:
+            cols[c], dicts[c] = _encode([r[c] for r in rows])
+        return cls(cols, dicts, meta)
+
+    def save(self, path: str = PAA_STORE_PATH):
+        arrays = dict(self.cols)
+        for c, values in self.dicts.items():
+            # UTF-8 separado por "\n" (_text ya compactó los espacios); un
+            # arreglo de str de NumPy ocuparía 4 bytes × el valor más largo
+            arrays[f"{c}__dict"] = np.frombuffer("\n".join(values).encode("utf-8"), dtype=np.uint8)
+        arrays["__meta__"] = np.array(json.dumps(self.meta, ensure_ascii=False))
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str = PAA_STORE_PATH) -> "PaaStore":
+        with np.load(path, allow_pickle=False) as z:
+            meta = json.loads(str(z["__meta__"]))
+            dicts = {c: z[f"{c}__dict"].tobytes().decode("utf-8").split("\n") for c in TEXT_COLUMNS}
+            cols = {k: z[k] for k in z.files if k != "__meta__" and not k.endswith("__dict")}
+        return cls(cols, dicts, meta)
+
+    # -------------------------------- consultas ------------------------------
+
+    def _dict_mask(self, col: str, needle: str) -> np.ndarray:
+        """Filas cuyo texto (normalizado) contiene `needle`."""
+        hit = np.char.find(self._norm[col], needle) >= 0
+        return hit[self.cols[col]]
+
+    def select(self, years=None, months=None, modalidad: str | None = None,
+               terms: list[str] = ()) -> np.ndarray:
+        """Máscara de filas vigentes que cumplen todos los filtros."""
+        m = self.cols["vigente"].copy()
+        if years:
+            m &= np.isin(self.cols["anio"], list(years))
+        if months:
+            m &= np.isin(self.cols["mes"], list(months))
+        if modalidad:
+            m &= self._dict_mask("modalidad", modalidad)
+        for t in terms:
+            tm = self._dict_mask("descripcion", t)
+            if t in TOPICS:
+                tm |= np.isin(self.cols["segmento"], list(TOPICS[t]))
+            m &= tm
+        return m
+
+    def answer(self, question: str) -> str | None:
+        """Respuesta a una pregunta de filtro/suma sobre el PAA, o None."""
+        q = parse_question(question)
+        if q is None or not self.years:
+            return None
+        years = q["years"] or [self.years[-1]]
+        mask = self.select(years, q["months"], q["modalidad"], q["terms"])
+        idx = np.flatnonzero(mask)
+        if not len(idx):
+            return None
+        return self._format(q, years, idx)
+
+    def _format(self, q: dict, years: list[int], idx: np.ndarray) -> str:
+        total = float(np.nansum(self.cols["valor_total"][idx]))
+        files = sorted({self.text("archivo", i) for i in idx})
+        head = f"PAA {' y '.join(str(y) for y in sorted(years))}"
+        n = len(idx)
+        pl, pln = ("", "") if n == 1 else ("s", "n")
+        desc = ""
+        if q["terms"]:
+            desc += f" relacionada{pl} con «{' '.join(q['raw_terms'])}»"
+        if q["months"]:
+            desc += f" que inicia{pln} en {' y '.join(MESES[m - 1] for m in sorted(q['months']))}"
+        if q["modalidad"]:
+            desc += f" por {MODALIDADES[q['modalidad']]}"
+        qty = f"{n} adquisición" if n == 1 else f"{n} adquisiciones"
+        if q["op"] == "sum":
+            lines = [f"Según el {head}, el valor total estimado de {'la' if n == 1 else 'las'} {qty}{desc} "
+                     f"es {_pesos(total)}."]
+        elif q["op"] == "count":
+            lines = [f"Según el {head}, hay {qty}{desc}, por {_pesos(total)} en total."]
+        else:
+            lines = [f"Según el {head}, hay {qty}{desc} (valor total estimado {_pesos(total)}):"]
+            if q["op"] == "top":
+                order = idx[np.argsort(-np.nan_to_num(self.cols["valor_total"][idx]), kind="stable")]
+            else:
+                order = idx[np.lexsort((idx, self.cols["mes"][idx]))]
+            for i in order[:PAA_MAX_ROWS]:
+                mes = self.cols["mes"][i]
+                parts = [self.text("descripcion", i)]
+                if mes:
+                    parts.append(MESES[mes - 1])
+                if self.text("modalidad", i):
+                    parts.append(self.text("modalidad", i).replace("_", " ").rstrip(". ").lower())
+                parts.append(_pesos(float(self.cols["valor_total"][i])))
+                lines.append("- " + " — ".join(parts))
+            if n > PAA_MAX_ROWS:
+                lines.append(f"… y {n - PAA_MAX_ROWS} más.")
+        lines.append("Fuente: " + "; ".join(files))
+        return "\n".join(lines)
+
+
+def _pesos(v: float) -> str:
+    return "$" + f"{v:,.0f}".replace(",", ".")
+
+
+# ============================ preguntas → filtros ===========================
+
+def parse_question(question: str) -> dict | None:
+    """Filtros y operación de una pregunta sobre el PAA (None si no es del PAA)."""
+    qn = norm_text(question)
+    words = re.findall(r"[a-z0-9]+", qn)
+    ws = set(words)
+    if not (ws & {"paa", "adquisicion", "adquisiciones", "compra", "compras"}
+            or "plan anual" in qn or "plan de compras" in qn):
+        return None
+    if ws & {"cuantos", "cuantas"} or "numero de" in qn:
+        op = "count"
+    elif ws & {"suma", "suman", "sumar", "total", "monto", "presupuesto"} or (
+            "cuanto" in ws and ws & {"valor", "vale", "valen", "cuesta", "cuestan", "invierte", "gasta", "es"}):
+        op = "sum"
+    elif ws & {"mayor", "mayores", "costosa", "costosas", "costoso", "costosos", "caras", "principales"}:
+        op = "top"
+    else:
+        op = "list"
+    modalidad = next((k for k in MODALIDADES if k in qn), None)
+    raw_terms = [t for t in tokens_of_norm(qn) if t not in _VOCAB and not t.isdigit()]
+    raw_terms.sort(key=qn.find)
+    q = {
+        "op": op,
+        "years": sorted({int(w) for w in words if re.fullmatch(r"20\d\d", w)}),
+        "months": sorted({_MONTHS[w] for w in words if w in _MONTHS}),
+        "modalidad": modalidad,
+        "raw_terms": raw_terms,
+        "terms": [_stem(t) for t in raw_terms],
+    }
+    # sin operación ni filtro ("¿qué es el plan anual de adquisiciones?") es
+    # una pregunta de contenido: va a la búsqueda semántica
+    if op == "list" and not (q["years"] or q["months"] or modalidad or raw_terms):
+        return None
+    return q
+
+
+def _stem(t: str) -> str:
+    """Plural → singular simple ("termometros" también encuentra "termometro")."""
+    if t in TOPICS or len(t) <= 4:
+        return t
+    if t.endswith("es") and t[:-2] in TOPICS:
+        return t[:-2]
+    return t[:-1] if t.endswith("s") else t
+
+
+# ================================ construcción ==============================
+
+def build_paa_store(directorio: str, urls: dict[str, str] | None = None,
+                    path: str = PAA_STORE_PATH) -> set[str]:
+    """Reconstruye el almacén con las hojas del PAA de `directorio` (si cambiaron).
+
+    Devuelve los nombres de archivo que quedaron en el almacén (esas hojas ya
+    no hace falta embeberlas como texto). `urls`: nombre → URL publicada.
+    """
+    if not directorio or not os.path.isdir(directorio):
+        return set()
+    names = sorted(n for n in os.listdir(directorio) if n.lower().endswith((".xlsx", ".xls")))
+    hashes = {n: file_sha256(os.path.join(directorio, n)) for n in names}
+    if os.path.exists(path):
+        try:
+            old = PaaStore.load(path).meta
+        except LOAD_ERRORS:
+            old = {}
+        if old.get("v") == STORE_VERSION and old.get("hashes") == hashes:
+            print(f"📊 PAA: sin cambios ({len(old.get('files', []))} hojas)")
+            return set(old.get("files", []))
+
+    tables = {}
+    for n in names:
+        try:
+            rows = read_paa_sheet(os.path.join(directorio, n))
+        except ImportError as e:
+            print(f"ℹ️ PAA: falta {e.name} para leer {n}")
+            continue
+        except Exception as e:
+            print(f"⚠️ PAA: no se pudo leer {n}: {e}")
+            continue
+        if rows:
+            tables[n] = rows
+    latest = {}
+    for n in tables:
+        year, version = _year_version(n)
+        latest[year] = max(latest.get(year, (0, "")), (version, n))
+
+    rows = []
+    for n, table in tables.items():
+        year, _ = _year_version(n)
+        for r in table:
+            rows.append({**r, "anio": year, "vigente": latest[year][1] == n,
+                         "archivo": (urls or {}).get(n) or n})
+    store = PaaStore.from_rows(rows, {"v": STORE_VERSION, "hashes": hashes, "files": sorted(tables)})
+    store.save(path)
+    vig = int(store.cols["vigente"].sum())
+    print(f"📊 PAA: {len(rows)} adquisiciones de {len(tables)} hojas ({vig} en la última versión "
+          f"de cada año: {', '.join(str(y) for y in store.years)}) → {path}")
+    return set(tables)
@@ -0,0 +1,162 @@
+# chatbot/page_store.py
+# -----------------------------------------------------------------------------
+# Almacén local de páginas crudas (se descarga una vez, se procesa N veces)
+# -----------------------------------------------------------------------------
+# Cada URL (normalizada) guarda la última respuesta tal cual llegó:
+#   data/page_store/<ab>/<sha1>.json     url, estado, cabeceras, validadores…
+#   data/page_store/<ab>/<sha1>.body.z   cuerpo comprimido (zlib)
+#   data/page_store/<ab>/<sha1>.derived.json  lo que cada etapa extrajo
+# La descarga (Fetcher + HttpCache) escribe aquí; el catálogo, la extracción
+# de texto y el índice leen de aquí. Con el modo offline se puede rehacer
+# extracción/índice sin tocar el sitio.
+# -----------------------------------------------------------------------------
+
+import hashlib
+import json
+import os
+import threading
+import zlib
+from typing import Any, Iterator
+from urllib.parse import urlsplit, urlunsplit
+
+from requests.structures import CaseInsensitiveDict
+
+from chatbot.config import PAGE_STORE_DIR
+
+KEEP_HEADERS = ("Content-Type", "Content-Length", "ETag", "Last-Modified",
+                "Cache-Control", "Expires", "Date")
+
+
+def store_key(url: str) -> str:
+    """Esquema/host en minúsculas, sin fragmento; la query SÍ cuenta."""
+    p = urlsplit(url.strip())
+    return urlunsplit(((p.scheme or "https").lower(), p.netloc.lower(), p.path or "/", p.query, ""))
+
+
+def _write_atomic(path: str, data: bytes):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class HTTPStatusError(Exception):
+    pass
+
+
+class StoredPage:
+    """Respuesta guardada con la interfaz de requests.Response que usan las etapas."""
+
+    def __init__(self, meta: dict, body_path: str, from_cache: str = "store"):
+        self.url = meta.get("final_url") or meta.get("url", "")
+        self.status_code = meta.get("status", 200)
+        self.headers = CaseInsensitiveDict(meta.get("headers", {}))
+        self.encoding = meta.get("encoding") or "utf-8"
+        self.body_sha = meta.get("sha1", "")
+        self.from_cache = from_cache
+        self._body_path = body_path
+        self._content: bytes | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def content(self) -> bytes:
+        if self._content is None:
+            with open(self._body_path, "rb") as f:
+                self._content = zlib.decompress(f.read())
+        return self._content
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors="replace")
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise HTTPStatusError(f"{self.status_code} para {self.url}")
+
+
+class PageStore:
+    def __init__(self, root: str = PAGE_STORE_DIR):
+        self.root = root
+
+    def _base(self, url: str) -> str:
+        k = hashlib.sha1(store_key(url).encode("utf-8")).hexdigest()
+        return os.path.join(self.root, k[:2], k)
+
+    # -------------------------------- páginas --------------------------------
+
+    def meta(self, url: str) -> dict | None:
+        base = self._base(url)
+        try:
+            with open(base + ".json", "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return meta if os.path.exists(base + ".body.z") else None
+
+    def page(self, url: str, meta: dict | None = None, source: str = "store") -> StoredPage | None:
+        meta = meta or self.meta(url)
+        return StoredPage(meta, self._base(url) + ".body.z", source) if meta else None
+
+    def put(self, url: str, r, **extra) -> dict:
+        """Guarda una respuesta de requests (cualquier estado)."""
+        base = self._base(url)
+        content = r.content or b""
+        meta = {
+            "url": store_key(url),
+            "final_url": getattr(r, "url", "") or url,
+            "status": r.status_code,
+            "headers": {h: r.headers[h] for h in KEEP_HEADERS if h in r.headers},
+            "encoding": r.encoding or (r.apparent_encoding if content else None),
+            "sha1": hashlib.sha1(content).hexdigest(),
+            "size": len(content),
+            **extra,
+        }
+        os.makedirs(os.path.dirname(base), exist_ok=True)
+        _write_atomic(base + ".body.z", zlib.compress(content, 6))
+        self.touch(url, meta)
+        return meta
+
+    def touch(self, url: str, meta: dict):
+        """Reescribe solo los metadatos (p. ej. tras un 304)."""
+        _write_atomic(self._base(url) + ".json", json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+
+    def urls(self) -> Iterator[str]:
+        if not os.path.isdir(self.root):
+            return
+        for sub in sorted(os.listdir(self.root)):
+            d = os.path.join(self.root, sub)
+            if not os.path.isdir(d):
+                continue
+            for name in sorted(os.listdir(d)):
+                if name.endswith(".json") and not name.endswith(".derived.json"):
+                    try:
+                        with open(os.path.join(d, name), "r", encoding="utf-8") as f:
+                            yield json.load(f)["url"]
+                    except (OSError, ValueError, KeyError):
+                        continue
+
+    # ------------------------------- derivados -------------------------------
+
+    def get_derived(self, url: str, ns: str, sha: str) -> Any | None:
+        try:
+            with open(self._base(url) + ".derived.json", "r", encoding="utf-8") as f:
+                entry = json.load(f).get(ns)
+        except (OSError, ValueError):
+            return None
+        if not entry or entry.get("sha1") != sha:
+            return None
+        return entry["value"]
+
+    def put_derived(self, url: str, ns: str, sha: str, value: Any):
+        path = self._base(url) + ".derived.json"
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        data[ns] = {"sha1": sha, "value": value}
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _write_atomic(path, json.dumps(data, ensure_ascii=False).encode("utf-8"))
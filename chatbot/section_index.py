@@ -0,0 +1,194 @@
+# chatbot/section_index.py
+# -----------------------------------------------------------------------------
+# Índice léxico precompilado para resolver secciones (preguntas de ENLACE)
+# -----------------------------------------------------------------------------
+# Se construye UNA vez al cargar el catálogo:
+#   - campos ya normalizados (texto, tokens, tokens de la ruta, profundidad)
+#   - índice invertido de tokens (texto + ruta)
+#   - índice de trigramas de caracteres para generar candidatos difusos
+# En cada consulta solo se puntúa un conjunto pequeño de candidatos. El resto
+# se descarta con cotas superiores de difflib (real_quick_ratio/quick_ratio),
+# así que la URL elegida es EXACTAMENTE la misma que con el barrido lineal.
+# -----------------------------------------------------------------------------
+
+import bisect
+import difflib
+from collections import Counter, defaultdict
+
+from chatbot.text_utils import norm_text, path_depth, path_tokens, tokens_of_norm
+
+# Umbral exigente para evitar falsos positivos
+MIN_SCORE = 0.55
+
+_NGRAM = 3
+_NGRAM_TOP = 32          # candidatos difusos a puntuar primero
+_NGRAM_MAX_DF = 0.15     # trigramas más frecuentes que esto no aportan
+_EPS = 1e-9
+
+
+def _ngrams(s: str) -> set[str]:
+    if len(s) < _NGRAM:
+        return {s} if s else set()
+    return {s[i:i + _NGRAM] for i in range(len(s) - _NGRAM + 1)}
+
+
+def _depth_term(depth: int) -> float:
+    """Preferir rutas internas (y penalizar fuerte la home)."""
+    s = min(depth, 6) * 0.05
+    if depth == 0:
+        s -= 0.25
+    return s
+
+
+def _length_band(la: int, f: float) -> tuple[float, float]:
+    """Longitudes lb con 2*min(la,lb)/(la+lb) >= f (cota real_quick_ratio)."""
+    if f <= 0:
+        return 0.0, float("inf")
+    lo = f * la / (2.0 - f)
+    hi = la * (2.0 - f) / f
+    return lo * (1 - 1e-6) - 1, hi * (1 + 1e-6) + 1
+
+
+class SectionIndex:
+    """Índice de secciones con la misma puntuación que el barrido lineal."""
+
+    def __init__(self, items: list[dict]):
+        self.items = items
+        self._norm: list[str] = []
+        self._toks: list[set[str]] = []
+        self._txt_toks: list[set[str]] = []
+        self._path_toks: list[set[str]] = []
+        self._depth: list[int] = []
+        self._by_token: dict[str, list[int]] = defaultdict(list)
+        self._by_path: dict[str, list[int]] = defaultdict(list)
+        self._by_gram: dict[str, list[int]] = defaultdict(list)
+
+        for i, it in enumerate(items):
+            cand_text = " ".join([
+                it.get("text", ""),
+                it.get("page_title", ""),
+                it.get("h1", ""),
+                it.get("section", ""),
+            ]).strip()
+            n = norm_text(cand_text)
+            toks = tokens_of_norm(n)
+            ptoks = path_tokens(it.get("url", ""))
+            self._norm.append(n)
+            self._toks.append(toks)
+            self._txt_toks.append(tokens_of_norm(norm_text(it.get("text", ""))))
+            self._path_toks.append(ptoks)
+            self._depth.append(path_depth(it.get("url", "")))
+            for t in toks:
+                self._by_token[t].append(i)
+            for t in ptoks:
+                self._by_path[t].append(i)
+            for g in _ngrams(n):
+                self._by_gram[g].append(i)
+
+        # Por cada término de profundidad: longitudes ordenadas (para acotar)
+        groups: dict[float, list[tuple[int, int]]] = defaultdict(list)
+        for i, n in enumerate(self._norm):
+            groups[_depth_term(self._depth[i])].append((len(n), i))
+        self._groups = []
+        for d, pairs in groups.items():
+            pairs.sort()
+            self._groups.append((d, [p[0] for p in pairs], [p[1] for p in pairs]))
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    # ------------------------------ puntuación -------------------------------
+
+    def _bonus(self, i: int, q_toks: set[str]) -> tuple[float, float, float]:
+        """(jaccard, bonus texto, bonus ruta) del ítem i."""
+        ct = self._toks[i]
+        jacc = (len(q_toks & ct) / len(q_toks | ct)) if (q_toks and ct) else 0.0
+        b_txt = 0.20 if (q_toks and q_toks.issubset(self._txt_toks[i])) else 0.0
+        b_path = 0.15 if (q_toks and len(q_toks & self._path_toks[i]) > 0) else 0.0
+        return jacc, b_txt, b_path
+
+    def _score(self, i: int, fuzzy: float, q_toks: set[str]) -> float:
+        # Mismo orden de sumas que el barrido original (resultados idénticos)
+        jacc, b_txt, b_path = self._bonus(i, q_toks)
+        s = 0.6 * fuzzy + 0.4 * jacc
+        if b_txt:
+            s += 0.20
+        if b_path:
+            s += 0.15
+        depth = self._depth[i]
+        s += min(depth, 6) * 0.05
+        if depth == 0:
+            s -= 0.25
+        return s
+
+    def _candidates(self, qn: str, q_toks: set[str]) -> set[int]:
+        cand: set[int] = set()
+        for t in q_toks:
+            cand.update(self._by_token.get(t, ()))
+            cand.update(self._by_path.get(t, ()))
+        # trigramas más selectivos primero; los muy frecuentes se ignoran
+        max_df = max(_NGRAM_TOP, int(len(self.items) * _NGRAM_MAX_DF))
+        counts: Counter = Counter()
+        for g in _ngrams(qn):
+            post = self._by_gram.get(g)
+            if post and len(post) <= max_df:
+                counts.update(post)
+        cand.update(i for i, _ in counts.most_common(_NGRAM_TOP))
+        return cand
+
+    def resolve(self, q: str) -> str | None:
+        """Devuelve la URL más probable de la sección pedida, de forma determinista."""
+        if not self.items:
+            return None
+
+        qn = norm_text(q)
+        q_toks = tokens_of_norm(qn)
+        la = len(qn)
+        best_s, best_i = 0.0, -1
+
+        def thr() -> float:
+            return max(MIN_SCORE, best_s) - _EPS
+
+        def consider(i: int, fixed: float):
+            """Puntúa i si sus cotas superiores aún pueden ganar."""
+            nonlocal best_s, best_i
+            sm = difflib.SequenceMatcher(None, qn, self._norm[i])
+            if 0.6 * sm.real_quick_ratio() + fixed < thr():
+                return
+            if 0.6 * sm.quick_ratio() + fixed < thr():
+                return
+            s = self._score(i, sm.ratio(), q_toks)
+            # en empate gana el primero del catálogo (como el barrido lineal)
+            if s > best_s or (s == best_s and best_i >= 0 and i < best_i):
+                best_s, best_i = s, i
+
+        # 1) candidatos por tokens/ruta/trigramas, ordenados por cota superior
+        cand = self._candidates(qn, q_toks)
+        ranked = []
+        for i in cand:
+            jacc, b_txt, b_path = self._bonus(i, q_toks)
+            fixed = 0.4 * jacc + b_txt + b_path + _depth_term(self._depth[i])
+            lb = len(self._norm[i])
+            rqr = (2.0 * min(la, lb) / (la + lb)) if (la + lb) else 1.0
+            ranked.append((0.6 * rqr + fixed, i, fixed))
+        ranked.sort(key=lambda x: (-x[0], x[1]))
+        for ub, i, fixed in ranked:
+            if ub < thr():
+                break
+            consider(i, fixed)
+
+        # 2) resto: sin tokens en común solo suman difuso + profundidad;
+        #    la cota real_quick_ratio limita las longitudes posibles.
+        for d, lens, idxs in self._groups:
+            f = (thr() - d) / 0.6
+            if f > 1.0 + _EPS:
+                continue
+            lo, hi = _length_band(la, f)
+            a = bisect.bisect_left(lens, lo)
+            b = bisect.bisect_right(lens, hi)
+            for j in range(a, b):
+                i = idxs[j]
+                if i not in cand:
+                    consider(i, d)
+
+        return self.items[best_i]["url"] if best_i >= 0 and best_s >= MIN_SCORE else None
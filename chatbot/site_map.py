@@ -2,22 +2,26 @@
 # Construye catálogos del sitio de dos formas:
 # A) Desde un archivo data/routes.txt con TODAS las rutas (preferente)
 # B) Con crawler BFS+sitemap (fallback si no hay routes.txt)
+# Los catálogos se escriben en JSON Lines a medida que se procesan las páginas
+# y se publican de forma atómica (ver chatbot/catalog.py).
 
-import json, time, xml.etree.ElementTree as ET, os
-from collections import deque
+import time, xml.etree.ElementTree as ET, os
 from urllib import robotparser
 from urllib.parse import urljoin, urlparse
 
-import requests
 from requests.exceptions import TooManyRedirects, ReadTimeout, ConnectTimeout
-from bs4 import BeautifulSoup
 
 from chatbot.config import (
-    BASE_URL, USER_AGENT, HTTP_TIMEOUT, CRAWL_MAX_DEPTH,
+    BASE_URL, USER_AGENT, CRAWL_MAX_DEPTH,
     RESPECT_ROBOTS, URL_MANIFEST_PATH, DOC_CATALOG_PATH,
     SECTIONS_CATALOG_PATH, MAX_PAGINAS_RASTREO, DOC_EXTS,
-    ROUTES_FILE_PATH, USE_EXTERNAL_ROUTES
+    ROUTES_FILE_PATH, USE_EXTERNAL_ROUTES, OFFLINE, CRAWL_RESUME
 )
+from chatbot.catalog import CatalogWriter
+from chatbot.crawl_state import CrawlState
+from chatbot.fetcher import Fetcher
+from chatbot.html_extract import PageExtract, backend_name, extract
+from chatbot.http_cache import default_cache
 from chatbot.url_utils import normalize_url, path_to_section
 
 HEADERS = {"User-Agent": USER_AGENT}
@@ -51,13 +55,26 @@ def _looks_doc(link: str) -> bool:
     l = link.lower()
     return any(l.endswith(ext) for ext in DOC_EXTS)
 
-def _page_title_and_h1(soup: BeautifulSoup) -> tuple[str, str]:
-    title = (soup.title.string.strip() if soup.title and soup.title.string else "")
-    h1 = ""
-    h1_tag = soup.find("h1")
-    if h1_tag:
-        h1 = " ".join(h1_tag.get_text(" ", strip=True).split())
-    return title, h1
+def _doc_links(url: str, page: PageExtract) -> list[dict]:
+    """Enlaces a documentos internos de la página, con el texto de su contenedor."""
+    docs = []
+    for a in page.links:
+        href = urljoin(url, a.href.split("#")[0])
+        if not _is_internal(href) or not _looks_doc(href):
+            continue
+        link_text = " ".join(a.text.split())
+        ctx = a.context
+        ctx = " ".join(ctx.split()) if ctx is not None else link_text
+        docs.append({
+            "doc_url": normalize_url(href),
+            "from_page": url,
+            "page_title": page.title or page.h1,
+            "h1": page.h1,
+            "link_text": link_text,
+            "context": ctx[:900],
+            "section": path_to_section(urlparse(url).path),
+        })
+    return docs
 
 # ----------------------------- A) DESDE routes.txt ----------------------------
 
@@ -81,9 +98,39 @@ def _load_routes_file() -> list[str]:
             uniq.append(u)
     return uniq
 
-def build_from_routes_file():
+def _parse_route_page(url: str, r) -> tuple[bool, dict | None, list[dict]]:
+    """(ok, sección, documentos) de una URL de routes.txt (corre en el worker)."""
+    ctype = r.headers.get("Content-Type", "").lower()
+    if r.status_code >= 400:
+        return False, None, []
+    section, docs = None, []
+
+    if "text/html" in ctype:
+        page = extract(r.text)
+        page_title, h1 = page.title, page.h1
+
+        # sección propia
+        label = page_title or h1 or path_to_section(urlparse(url).path)
+        section = {
+            "url": url,
+            "text": label,
+            "from_page": url,
+            "page_title": page_title or h1,
+            "h1": h1,
+            "section": path_to_section(urlparse(url).path),
+        }
+
+        # documentos
+        docs = _doc_links(url, page)
+    return True, section, docs
+
+def build_from_routes_file(fetcher: Fetcher | None = None, offline: bool = OFFLINE):
     """Construye manifiesto + catálogo de secciones (1 entrada por URL)
        + catálogo de documentos, recorriendo SOLO las URLs del routes.txt.
+       Las descargas son concurrentes y quedan en el almacén de páginas; los
+       resultados se recorren en el orden del archivo, así que los catálogos
+       no dependen del orden de llegada. `offline`: solo desde el almacén.
+       Devuelve (n_urls, n_docs, n_secciones), o None si no hay routes.txt.
     """
     routes = _load_routes_file()
     if not routes:
@@ -91,89 +138,63 @@ def build_from_routes_file():
 
     print(f"📄 routes.txt detectado: {len(routes)} URLs")
 
-    urls = []
-    sections, docs = [], []
-
-    err_404, err_other = 0, 0
-
-    for i, url in enumerate(routes, start=1):
+    pending = []
+    for url in routes:
         if any(b in url for b in BLOCKLIST_SUBSTR):
             print(f"⏭️  Skip por blocklist: {url}")
             continue
-        try:
-            r = requests.get(
-                url, headers=HEADERS, timeout=(5, 15), allow_redirects=True
-            )
-            ctype = r.headers.get("Content-Type", "").lower()
-            if r.status_code >= 400:
-                err_404 += 1
-                continue
-            urls.append(url)
-
-            if "text/html" in ctype:
-                soup = BeautifulSoup(r.text, "html.parser")
-                page_title, h1 = _page_title_and_h1(soup)
-
-                # sección propia
-                label = page_title or h1 or path_to_section(urlparse(url).path)
-                sections.append({
-                    "url": url,
-                    "text": label,
-                    "from_page": url,
-                    "page_title": page_title or h1,
-                    "h1": h1,
-                    "section": path_to_section(urlparse(url).path),
-                })
-
-                # documentos
-                for a in soup.find_all("a", href=True):
-                    href = urljoin(url, a["href"].split("#")[0])
-                    if not _is_internal(href) or not _looks_doc(href):
-                        continue
-                    link_text = " ".join(a.get_text(strip=True).split())
-                    parent = a.find_parent(["p", "li", "div", "section", "article"])
-                    ctx = " ".join(parent.get_text(" ", strip=True).split()) if parent else link_text
-                    docs.append({
-                        "doc_url": normalize_url(href),
-                        "from_page": url,
-                        "page_title": page_title or h1,
-                        "h1": h1,
-                        "link_text": link_text,
-                        "context": ctx[:900],
-                        "section": path_to_section(urlparse(url).path),
-                    })
-        except (TooManyRedirects, ReadTimeout, ConnectTimeout) as e:
-            err_other += 1
-            print(f"⚠️ Skip {url}: {e}")
-            continue
-        except Exception as e:
-            err_other += 1
-            print(f"⚠️ Error leyendo {url}: {e}")
+        pending.append(url)
 
-        if i % 25 == 0:
-            print(f"… procesadas {i}/{len(routes)} páginas")
+    def progress(done: int, total: int):
+        if done % 25 == 0:
+            print(f"… procesadas {done}/{total} páginas")
 
-        time.sleep(0.05)
+    fetcher = fetcher or Fetcher(cache=default_cache(offline))
+    t0 = time.perf_counter()
+    # "v1": cambiar si cambia lo que extrae _parse_route_page (invalida derivados)
+    results = fetcher.map(pending, _parse_route_page, on_done=progress, cache_ns=f"site_map.routes.v1.{backend_name()}")
 
-    # persistir
-    with open(URL_MANIFEST_PATH, "w", encoding="utf-8") as f:
-        json.dump({"base": BASE_URL, "count": len(urls), "urls": urls}, f, ensure_ascii=False, indent=2)
-    with open(DOC_CATALOG_PATH, "w", encoding="utf-8") as f:
-        json.dump({"count": len(docs), "items": docs}, f, ensure_ascii=False, indent=2)
-    with open(SECTIONS_CATALOG_PATH, "w", encoding="utf-8") as f:
-        json.dump({"count": len(sections), "items": sections}, f, ensure_ascii=False, indent=2)
+    err_404, err_other = 0, 0
 
-    print(f"✅ Manifiesto (routes): {len(urls)} | 📚 Docs: {len(docs)} | 🧭 Secciones: {len(sections)}")
+    # cada entrada va al catálogo apenas se recorre su página (sin listas en memoria)
+    with CatalogWriter(URL_MANIFEST_PATH, key="url", meta={"base": BASE_URL}) as urls, \
+         CatalogWriter(DOC_CATALOG_PATH, key="doc_url") as docs, \
+         CatalogWriter(SECTIONS_CATALOG_PATH, key="url") as sections:
+        for res in results:
+            if res.error is not None:
+                err_other += 1
+                if isinstance(res.error, (TooManyRedirects, ReadTimeout, ConnectTimeout)):
+                    print(f"⚠️ Skip {res.url}: {res.error}")
+                else:
+                    print(f"⚠️ Error leyendo {res.url}: {res.error}")
+                continue
+            ok, section, page_docs = res.value
+            if not ok:
+                err_404 += 1
+                continue
+            urls.add({"url": res.url})
+            if section:
+                sections.add(section)
+            for it in page_docs:
+                docs.add(it)
+
+    print(f"⏱️ {len(pending)} URLs en {time.perf_counter() - t0:.1f}s "
+          f"({fetcher.stats['retries']} reintentos)")
+    if fetcher.cache:
+        print(fetcher.cache.summary())
+    print(fetcher.client.summary())
+
+    print(f"✅ Manifiesto (routes): {urls.count} | 📚 Docs: {docs.count} | 🧭 Secciones: {sections.count}")
     print(f"Resumen: {err_404} con 404, {err_other} con errores/redirecciones.")
-    return urls, docs, sections
+    return urls.count, docs.count, sections.count
 
 # -------------------------- B) CRAWLER (fallback) -----------------------------
 
-def _discover_sitemap_seeds(base: str) -> set:
+def _discover_sitemap_seeds(base: str, fetcher: Fetcher) -> set:
     seeds = set()
     for cand in ("/sitemap.xml", "/sitemap_index.xml"):
         try:
-            r = requests.get(urljoin(base, cand), headers=HEADERS, timeout=HTTP_TIMEOUT, allow_redirects=True)
+            r, _ = fetcher.get(urljoin(base, cand))
             if r.status_code == 200 and "xml" in r.headers.get("Content-Type", "").lower():
                 root = ET.fromstring(r.text)
                 ns = {"sm": "http://www.sitemaps.org/schemas/sitemap/0.9"}
@@ -184,18 +205,17 @@ def _discover_sitemap_seeds(base: str) -> set:
             pass
     return seeds
 
-def _bootstrap_from_home() -> set:
+def _bootstrap_from_home(fetcher: Fetcher) -> set:
     seeds = set()
     try:
-        resp = requests.get(BASE_URL, headers=HEADERS, timeout=HTTP_TIMEOUT, allow_redirects=True)
+        resp, _ = fetcher.get(BASE_URL)
         if resp.status_code >= 400:
             print(f"⚠️ HOME status {resp.status_code}")
             return seeds
         if "text/html" not in resp.headers.get("Content-Type", "").lower():
             return seeds
-        soup = BeautifulSoup(resp.text, "html.parser")
-        for a in soup.find_all("a", href=True):
-            url = normalize_url(urljoin(BASE_URL, a["href"].split("#")[0]))
+        for a in extract(resp.text).links:
+            url = normalize_url(urljoin(BASE_URL, a.href.split("#")[0]))
             if _is_internal(url):
                 seeds.add(url)
         print(f"🔹 Bootstrap HOME: {len(seeds)} enlaces iniciales.")
@@ -204,13 +224,13 @@ def _bootstrap_from_home() -> set:
     return seeds
 
 def _push_if_section(sections: list, from_url: str, a_tag, page_title: str, h1: str):
-    href = a_tag.get("href", "").strip()
+    href = a_tag.href.strip()
     if not href:
         return
     target = normalize_url(urljoin(from_url, href.split("#")[0]))
     if not _is_internal(target) or _looks_doc(target):
         return
-    text = " ".join(a_tag.get_text(" ", strip=True).split())
+    text = " ".join(a_tag.label.split())
     if not text:
         return
     ntext = _norm(text)
@@ -228,12 +248,24 @@ def _push_if_section(sections: list, from_url: str, a_tag, page_title: str, h1:
         "section": section
     })
 
-def build_map_and_catalog():
+def build_map_and_catalog(offline: bool = OFFLINE, resume: bool = CRAWL_RESUME):
+    """Catálogos desde routes.txt o, si no hay, con el crawler BFS.
+
+    El BFS guarda su estado en data/crawl_state/; con `resume` un rastreo
+    interrumpido sigue desde el último checkpoint. Devuelve los conteos
+    (n_urls, n_docs, n_secciones); los catálogos quedan en disco.
+    """
     # Si hay routes.txt válido, úsalo
-    built = build_from_routes_file()
+    built = build_from_routes_file(offline=offline)
     if built:
         return built
 
+    # Crawler secuencial; las páginas también pasan por el almacén
+    fetcher = Fetcher(workers=1, cache=default_cache(offline))
+    # frontera, visitadas y catálogos parciales en disco (checkpoints periódicos)
+    state = CrawlState("site_map", resume=resume,
+                       config={"base": BASE_URL, "depth": CRAWL_MAX_DEPTH, "robots": RESPECT_ROBOTS})
+
     # Si no, usa el crawler tradicional
     rp = None
     if RESPECT_ROBOTS:
@@ -245,88 +277,80 @@ def build_map_and_catalog():
             rp = None
 
     seeds = set()
-    seeds |= _discover_sitemap_seeds(BASE_URL)
-    seeds |= _bootstrap_from_home()
-    seeds.add(normalize_url(BASE_URL))
-    if not seeds:
-        seeds = {normalize_url(BASE_URL)}
-
-    q = deque((s, 0) for s in seeds if _is_internal(s))
-    visited, urls = set(), []
-    catalog_docs, catalog_sections = [], []
+    if state.resumed:
+        print(f"⏯️ Retomando mapeo: {state.count('url')} páginas hechas, {state.pending()} en cola")
+    else:
+        seeds |= _discover_sitemap_seeds(BASE_URL, fetcher)
+        seeds |= _bootstrap_from_home(fetcher)
+        seeds.add(normalize_url(BASE_URL))
+        for s in sorted(seeds):
+            if _is_internal(s):
+                state.push(s, 0)
+        state.checkpoint()
 
     print(f"🌐 Mapeando sitio… seeds={len(seeds)} depth≤{CRAWL_MAX_DEPTH} max={MAX_PAGINAS_RASTREO}")
 
-    while q and len(urls) < MAX_PAGINAS_RASTREO:
-        url, depth = q.popleft()
-        url = normalize_url(url)
-        if url in visited or not _is_internal(url) or (rp and not rp.can_fetch(HEADERS["User-Agent"], url)) or depth > CRAWL_MAX_DEPTH:
+    n_urls = state.count("url")
+    while n_urls < MAX_PAGINAS_RASTREO:
+        item = state.pop()
+        if item is None:
+            break
+        url, depth = item
+        if not _is_internal(url) or (rp and not rp.can_fetch(HEADERS["User-Agent"], url)) or depth > CRAWL_MAX_DEPTH:
             continue
-        visited.add(url)
 
         try:
-            r = requests.get(url, headers=HEADERS, timeout=HTTP_TIMEOUT, allow_redirects=True)
+            r, _ = fetcher.get(url)
             ctype = r.headers.get("Content-Type", "").lower()
             if r.status_code >= 400:
                 print(f"⚠️ {r.status_code} en {url}")
                 continue
 
-            urls.append(url)
+            state.add("url", url)
+            n_urls += 1
 
             if "text/html" in ctype:
-                soup = BeautifulSoup(r.text, "html.parser")
-                page_title, h1 = _page_title_and_h1(soup)
-
-                for a in soup.find_all("a", href=True):
-                    _push_if_section(catalog_sections, url, a, page_title, h1)
-
-                for a in soup.find_all("a", href=True):
-                    href = urljoin(url, a["href"].split("#")[0])
-                    if not _is_internal(href) or not _looks_doc(href):
-                        continue
-                    link_text = " ".join(a.get_text(strip=True).split())
-                    parent = a.find_parent(["p", "li", "div", "section", "article"])
-                    ctx = " ".join(parent.get_text(" ", strip=True).split()) if parent else link_text
-                    catalog_docs.append({
-                        "doc_url": normalize_url(href),
-                        "from_page": url,
-                        "page_title": page_title or h1,
-                        "h1": h1,
-                        "link_text": link_text,
-                        "context": ctx[:900],
-                        "section": path_to_section(urlparse(url).path),
-                    })
-
-                for a in soup.find_all("a", href=True):
-                    nxt = normalize_url(urljoin(url, a["href"].split("#")[0]))
-                    if _is_internal(nxt) and not _looks_doc(nxt) and nxt not in visited:
-                        q.append((nxt, depth + 1))
+                # un solo recorrido del HTML para secciones, documentos y cola
+                page = extract(r.text)
 
-        except Exception as e:
-            print(f"⚠️ Error obteniendo {url}: {e}")
+                sections = []
+                for a in page.links:
+                    _push_if_section(sections, url, a, page.title, page.h1)
+                for it in sections:
+                    state.add("section", it)
 
-        time.sleep(0.12)
+                for it in _doc_links(url, page):
+                    state.add("doc", it)
 
-    if not urls:
-        urls = [normalize_url(BASE_URL)]
-        print("ℹ️ Fallback: manifiesto vacío, se agrega la home.")
-
-    with open(URL_MANIFEST_PATH, "w", encoding="utf-8") as f:
-        json.dump({"base": BASE_URL, "count": len(urls), "urls": urls}, f, ensure_ascii=False, indent=2)
-    with open(DOC_CATALOG_PATH, "w", encoding="utf-8") as f:
-        json.dump({"count": len(catalog_docs), "items": catalog_docs}, f, ensure_ascii=False, indent=2)
-
-    # deduplicar secciones por URL (texto más largo)
-    best_by_url = {}
-    for it in catalog_sections:
-        u = it["url"]
-        if u not in best_by_url or len(it["text"]) > len(best_by_url[u]["text"]):
-            best_by_url[u] = it
-    sections_unique = list(best_by_url.values())
-
-    with open(SECTIONS_CATALOG_PATH, "w", encoding="utf-8") as f:
-        json.dump({"count": len(sections_unique), "items": sections_unique}, f, ensure_ascii=False, indent=2)
-
-    print(f"📜 Manifiesto: {len(urls)} URLs | 📚 Docs: {len(catalog_docs)} | 🧭 Secciones: {len(sections_unique)}")
-    return urls, catalog_docs, sections_unique
+                for a in page.links:
+                    nxt = normalize_url(urljoin(url, a.href.split("#")[0]))
+                    if _is_internal(nxt) and not _looks_doc(nxt):
+                        state.push(nxt, depth + 1)
 
+        except Exception as e:
+            print(f"⚠️ Error obteniendo {url}: {e}")
+            continue
+        finally:
+            state.page_done()
+
+    state.checkpoint()
+    print(fetcher.client.summary())
+
+    # los catálogos salen del estado en disco, fila por fila
+    with CatalogWriter(URL_MANIFEST_PATH, key="url", meta={"base": BASE_URL}) as urls:
+        for u in state.items("url"):
+            urls.add({"url": u})
+        if not urls.count:
+            urls.add({"url": normalize_url(BASE_URL)})
+            print("ℹ️ Fallback: manifiesto vacío, se agrega la home.")
+    with CatalogWriter(DOC_CATALOG_PATH, key="doc_url") as docs:
+        for it in state.items("doc"):
+            docs.add(it)
+    # secciones deduplicadas por URL (texto más largo)
+    with CatalogWriter(SECTIONS_CATALOG_PATH, key="url") as sections:
+        for it in state.best_items("section", "url", "text"):
+            sections.add(it)
+    state.finish()
+
+    print(f"📜 Manifiesto: {urls.count} URLs | 📚 Docs: {docs.count} | 🧭 Secciones: {sections.count}")
+    return urls.count, docs.count, sections.count
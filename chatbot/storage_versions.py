@@ -0,0 +1,90 @@
+# chatbot/storage_versions.py
+# -----------------------------------------------------------------------------
+# Versiones del índice dentro de STORAGE_DIR
+# -----------------------------------------------------------------------------
+#   data/storage/versions/<versión>/   cada (re)indexación escribe una nueva
+#   data/storage/CURRENT               nombre de la versión activa
+# El cambio de versión es un os.replace del puntero (atómico): los lectores
+# ven la versión vieja o la nueva, nunca una a medias. Si no hay puntero se usa
+# STORAGE_DIR directamente (formato anterior).
+# -----------------------------------------------------------------------------
+
+import os
+import shutil
+import time
+
+from chatbot.config import STORAGE_DIR
+from chatbot.vector_store import has_binary_store
+
+VERSIONS_SUBDIR = "versions"
+CURRENT_FILE = "CURRENT"
+
+
+def pointer_path(root: str = STORAGE_DIR) -> str:
+    return os.path.join(root, CURRENT_FILE)
+
+
+def current_dir(root: str = STORAGE_DIR) -> str:
+    """Directorio de la versión activa (o STORAGE_DIR si no hay versiones)."""
+    try:
+        with open(pointer_path(root), "r", encoding="utf-8") as f:
+            name = f.read().strip()
+        if name:
+            path = os.path.join(root, VERSIONS_SUBDIR, name)
+            if os.path.isdir(path):
+                return path
+    except OSError:
+        pass
+    return root
+
+
+def has_index(path: str) -> bool:
+    """¿Hay un índice completo (binario o JSON de LlamaIndex) en `path`?"""
+    return has_binary_store(path) or os.path.exists(os.path.join(path, "docstore.json"))
+
+
+def new_version_dir(root: str = STORAGE_DIR) -> str:
+    name = time.strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}"
+    path = os.path.join(root, VERSIONS_SUBDIR, name)
+    n = 0
+    while True:
+        try:
+            os.makedirs(path, exist_ok=False)
+            return path
+        except FileExistsError:
+            # dos versiones en el mismo segundo (reindexación incremental rápida)
+            n += 1
+            path = os.path.join(root, VERSIONS_SUBDIR, f"{name}-{n}")
+
+
+def publish(path: str, root: str = STORAGE_DIR) -> None:
+    """Activa la versión `path` de forma atómica."""
+    name = os.path.basename(os.path.normpath(path))
+    tmp = pointer_path(root) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(name + "\n")
+    os.replace(tmp, pointer_path(root))
+
+
+def gc(keep: int = 2, root: str = STORAGE_DIR) -> list[str]:
+    """Borra versiones viejas o incompletas (builds fallidos).
+
+    De la más nueva a la más vieja, conserva las completas mientras haya menos
+    de `keep` conservadas. La activa se conserva siempre y cuenta dentro de
+    `keep`. Llamar solo cuando no hay otra construcción en curso.
+    """
+    base = os.path.join(root, VERSIONS_SUBDIR)
+    if not os.path.isdir(base):
+        return []
+    active = os.path.basename(current_dir(root))
+    kept, removed = 0, []
+    for name in sorted(os.listdir(base), reverse=True):
+        if name == active:
+            kept += 1
+            continue
+        if kept < keep and has_index(os.path.join(base, name)):
+            kept += 1
+            continue
+        shutil.rmtree(os.path.join(base, name), ignore_errors=True)
+        removed.append(name)
+    return removed
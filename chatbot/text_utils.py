@@ -0,0 +1,51 @@
+# chatbot/text_utils.py
+# Utilidades de texto compartidas (normalización, tokens, similitud).
+# Sin dependencias pesadas: se pueden importar desde scripts y benchmarks.
+
+import difflib
+import re
+import unicodedata
+from urllib.parse import urlparse
+
+STOPWORDS_ES = {
+    "de","la","que","el","en","y","a","los","del","se","las","por","un","para","con","no","una","su","al",
+    "lo","como","mas","más","pero","sus","le","ya","o","este","si","sí","porque","esta","entre","cuando",
+    "muy","sin","sobre","tambien","también","me","hasta","hay","donde","dónde","quien","quién","desde",
+    "todo","nos","durante","todos","uno","les","ni","contra","otros","ese","eso","ante","ellos","e","esto",
+    "mi","mí","antes","algunos","que","qué","unos","yo","otro","otras","otra","ir","seccion","sección",
+    "enlace","link","ruta","url","acceder","pagina","página","al","la","el"
+}
+
+def norm_text(s: str) -> str:
+    """Normaliza: sin tildes, minúsculas, espacios compactados."""
+    s = "".join(c for c in unicodedata.normalize("NFD", s) if unicodedata.category(c) != "Mn")
+    return re.sub(r"\s+", " ", s).strip().lower()
+
+def tokens_of_norm(n: str) -> set[str]:
+    """Como `tokens`, pero sobre un texto ya normalizado."""
+    return {t for t in re.findall(r"[a-z0-9\-]+", n) if t not in STOPWORDS_ES and len(t) > 2}
+
+def tokens(s: str) -> set[str]:
+    """Tokens sin stopwords, útiles para coincidencia."""
+    return tokens_of_norm(norm_text(s))
+
+def path_tokens(u: str) -> set[str]:
+    """Tokens de la ruta /path/de/la/url (útil para detectar secciones)."""
+    p = urlparse(u).path.strip("/")
+    toks = set()
+    for part in p.split("/"):
+        if not part:
+            continue
+        toks |= set(re.findall(r"[a-z0-9]+", part.replace("-", " ")))
+    return toks
+
+def path_depth(u: str) -> int:
+    p = urlparse(u).path.strip("/")
+    return 0 if not p else len([x for x in p.split("/") if x])
+
+def similarity(a: str, b: str) -> float:
+    """Score combinado: similitud difusa + jaccard de tokens."""
+    ta, tb = tokens(a), tokens(b)
+    jacc = (len(ta & tb) / len(ta | tb)) if (ta and tb) else 0.0
+    fuzzy = difflib.SequenceMatcher(None, norm_text(a), norm_text(b)).ratio()
+    return 0.6 * fuzzy + 0.4 * jacc
@@ -0,0 +1,258 @@
+# chatbot/vector_store.py
+# -----------------------------------------------------------------------------
+# Búsqueda densa vectorizada (NumPy) + almacenamiento binario del índice
+# -----------------------------------------------------------------------------
+# Los vectores se guardan como una matriz float32 contigua con filas
+# normalizadas: la similitud coseno de VARIAS consultas contra TODO el índice
+# es un único producto de matrices + un top-k con argpartition.
+#
+# Formato en disco (reemplaza los JSON de LlamaIndex en STORAGE_DIR):
+#   vectors.npy    matriz float32 (n × d), filas unitarias; se abre con mmap
+#   nodes.jsonl    un nodo por línea (texto + metadatos), mismo orden
+#   offsets.npy    int64 (n + 1) offsets de cada línea de nodes.jsonl
+#   binary_meta.json  modelo/dimensión/conteo; se escribe AL FINAL (marca
+#                     de almacén completo)
+# -----------------------------------------------------------------------------
+
+import json
+import os
+import sys
+from typing import Any, List
+
+import numpy as np
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.schema import BaseNode
+from llama_index.core.storage.docstore.utils import doc_to_json, json_to_doc
+from llama_index.core.vector_stores.types import (
+    BasePydanticVectorStore,
+    VectorStoreQuery,
+    VectorStoreQueryResult,
+)
+
+VECTORS_FILE = "vectors.npy"
+NODES_FILE = "nodes.jsonl"
+OFFSETS_FILE = "offsets.npy"
+META_FILE = "binary_meta.json"
+FORMAT_VERSION = 1
+
+
+def _unit_rows(m: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(m, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return m / norms
+
+
+class DenseVectors:
+    """Matriz (n × d) de embeddings normalizados + ids de nodo por fila."""
+
+    def __init__(self, ids: list[str], matrix: np.ndarray, normalized: bool = False):
+        self.ids = list(ids)
+        if normalized:
+            self.matrix = matrix          # p. ej. un np.memmap de solo lectura
+        else:
+            self.matrix = _unit_rows(np.asarray(matrix, dtype=np.float32))
+
+    @classmethod
+    def from_embedding_dict(cls, embedding_dict: dict[str, list[float]]) -> "DenseVectors":
+        """Desde el `embedding_dict` de un SimpleVectorStore de LlamaIndex."""
+        ids = list(embedding_dict.keys())
+        if not ids:
+            return cls([], np.zeros((0, 0), dtype=np.float32))
+        return cls(ids, np.array([embedding_dict[i] for i in ids], dtype=np.float32))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, queries, top_k: int) -> list[list[tuple[str, float]]]:
+        """Top-k por similitud coseno para cada consulta (una sola pasada)."""
+        q = _unit_rows(np.atleast_2d(np.asarray(queries, dtype=np.float32)))
+        if not self.ids:
+            return [[] for _ in range(q.shape[0])]
+        scores = q @ self.matrix.T
+        k = min(top_k, scores.shape[1])
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        out = []
+        for row, idx in zip(scores, top):
+            idx = idx[np.argsort(-row[idx], kind="stable")]
+            out.append([(self.ids[i], float(row[i])) for i in idx])
+        return out
+
+
+# ============================ almacén binario ================================
+
+def has_binary_store(persist_dir: str) -> bool:
+    return os.path.exists(os.path.join(persist_dir, META_FILE))
+
+
+def _atomic_path(path: str) -> str:
+    return f"{path}.tmp"
+
+
+def write_binary_store(persist_dir: str, nodes: list[BaseNode],
+                       embeddings, model_name: str = "") -> None:
+    """Escribe nodos + vectores en formato binario (cada archivo atómico)."""
+    os.makedirs(persist_dir, exist_ok=True)
+    matrix = _unit_rows(np.asarray(embeddings, dtype=np.float32).reshape(len(nodes), -1))
+
+    # primero se quita la marca: si algo falla no queda un almacén "completo" a medias
+    meta_path = os.path.join(persist_dir, META_FILE)
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+    vec_path = os.path.join(persist_dir, VECTORS_FILE)
+    with open(_atomic_path(vec_path), "wb") as f:
+        np.save(f, matrix)
+    os.replace(_atomic_path(vec_path), vec_path)
+
+    nodes_path = os.path.join(persist_dir, NODES_FILE)
+    offsets = [0]
+    with open(_atomic_path(nodes_path), "wb") as f:
+        for node in nodes:
+            data = doc_to_json(node)
+            data.get("__data__", {}).pop("embedding", None)
+            line = (json.dumps(data, ensure_ascii=False) + "\n").encode("utf-8")
+            f.write(line)
+            offsets.append(offsets[-1] + len(line))
+    os.replace(_atomic_path(nodes_path), nodes_path)
+
+    off_path = os.path.join(persist_dir, OFFSETS_FILE)
+    with open(_atomic_path(off_path), "wb") as f:
+        np.save(f, np.asarray(offsets, dtype=np.int64))
+    os.replace(_atomic_path(off_path), off_path)
+
+    meta = {
+        "format": FORMAT_VERSION,
+        "model": model_name,
+        "count": len(nodes),
+        "dim": int(matrix.shape[1]) if len(nodes) else 0,
+        "ids": [n.node_id for n in nodes],
+    }
+    with open(_atomic_path(meta_path), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(_atomic_path(meta_path), meta_path)
+
+
+class BinaryVectorStore(BasePydanticVectorStore):
+    """Vector store de solo lectura sobre el formato binario (mmap).
+
+    Guarda el texto de los nodos, así que LlamaIndex no necesita docstore:
+    `VectorStoreIndex.from_vector_store(store)` da un índice funcional.
+    """
+
+    stores_text: bool = True
+    persist_dir: str
+
+    _dense: DenseVectors = PrivateAttr()
+    _offsets: Any = PrivateAttr()
+    _fd: int = PrivateAttr()
+    _row: dict = PrivateAttr()
+
+    def __init__(self, persist_dir: str, **kwargs: Any):
+        super().__init__(persist_dir=persist_dir, **kwargs)
+        with open(os.path.join(persist_dir, META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        ids = meta.get("ids", [])
+        if ids:
+            matrix = np.load(os.path.join(persist_dir, VECTORS_FILE), mmap_mode="r")
+        else:
+            matrix = np.zeros((0, 0), dtype=np.float32)
+        self._dense = DenseVectors(ids, matrix, normalized=True)
+        self._offsets = np.load(os.path.join(persist_dir, OFFSETS_FILE))
+        self._fd = os.open(os.path.join(persist_dir, NODES_FILE), os.O_RDONLY)
+        self._row = {nid: i for i, nid in enumerate(ids)}
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "BinaryVectorStore"
+
+    @property
+    def client(self) -> Any:
+        return None
+
+    @property
+    def dense(self) -> DenseVectors:
+        return self._dense
+
+    def __del__(self):
+        try:
+            os.close(self._fd)
+        except Exception:
+            pass
+
+    def _read_row(self, i: int) -> BaseNode:
+        start, end = int(self._offsets[i]), int(self._offsets[i + 1])
+        raw = os.pread(self._fd, end - start, start)
+        return json_to_doc(json.loads(raw))
+
+    def get_node(self, node_id: str) -> BaseNode:
+        """Nodo por id (lectura perezosa de su línea en nodes.jsonl)."""
+        return self._read_row(self._row[node_id])
+
+    def get_vectors(self, node_ids: list[str]) -> np.ndarray:
+        """Filas (normalizadas) de esos nodos, para copiarlas a otra versión."""
+        if not node_ids:
+            return np.zeros((0, self._dense.matrix.shape[1]), dtype=np.float32)
+        return np.asarray(self._dense.matrix[[self._row[i] for i in node_ids]])
+
+    def add(self, nodes: List[BaseNode], **add_kwargs: Any) -> List[str]:
+        raise NotImplementedError("BinaryVectorStore es de solo lectura; reconstruye el índice.")
+
+    def delete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:
+        raise NotImplementedError("BinaryVectorStore es de solo lectura; reconstruye el índice.")
+
+    def query(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        if query.filters is not None or query.node_ids or query.doc_ids:
+            raise ValueError("BinaryVectorStore no soporta filtros.")
+        hits = self._dense.search([query.query_embedding], query.similarity_top_k)[0]
+        return VectorStoreQueryResult(
+            nodes=[self.get_node(nid) for nid, _ in hits],
+            similarities=[score for _, score in hits],
+            ids=[nid for nid, _ in hits],
+        )
+
+
+# ============================ carga / conversión =============================
+
+def load_index(persist_dir: str, embed_model):
+    """Índice desde STORAGE_DIR: formato binario si existe, si no JSON (legado)."""
+    from llama_index.core import StorageContext, VectorStoreIndex, load_indices_from_storage
+
+    if has_binary_store(persist_dir):
+        store = BinaryVectorStore(persist_dir=persist_dir)
+        return VectorStoreIndex.from_vector_store(store, embed_model=embed_model)
+    storage = StorageContext.from_defaults(persist_dir=persist_dir)
+    return load_indices_from_storage(storage, embed_model=embed_model)[0]
+
+
+def persist_index(index, persist_dir: str, model_name: str = "") -> None:
+    """Guarda un VectorStoreIndex en memoria (SimpleVectorStore) en formato binario."""
+    emb = index.vector_store.to_dict().get("embedding_dict", {})
+    ids = list(emb.keys())
+    nodes = index.docstore.get_nodes(ids)
+    write_binary_store(persist_dir, nodes, [emb[i] for i in ids], model_name=model_name)
+
+
+def convert_storage(src: str, dst: str | None = None, model_name: str = "") -> int:
+    """Conversión única: JSON de LlamaIndex → formato binario."""
+    from llama_index.core import StorageContext
+
+    dst = dst or src
+    storage = StorageContext.from_defaults(persist_dir=src)
+    emb = storage.vector_store.to_dict().get("embedding_dict", {})
+    ids = list(emb.keys())
+    nodes = storage.docstore.get_nodes(ids)
+    write_binary_store(dst, nodes, [emb[i] for i in ids], model_name=model_name)
+    return len(ids)
+
+
+if __name__ == "__main__":
+    # python -m chatbot.vector_store convert [origen] [destino]
+    from chatbot.config import EMBEDDING_MODEL, STORAGE_DIR
+
+    if len(sys.argv) < 2 or sys.argv[1] != "convert":
+        print("Uso: python -m chatbot.vector_store convert [origen] [destino]")
+        sys.exit(2)
+    src = sys.argv[2] if len(sys.argv) > 2 else STORAGE_DIR
+    dst = sys.argv[3] if len(sys.argv) > 3 else src
+    n = convert_storage(src, dst, model_name=EMBEDDING_MODEL)
+    print(f"✅ {n} nodos convertidos a formato binario en {dst}")
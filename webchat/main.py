@@ -1,6 +1,14 @@
 # webchat/main.py
+# El servidor arranca SIN importar chatbot.bot (llama_index, torch, modelo…):
+# el puerto queda abierto de inmediato y la carga pesada corre en segundo
+# plano. /health = proceso vivo; /ready = índice y modelo cargados.
 import asyncio
+import importlib
 import logging
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 import uvicorn
 from fastapi import FastAPI, Request
@@ -9,8 +17,10 @@ from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
-from chatbot.bot import responder_pregunta   # ⬅️ quitamos _get_index/_get_engine/_get_retriever
-from chatbot.indexer import crear_o_cargar_indice
+from chatbot.config import (
+    QA_EXECUTOR, QA_WORKERS, QA_MAX_INFLIGHT, REINDEX_INTERVAL_HOURS, STARTUP_RETRY_MIN_S, STARTUP_RETRY_MAX_S,
+)
+from chatbot.text_utils import norm_text
 
 app = FastAPI(title="Chatbot UESVALLE")
 
@@ -28,10 +38,71 @@ templates = Jinja2Templates(directory="webchat/templates")
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("uesvalle-bot")
 
+# ---------------- ejecución de preguntas fuera del event loop ----------------
+# responder_pregunta es síncrona y pesada (embedding + síntesis). Se ejecuta en
+# un pool dedicado para que /health y los estáticos sigan respondiendo; las
+# preguntas idénticas en curso comparten un único cálculo.
+
+_executor = None
+_inflight: dict[str, asyncio.Future] = {}
+
+# fases: iniciando → (construyendo_indice) → cargando_indice → listo | sin_indice | error
+_estado = {"fase": "iniciando", "indice": None}
+
+# tandas de precarga con QA_EXECUTOR="process" (ver _precargar)
+PRECARGA_TANDAS = 5
+
+class PoolSaturado(Exception):
+    pass
+
+class NoListo(Exception):
+    pass
+
+def _bot(nombre: str, *args):
+    """Llama chatbot.bot.<nombre> importándolo en el worker (no en el arranque)."""
+    return getattr(importlib.import_module("chatbot.bot"), nombre)(*args)
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        if QA_EXECUTOR == "process":
+            _executor = ProcessPoolExecutor(
+                max_workers=QA_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        else:
+            _executor = ThreadPoolExecutor(max_workers=QA_WORKERS, thread_name_prefix="qa")
+    return _executor
+
+async def _responder(q: str) -> str:
+    if _estado["fase"] != "listo":
+        raise NoListo()
+    key = norm_text(q)
+    fut = _inflight.get(key)
+    if fut is None:
+        if len(_inflight) >= QA_MAX_INFLIGHT:
+            raise PoolSaturado()
+        fut = asyncio.get_running_loop().run_in_executor(_get_executor(), _bot, "responder_pregunta", q)
+        _inflight[key] = fut
+        fut.add_done_callback(lambda f: _inflight.pop(key, None) if _inflight.get(key) is f else None)
+    # shield: si un cliente se desconecta, el cálculo compartido sigue
+    return await asyncio.shield(fut)
+
 @app.get("/health", response_class=PlainTextResponse)
 async def health():
     return "ok"
 
+@app.get("/ready")
+async def ready():
+    listo = _estado["fase"] == "listo"
+    return JSONResponse(content={"listo": listo, **_estado}, status_code=200 if listo else 503)
+
+@app.get("/metricas")
+async def metricas():
+    # con QA_EXECUTOR="process" son los contadores de UN worker
+    if _estado["fase"] != "listo":
+        return JSONResponse(content={"listo": False, **_estado}, status_code=503)
+    return await asyncio.get_running_loop().run_in_executor(_get_executor(), _bot, "metricas")
+
 @app.get("/widget", response_class=HTMLResponse)
 async def widget(request: Request):
     return templates.TemplateResponse("widget.html", {"request": request})
@@ -41,12 +112,24 @@ async def preguntar(q: str):
     try:
         if not q or not q.strip():
             return {"respuesta": "Por favor, escribe tu pregunta."}
-        respuesta = responder_pregunta(q)
+        respuesta = await _responder(q)
         if not respuesta or len(respuesta.strip()) < 12:
             respuesta = ("No tengo evidencia suficiente para responder con certeza. "
                          "Intenta con más contexto o revisa Atención al Ciudadano.")
         logger.info("Q: %s | ok", q[:160])
         return {"respuesta": respuesta}
+    except NoListo:
+        return JSONResponse(
+            content={"respuesta": "El asistente se está iniciando. Intenta de nuevo en unos segundos."},
+            status_code=503,
+            headers={"Retry-After": "10"},
+        )
+    except PoolSaturado:
+        logger.warning("Pool de preguntas saturado (%d en curso)", len(_inflight))
+        return JSONResponse(
+            content={"respuesta": "El asistente está atendiendo muchas consultas. Intenta de nuevo en unos segundos."},
+            status_code=503,
+        )
     except Exception:
         logger.exception("Error en /preguntar")
         return JSONResponse(
@@ -54,25 +137,100 @@ async def preguntar(q: str):
             status_code=500,
         )
 
+# ------------------ reindexación en segundo plano (hot-swap) -----------------
+# El mapeo + índice corre en OTRO proceso (python -m chatbot.indexer --rebuild),
+# que escribe una versión nueva de STORAGE_DIR y la publica al terminar. El bot
+# detecta el cambio de puntero y pasa a la nueva versión; mientras tanto sigue
+# respondiendo con la anterior. Si el build falla, nada cambia.
+
+async def _reindexar() -> bool:
+    proc = await asyncio.create_subprocess_exec(sys.executable, "-m", "chatbot.indexer", "--rebuild")
+    code = await proc.wait()
+    if code != 0:
+        logger.error("⚠️ Reindexación fallida (código %s); se mantiene la versión anterior.", code)
+        return False
+    return True
+
+def _precargar_worker() -> tuple[int, str]:
+    return os.getpid(), _bot("precargar_indice")
+
+async def _precargar() -> bool:
+    """Carga la versión publicada en TODOS los workers antes de decir "listo".
+
+    Con hilos basta una llamada (comparten el módulo). Con procesos se lanzan
+    QA_WORKERS llamadas a la vez, por tandas, hasta que respondió cada proceso:
+    en un worker ya cargado la llamada es inmediata.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        if QA_EXECUTOR != "process":
+            sdir = await loop.run_in_executor(_get_executor(), _bot, "precargar_indice")
+        else:
+            listos: set[int] = set()
+            for _ in range(PRECARGA_TANDAS):
+                res = await asyncio.gather(*(loop.run_in_executor(_get_executor(), _precargar_worker)
+                                             for _ in range(QA_WORKERS)))
+                listos |= {pid for pid, _ in res}
+                sdir = res[0][1]
+                if len(listos) >= QA_WORKERS:
+                    break
+            else:
+                logger.warning("Índice precargado en %d de %d workers", len(listos), QA_WORKERS)
+        logger.info("Índice listo: %s", sdir)
+        _estado["indice"] = sdir
+        return True
+    except Exception:
+        logger.exception("⚠️ No se pudo precargar el índice")
+        return False
+
+async def _intentar_arranque() -> bool:
+    """Importa el bot, construye el índice si falta y lo carga (modelo incluido)."""
+    loop = asyncio.get_running_loop()
+    try:
+        if not await loop.run_in_executor(_get_executor(), _bot, "indice_disponible"):
+            logger.info("Sin índice: construyendo en segundo plano (mapeo + catálogo)…")
+            _estado["fase"] = "construyendo_indice"
+            if not await _reindexar():
+                _estado["fase"] = "sin_indice"
+                return False
+        _estado["fase"] = "cargando_indice"
+        _estado["fase"] = "listo" if await _precargar() else "error"
+    except Exception:
+        logger.exception("⚠️ Error en el arranque")
+        _estado["fase"] = "error"
+    return _estado["fase"] == "listo"
+
+async def _arranque():
+    """Reintenta con espera creciente hasta tener un índice cargado."""
+    espera = STARTUP_RETRY_MIN_S
+    while not await _intentar_arranque():
+        logger.warning("Sin índice cargado (%s); nuevo intento en %d s", _estado["fase"], espera)
+        _estado["reintento_s"] = espera
+        await asyncio.sleep(espera)
+        espera = min(espera * 2, STARTUP_RETRY_MAX_S)
+    _estado.pop("reintento_s", None)
+
 @app.on_event("startup")
 async def startup():
-    # Warm-up: asegura que exista índice (hará el mapeo y catálogo antes de indexar)
-    logger.info("Inicializando índice (mapeo automático de rutas + catálogo)…")
-    crear_o_cargar_indice()
-    logger.info("Índice listo.")
-
-    # Reindexación automática cada 24h
     async def tarea_reindexacion():
+        await _arranque()
+        # con un índice ya cargado: reindexación automática cada REINDEX_INTERVAL_HOURS
         while True:
+            await asyncio.sleep(60 * 60 * REINDEX_INTERVAL_HOURS)
             try:
                 logger.info("🔁 Reindexación automática iniciada (map + index)…")
-                crear_o_cargar_indice()
-                logger.info("✅ Reindexación completada.")
+                if await _reindexar() and await _precargar():
+                    _estado["fase"] = "listo"
+                    logger.info("✅ Reindexación completada.")
             except Exception:
                 logger.exception("⚠️ Error durante la reindexación automática")
-            await asyncio.sleep(60 * 60 * 24)
 
     asyncio.create_task(tarea_reindexacion())
 
+@app.on_event("shutdown")
+async def shutdown():
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+
 if __name__ == "__main__":
     uvicorn.run("webchat.main:app", host="127.0.0.1", port=8000, reload=True)